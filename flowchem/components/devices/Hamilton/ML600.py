@@ -16,7 +16,7 @@ from loguru import logger
 
 from flowchem.components.stdlib import Pump
 from flowchem.exceptions import DeviceError, InvalidConfiguration
-from flowchem.units import flowchem_ureg
+from flowchem.units import flowchem_ureg, parse_quantity
 
 if TYPE_CHECKING:
     import pint
@@ -350,6 +350,11 @@ class ML600(Pump):
             name=config.get("name"),
         )
 
+    @property
+    def _bus(self):
+        """Daisy-chained devices share the same pump IO object."""
+        return self.pump_io
+
     async def initialize(self, hw_init=False, init_speed: str = "200 sec / stroke"):
         """Must be called after init before anything else."""
         # Test connectivity by querying the pump's firmware version
@@ -380,12 +385,12 @@ class ML600(Pump):
         if speed_value is None:
             return ""
 
-        speed = flowchem_ureg(speed_value)
+        speed = parse_quantity(speed_value)
 
         # Alert if out of bounds but don't raise exceptions, according to general philosophy.
         # Target flow rate too high
-        if speed < flowchem_ureg("2 sec/stroke"):
-            speed = flowchem_ureg("2 sec/stroke")
+        if speed < parse_quantity("2 sec/stroke"):
+            speed = parse_quantity("2 sec/stroke")
             warnings.warn(
                 f"Desired speed ({speed}) is unachievable!"
                 f"Set to {self._seconds_per_stroke_to_flowrate(speed)}"
@@ -393,8 +398,8 @@ class ML600(Pump):
             )
 
         # Target flow rate too low
-        if speed > flowchem_ureg("3692 sec/stroke"):
-            speed = flowchem_ureg("3692 sec/stroke")
+        if speed > parse_quantity("3692 sec/stroke"):
+            speed = parse_quantity("3692 sec/stroke")
             warnings.warn(
                 f"Desired speed ({speed}) is unachievable!"
                 f"Set to {self._seconds_per_stroke_to_flowrate(speed)}"
@@ -441,7 +446,7 @@ class ML600(Pump):
         example to dispense 9 mL from a 10 mL syringe you would determine the number of
         steps by multiplying 48000 steps (9 mL/10 mL) to get 43,200 steps.
         """
-        flowrate = flowchem_ureg(flowrate)
+        flowrate = parse_quantity(flowrate)
         flowrate_in_steps_sec = flowrate * self._steps_per_ml
         seconds_per_stroke = (1 / flowrate_in_steps_sec).to("second/stroke")
 
@@ -457,7 +462,7 @@ class ML600(Pump):
     def _volume_to_step_position(self, volume_w_units: str) -> int:
         """Converts a volume to a step position."""
         # noinspection PyArgumentEqualDefault
-        volume = flowchem_ureg(volume_w_units)
+        volume = parse_quantity(volume_w_units)
         steps = volume * self._steps_per_ml
         return round(steps.m_as("steps")) + self._offset_steps
 
@@ -569,7 +574,7 @@ class ML600(Pump):
         wait: bool = False,
     ):
         """Get volume from valve specified at given flowrate."""
-        cur_vol = flowchem_ureg(await self.get_current_volume())
+        cur_vol = parse_quantity(await self.get_current_volume())
         if (cur_vol + volume) > self._max_vol:
             warnings.warn(
                 f"Cannot withdraw {volume} given the current syringe position {cur_vol} and a "
@@ -596,7 +601,7 @@ class ML600(Pump):
         wait: bool = False,
     ):
         """Delivers volume to valve specified at given flow rate."""
-        cur_vol = flowchem_ureg(await self.get_current_volume())
+        cur_vol = parse_quantity(await self.get_current_volume())
         if volume > cur_vol:
             warnings.warn(
                 f"Cannot deliver {volume} given the current syringe position {cur_vol}!"
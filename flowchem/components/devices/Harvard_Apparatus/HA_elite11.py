@@ -8,7 +8,7 @@ import asyncio
 import warnings
 from dataclasses import dataclass
 from enum import Enum
-from typing import List, Optional, Set, Tuple
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
 
 import aioserial
 from loguru import logger
@@ -16,7 +16,7 @@ from pydantic import BaseModel
 
 from flowchem.components.stdlib import Pump
 from flowchem.exceptions import DeviceError, InvalidConfiguration
-from flowchem.units import flowchem_ureg
+from flowchem.units import flowchem_ureg, parse_quantity
 
 
 def _parse_version(version_text: str) -> Tuple[int, int, int]:
@@ -412,6 +412,11 @@ class Elite11InfuseOnly(Pump):
             syringe_volume=syringe_volume,
         )
 
+    @property
+    def _bus(self):
+        """Daisy-chained devices share the same pump IO object."""
+        return self.pump_io
+
     async def initialize(self):
         """Ensure a valid connection with the pump has been established and sets parameters."""
         # Autodetect address if none provided
@@ -464,8 +469,8 @@ class Elite11InfuseOnly(Pump):
         )
         return await self.pump_io.write_and_read_reply(cmd, return_parsed=parse)
 
-    async def _bound_rate_to_pump_limits(self, rate: str) -> float:
-        """Bound the rate provided to pump's limit. These are function of the syringe diameter.
+    async def _bound_rate_to_pump_limits(self, rate: Union[str, float]) -> float:
+        """Bound the rate provided (with units, or in ml/min) to pump's limit. These are function of the syringe diameter.
 
         NOTE: Infusion and withdraw limits are equal!"""
         # Get current pump limits (those are function of the syringe diameter)
@@ -474,10 +479,13 @@ class Elite11InfuseOnly(Pump):
         )
 
         # Lower limit usually expressed in nl/min so unit-aware quantities are needed
-        lower_limit, upper_limit = map(flowchem_ureg, limits_raw.split(" to "))
+        lower_limit, upper_limit = map(parse_quantity, limits_raw.split(" to "))
 
         # Also add units to the provided rate
-        set_rate = flowchem_ureg(rate)
+        if isinstance(rate, str):
+            set_rate = parse_quantity(rate)
+        else:
+            set_rate = rate * flowchem_ureg.ml / flowchem_ureg.min
 
         # Bound rate to acceptance range
         if set_rate < lower_limit:
@@ -529,7 +537,7 @@ class Elite11InfuseOnly(Pump):
 
         :param volume_w_units: the volume of the syringe.
         """
-        volume = flowchem_ureg(volume_w_units)
+        volume = parse_quantity(volume_w_units)
         await self._send_command_and_read_reply(
             Elite11Commands.SYRINGE_VOLUME, parameter=f"{volume.m_as('ml'):.15f} m"
         )
@@ -569,8 +577,8 @@ class Elite11InfuseOnly(Pump):
             Elite11Commands.INFUSE_RATE
         )  # e.g. '0.2 ml/min'
 
-    async def set_infusion_rate(self, rate: str):
-        """Sets the infusion rate"""
+    async def set_infusion_rate(self, rate: Union[str, float]):
+        """Sets the infusion rate, with units or in ml/min"""
         set_rate = await self._bound_rate_to_pump_limits(rate=rate)
         await self._send_command_and_read_reply(
             Elite11Commands.INFUSE_RATE, parameter=f"{set_rate:.10f} m/m"
@@ -618,7 +626,7 @@ class Elite11InfuseOnly(Pump):
         """
         Set syringe diameter. This can be set in the interval 1 mm to 33 mm
         """
-        diameter = flowchem_ureg(diameter_w_units)
+        diameter = parse_quantity(diameter_w_units)
         if not 1 * flowchem_ureg.mm <= diameter <= 33 * flowchem_ureg.mm:
             warnings.warn(
                 f"Diameter provided ({diameter}) is not valid, ignored! [Accepted range: 1-33 mm]"
@@ -655,7 +663,7 @@ class Elite11InfuseOnly(Pump):
         """
         Sets target volume in ml. If the volume is set to 0, the target is cleared.
         """
-        target_volume = flowchem_ureg(volume)
+        target_volume = parse_quantity(volume)
         if target_volume.magnitude == 0:
             await self._send_command_and_read_reply(Elite11Commands.CLEAR_TARGET_VOLUME)
         else:
@@ -835,12 +843,22 @@ class Elite11InfuseWithdraw(Elite11InfuseOnly):
     async def __aexit__(self, exc_type, exc_value, traceback):
         await self.stop()
 
+    def _native_setpoints(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Converts the rate to ml/min. The limits depend on the syringe, so they are only applied by the pump."""
+        if "rate" not in params:
+            return {}
+        rate = parse_quantity(params["rate"]).m_as("ml/min")
+        if rate < 0:
+            raise ValueError(f"Negative rate {params['rate']} for {self}.")
+        return {"rate": rate}
+
     async def _update(self):
         """Actuates flow rate changes."""
         if self.rate == 0:
             await self.stop()
         else:
-            await self.set_infusion_rate(str(self.rate))
+            # pre-converted at compile time, if applied as part of a protocol
+            await self.set_infusion_rate(self._setpoints.get("rate", str(self.rate)))
             await self.infuse_run()
 
 
@@ -4,7 +4,7 @@ Driver for Huber chillers.
 import asyncio
 import warnings
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 
 import aioserial
 import pint
@@ -12,7 +12,11 @@ from loguru import logger
 
 from flowchem.components.properties import TempControl
 from flowchem.exceptions import DeviceError, InvalidConfiguration
-from flowchem.units import flowchem_ureg
+from flowchem.units import flowchem_ureg, parse_quantity
+
+# the range of temperatures that can be encoded in commands (-151 °C also stands for invalid temperatures)
+MIN_TEMPERATURE = flowchem_ureg("-151 °C")
+MAX_TEMPERATURE = flowchem_ureg("327 °C")
 
 
 @dataclass
@@ -175,24 +179,31 @@ class HuberChiller(TempControl):
 
     async def set_temperature_setpoint(self, temp: str):
         """Set the set point used by temperature controller. Internal if not probe, otherwise process temp."""
-        min_t = flowchem_ureg(await self.min_setpoint())
-        max_t = flowchem_ureg(await self.max_setpoint())
-        temp = flowchem_ureg(temp)
+        await self._set_temperature_setpoint(parse_quantity(temp))
+
+    async def _set_temperature_setpoint(
+        self, temp: pint.Quantity, encoded: Optional[str] = None
+    ):
+        """Sets the set point, bound to the device limits. If given, `encoded` is the command value for `temp`."""
+        min_t = parse_quantity(await self.min_setpoint())
+        max_t = parse_quantity(await self.max_setpoint())
 
         if temp > max_t:
-            temp = max_t
+            temp, encoded = max_t, None
             warnings.warn(
                 f"Temperature requested {temp} is out of range [{min_t} - {max_t}] for HuberChiller {self}!"
                 f"Setting to {max_t} instead."
             )
         if temp < min_t:
-            temp = min_t
+            temp, encoded = min_t, None
             warnings.warn(
                 f"Temperature requested {temp} is out of range [{min_t} - {max_t}] for HuberChiller {self}!"
                 f"Setting to {min_t} instead."
             )
+        if encoded is None:
+            encoded = self._temp_to_string(temp)
 
-        await self.send_command_and_read_reply("{M00" + self._temp_to_string(temp))
+        await self.send_command_and_read_reply("{M00" + encoded)
 
     async def internal_temperature(self) -> str:
         """Returns internal temp (bath temperature)."""
@@ -269,7 +280,7 @@ class HuberChiller(TempControl):
 
     async def set_pump_speed(self, rpm: str):
         """Set the pump speed, in rpm. See device display for range."""
-        parsed_rpm = flowchem_ureg(rpm)
+        parsed_rpm = parse_quantity(rpm)
         await self.send_command_and_read_reply(
             "{M48" + self._int_to_string(parsed_rpm.m_as("rpm"))
         )
@@ -308,7 +319,7 @@ class HuberChiller(TempControl):
 
     async def set_alarm_max_internal_temp(self, temp: str):
         """Sets the max internal temp before the alarm is triggered and a fault generated."""
-        temp = flowchem_ureg(temp)
+        temp = parse_quantity(temp)
         await self.send_command_and_read_reply("{M51" + self._temp_to_string(temp))
 
     async def alarm_min_internal_temp(self) -> str:
@@ -318,7 +329,7 @@ class HuberChiller(TempControl):
 
     async def set_alarm_min_internal_temp(self, temp: str):
         """Sets the min internal temp before the alarm is triggered and a fault generated."""
-        temp = flowchem_ureg(temp)
+        temp = parse_quantity(temp)
         await self.send_command_and_read_reply("{M52" + self._temp_to_string(temp))
 
     async def alarm_max_process_temp(self) -> str:
@@ -328,7 +339,7 @@ class HuberChiller(TempControl):
 
     async def set_alarm_max_process_temp(self, temp: str):
         """Sets the max process temp before the alarm is triggered and a fault generated."""
-        temp = flowchem_ureg(temp)
+        temp = parse_quantity(temp)
         await self.send_command_and_read_reply("{M53" + self._temp_to_string(temp))
 
     async def alarm_min_process_temp(self) -> str:
@@ -338,19 +349,19 @@ class HuberChiller(TempControl):
 
     async def set_alarm_min_process_temp(self, temp: str):
         """Sets the min process temp before the alarm is triggered and a fault generated."""
-        temp = flowchem_ureg(temp)
+        temp = parse_quantity(temp)
         await self.send_command_and_read_reply("{M54" + self._temp_to_string(temp))
 
     async def set_ramp_duration(self, ramp_time: str):
         """Sets the duration (in seconds) of a ramp to the temperature set by a later call to ramp_to_temperature."""
-        parsed_time = flowchem_ureg(ramp_time)
+        parsed_time = parse_quantity(ramp_time)
         await self.send_command_and_read_reply(
             "{M59" + self._int_to_string(parsed_time.m_as("s"))
         )
 
     async def ramp_to_temperature(self, temperature: str):
         """Sets the duration (in seconds) of a ramp to the temperature set by a later call to start_ramp()."""
-        temp = flowchem_ureg(temperature)
+        temp = parse_quantity(temperature)
         await self.send_command_and_read_reply("{M5A" + self._temp_to_string(temp))
 
     async def is_venting(self) -> bool:
@@ -397,14 +408,12 @@ class HuberChiller(TempControl):
     @staticmethod
     def _temp_to_string(temp: pint.Quantity) -> str:
         """From temperature to string for command. f^-1 of PCommand.parse_temperature."""
-        min_temp = flowchem_ureg("-151 °C")
-        max_temp = flowchem_ureg("327 °C")
         if not isinstance(temp, pint.Quantity):
             logger.warning(
                 f"Implicit assumption that the temperature provided [{temp}] is in Celsius. Add units pls!"
             )
             temp = flowchem_ureg(f"{temp} °C")
-        assert min_temp <= temp <= max_temp
+        assert MIN_TEMPERATURE <= temp <= MAX_TEMPERATURE
         # Hexadecimal two's complement
         return f"{int(temp.m_as('°C') * 100) & 65535:04X}"
 
@@ -425,17 +434,29 @@ class HuberChiller(TempControl):
         await self.set_temperature_setpoint("20 °C")
 
         # Wait until close to room temperature before turning off chiller
-        while flowchem_ureg.parse_expression(
-            await self.process_temperature()
-        ) > flowchem_ureg.parse_expression("40 °C"):
+        max_temp = parse_quantity("40 °C")
+        while parse_quantity(await self.process_temperature()) > max_temp:
             await asyncio.sleep(5)
 
         # Actually turn off chiller
         await self.stop_circulation()
         await self.stop_temperature_control()
 
+    def _native_setpoints(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Encodes the temperature as sent to the chiller, see `_temp_to_string()`."""
+        if "temp" not in params:
+            return {}
+        temp = parse_quantity(params["temp"])
+        if not MIN_TEMPERATURE <= temp <= MAX_TEMPERATURE:
+            raise ValueError(
+                f"Temperature {params['temp']} is out of range for {self} "
+                f"[{MIN_TEMPERATURE:~P} - {MAX_TEMPERATURE:~P}]."
+            )
+        return {"temp": self._temp_to_string(temp)}
+
     async def _update(self):
-        await self.set_temperature_setpoint(self.temp)
+        # pre-encoded at compile time, if applied as part of a protocol
+        await self._set_temperature_setpoint(self.temp, self._setpoints.get("temp"))
 
     def get_router(self):
         """Creates an APIRouter for this HuberChiller instance."""
@@ -4,14 +4,14 @@ Knauer pump control.
 import asyncio
 import warnings
 from enum import Enum
-from typing import List
+from typing import Any, Dict, List, Tuple
 
 from loguru import logger
 
 from flowchem.components.devices.Knauer.Knauer_common import KnauerEthernetDevice
 from flowchem.components.stdlib import Pump
 from flowchem.exceptions import DeviceError
-from flowchem.units import flowchem_ureg
+from flowchem.units import flowchem_ureg, parse_quantity
 
 FLOW = "FLOW"  # 0-50000 µL/min, int only!
 HEADTYPE = "HEADTYPE"  # 10, 50 ml. Value refers to highest flowrate in ml/min
@@ -223,7 +223,7 @@ class AzuraCompactPump(KnauerEthernetDevice, Pump):
     async def get_flow(self) -> str:
         """Gets flow rate."""
         flow_value = await self.create_and_send_command(FLOW)
-        flowrate = flowchem_ureg(f"{flow_value} ul/min")
+        flowrate = parse_quantity(f"{flow_value} ul/min")
         logger.debug(f"Current flow rate is {flowrate}")
         return str(flowrate.to("ml/min"))
 
@@ -232,13 +232,17 @@ class AzuraCompactPump(KnauerEthernetDevice, Pump):
 
         :param flowrate: string with units
         """
-        parsed_flowrate = flowchem_ureg(flowrate)
+        parsed_flowrate = parse_quantity(flowrate)
+        await self._set_flow_setpoint(round(parsed_flowrate.m_as("ul/min")))
+        logger.info(f"Flow set to {flowrate}")
+
+    async def _set_flow_setpoint(self, flow: int):
+        """Sets flow rate, in ul/min."""
         await self.create_and_send_command(
             FLOW,
-            setpoint=round(parsed_flowrate.m_as("ul/min")),
+            setpoint=flow,
             setpoint_range=(0, self.max_allowed_flow + 1),
         )
-        logger.info(f"Flow set to {flowrate}")
 
     async def get_minimum_pressure(self):
         """Gets minimum pressure. The pump stops if the measured P is lower than this."""
@@ -250,7 +254,7 @@ class AzuraCompactPump(KnauerEthernetDevice, Pump):
     async def set_minimum_pressure(self, value: str = "0 bar"):
         """Sets minimum pressure. The pump stops if the measured P is lower than this."""
 
-        pressure = flowchem_ureg(value)
+        pressure = parse_quantity(value)
         command = PMIN10 if self._headtype == AzuraPumpHeads.FLOWRATE_TEN_ML else PMIN50
         await self.create_and_send_command(
             command,
@@ -269,7 +273,7 @@ class AzuraCompactPump(KnauerEthernetDevice, Pump):
     async def set_maximum_pressure(self, value: str):
         """Sets maximum pressure. The pumps stop if the measured P is higher than this."""
 
-        pressure = flowchem_ureg(value)
+        pressure = parse_quantity(value)
         command = PMAX10 if self._headtype == AzuraPumpHeads.FLOWRATE_TEN_ML else PMAX50
         await self.create_and_send_command(
             command,
@@ -424,13 +428,34 @@ class AzuraCompactPump(KnauerEthernetDevice, Pump):
     async def __aexit__(self, exc_type, exc_value, traceback):
         await self.stop_flow()
 
+    def _native_setpoints(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Converts the flow rate to ul/min, as sent to the pump."""
+        if "rate" not in params:
+            return {}
+        flow = round(parse_quantity(params["rate"]).m_as("ul/min"))
+        # the maximum flow rate depends on the head type, only known once initialized
+        if flow < 0 or (self.max_allowed_flow and flow > self.max_allowed_flow):
+            raise ValueError(
+                f"Flow rate {params['rate']} is out of range for {self} "
+                f"[0 - {self.max_allowed_flow} ul/min]."
+            )
+        return {"flow": flow}
+
+    def _setpoint_config(self) -> Tuple[Any, ...]:
+        return (self.max_allowed_flow,)
+
     async def _update(self):
         """Called automatically to change flow rate."""
 
         if self.rate == 0:
             await self.stop_flow()
         else:
-            await self.set_flow(self.rate)
+            # pre-converted at compile time, if applied as part of a protocol
+            flow = self._setpoints.get("flow")
+            if flow is None:
+                await self.set_flow(str(self.rate))
+            else:
+                await self._set_flow_setpoint(flow)
             await self.start_flow()
 
     def get_router(self):
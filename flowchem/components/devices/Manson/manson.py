@@ -12,7 +12,7 @@ from loguru import logger
 
 from flowchem.components.properties import ActiveComponent
 from flowchem.exceptions import DeviceError, InvalidConfiguration
-from flowchem.units import flowchem_ureg
+from flowchem.units import flowchem_ureg, parse_quantity
 
 
 class MansonPowerSupply(ActiveComponent):
@@ -58,14 +58,14 @@ class MansonPowerSupply(ActiveComponent):
     def _format_voltage(voltage_value: str) -> str:
         """Format a voltage in the format the power supply understands"""
 
-        voltage = flowchem_ureg(voltage_value)
+        voltage = parse_quantity(voltage_value)
         # Zero fill by left pad with zeros, up to three digits
         return str(voltage.m_as("V") * 10).zfill(3)
 
     async def _format_amperage(self, amperage_value: str) -> str:
         """Format a current intensity in the format the power supply understands"""
 
-        current = flowchem_ureg(amperage_value)
+        current = parse_quantity(amperage_value)
         multiplier = 100 if await self.get_info() in self.MODEL_ALT_RANGE else 10
         return str(current.m_as("A") * multiplier).zfill(3)
 
@@ -149,7 +149,7 @@ class MansonPowerSupply(ActiveComponent):
     async def get_output_power(self) -> str:
         """Returns output power in watts"""
         voltage, intensity, _ = await self.get_output_read()
-        power = flowchem_ureg(voltage) * flowchem_ureg(intensity)
+        power = parse_quantity(voltage) * parse_quantity(intensity)
         return str(power.to("W"))
 
     async def get_max(self) -> Tuple[str, str]:
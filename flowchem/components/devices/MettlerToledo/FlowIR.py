@@ -3,13 +3,14 @@
 import asyncio
 import datetime
 import warnings
-from typing import List, Optional
+from typing import Awaitable, Callable, Dict, List, Optional
 
 from asyncua import Client, ua
 from loguru import logger
 
 from flowchem.components.devices.MettlerToledo.iCIR_common import (
     IRSpectrum,
+    IRSpectrumModel,
     ProbeInfo,
     iCIR_spectrometer,
 )
@@ -17,6 +18,15 @@ from flowchem.components.properties import ActiveComponent
 from flowchem.exceptions import DeviceError
 
 
+def _spectrum_route(get_spectrum: Callable[[], Awaitable[IRSpectrum]]):
+    """Wraps a method returning an `IRSpectrum` into an API route returning its JSON representation."""
+
+    async def route() -> Dict[str, List[float]]:
+        return (await get_spectrum()).dict()
+
+    return route
+
+
 class FlowIR(iCIR_spectrometer, ActiveComponent):
     """
     Object to interact with the iCIR software controlling the FlowIR and ReactIR.
@@ -198,15 +208,22 @@ class FlowIR(iCIR_spectrometer, ActiveComponent):
             "/sample/last-acquisition-time", self.last_sample_time, methods=["GET"]
         )
         router.add_api_route(
-            "/sample/spectrum/last-treated", self.last_spectrum_treated, methods=["GET"]
+            "/sample/spectrum/last-treated",
+            _spectrum_route(self.last_spectrum_treated),
+            methods=["GET"],
+            response_model=IRSpectrumModel,
         )
         router.add_api_route(
-            "/sample/spectrum/last-raw", self.last_spectrum_raw, methods=["GET"]
+            "/sample/spectrum/last-raw",
+            _spectrum_route(self.last_spectrum_raw),
+            methods=["GET"],
+            response_model=IRSpectrumModel,
         )
         router.add_api_route(
             "/sample/spectrum/last-background",
-            self.last_spectrum_background,
+            _spectrum_route(self.last_spectrum_background),
             methods=["GET"],
+            response_model=IRSpectrumModel,
         )
         router.add_api_route(
             "/experiment/start", self.start_experiment, methods=["PUT"]
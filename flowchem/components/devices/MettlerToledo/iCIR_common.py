@@ -1,8 +1,11 @@
 """ Common iCIR code. """
+import json
 import warnings
+import weakref
 from pathlib import Path
-from typing import List, TypedDict
+from typing import Any, Dict, List, Sequence, TypedDict, Union
 
+import numpy as np
 from pydantic import BaseModel
 
 
@@ -113,12 +116,99 @@ class iCIR_spectrometer:
         return probe_info  # type: ignore
 
 
-class IRSpectrum(BaseModel):
+class IRSpectrumModel(BaseModel):
+    """The JSON representation of an `IRSpectrum`, see `IRSpectrum.dict()`, e.g. as returned by the API."""
+
+    wavenumber: List[float]
+    intensity: List[float]
+
+
+# The wavenumber axes in use, by content, see shared_wavenumber_axis()
+_wavenumber_axes: "weakref.WeakValueDictionary[bytes, np.ndarray]" = (
+    weakref.WeakValueDictionary()
+)
+
+
+def shared_wavenumber_axis(
+    wavenumber: Union[Sequence[float], np.ndarray]
+) -> np.ndarray:
+    """
+    Returns the interned, read-only array of a wavenumber axis.
+
+    All the spectra acquired with the same settings have the same axis, so a single array is kept for each distinct
+    axis, for as long as a spectrum uses it.
+    """
+    axis = np.array(wavenumber, dtype=float)
+    key = axis.tobytes()
+    shared = _wavenumber_axes.get(key)
+    if shared is None:
+        axis.flags.writeable = False
+        _wavenumber_axes[key] = shared = axis
+    return shared
+
+
+class IRSpectrum:
     """
     IR spectrum class.
     Consider rampy for advance features (baseline fit, etc.)
     See e.g. https://github.com/charlesll/rampy/blob/master/examples/baseline_fit.ipynb
+
+    Both axes are float NumPy arrays. The wavenumber axis is shared between the spectra with identical axes (see
+    `shared_wavenumber_axis()`) and is read-only.
+
+    Arguments:
+    - `wavenumber`: The wavenumbers, in cm-1.
+    - `intensity`: The intensity at each wavenumber.
+
+    Raises:
+    - `ValueError`: If the axes have different lengths.
     """
 
-    wavenumber: List[float]
-    intensity: List[float]
+    __slots__ = ("wavenumber", "intensity")
+
+    def __init__(
+        self,
+        wavenumber: Union[Sequence[float], np.ndarray],
+        intensity: Union[Sequence[float], np.ndarray],
+    ):
+        self.wavenumber = shared_wavenumber_axis(wavenumber)
+        self.intensity = np.array(intensity, dtype=float)
+        if self.wavenumber.shape != self.intensity.shape:
+            raise ValueError(
+                f"The wavenumber and intensity of a spectrum must have the same length, "
+                f"got {len(self.wavenumber)} and {len(self.intensity)}."
+            )
+
+    def __repr__(self):
+        return f"<IRSpectrum with {len(self)} points>"
+
+    def __len__(self) -> int:
+        return len(self.intensity)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, IRSpectrum):
+            return NotImplemented
+        return np.array_equal(self.wavenumber, other.wavenumber) and np.array_equal(
+            self.intensity, other.intensity
+        )
+
+    def dict(self) -> Dict[str, List[float]]:
+        """Returns the spectrum as a dict of lists, e.g. for the API."""
+        return {
+            "wavenumber": self.wavenumber.tolist(),
+            "intensity": self.intensity.tolist(),
+        }
+
+    def json(self) -> str:
+        """Returns the spectrum as JSON, see `dict()`."""
+        return json.dumps(self.dict())
+
+    @classmethod
+    def parse_obj(cls, obj: Dict[str, Any]) -> "IRSpectrum":
+        """Creates a spectrum from a dict, as returned by `dict()`."""
+        return cls(wavenumber=obj["wavenumber"], intensity=obj["intensity"])
+
+    @classmethod
+    def parse_raw(cls, data: Union[str, bytes]) -> "IRSpectrum":
+        """Creates a spectrum from JSON, as returned by `json()`."""
+        return cls.parse_obj(json.loads(data))
@@ -7,7 +7,7 @@ from loguru import logger
 
 from flowchem.components.properties import ActiveComponent
 from flowchem.exceptions import InvalidConfiguration
-from flowchem.units import flowchem_ureg
+from flowchem.units import parse_quantity
 
 try:
     from flowchem.components.devices.Vapourtec.commands import (
@@ -105,7 +105,7 @@ class R4Heater(ActiveComponent):
         """Set temperature and optionally waits for S"""
         set_command = getattr(VapourtecCommand, f"SET_CH{channel}_TEMP")
 
-        set_temperature = flowchem_ureg(target_temperature)
+        set_temperature = parse_quantity(target_temperature)
         # Float not accepted, must cast to int
         await self.write_and_read_reply(
             set_command.set_argument(round(set_temperature.m_as("°C")))
@@ -232,6 +232,11 @@ class ViciValco(InjectionValve):
 
         return cls(valveio, address=address, name=name)
 
+    @property
+    def _bus(self):
+        """Daisy-chained devices share the same valve IO object."""
+        return self.valve_io
+
     async def initialize(self):
         """Must be called after init before anything else."""
         # Test connectivity by querying the valve's firmware version
@@ -1,12 +1,12 @@
 import asyncio
-import math
 import warnings
-from typing import Any, Dict, List, MutableMapping, Optional
+from typing import Any, Dict, List, MutableMapping, Optional, Set, Tuple
 
 from loguru import logger
 
 from flowchem.components.properties import Component
-from flowchem.units import flowchem_ureg
+from flowchem.units import flowchem_ureg, parse_dimensionality, parse_quantity
+from flowchem.utils.intervals import IntervalIndex
 
 
 class ActiveComponent(Component):
@@ -38,6 +38,8 @@ class ActiveComponent(Component):
         The dict must have values which can be parsed into compatible units of the object's other attributes, if applicable.
         At the end of a protocol and when not under explicit control by the user, the component will return to this state.
         """
+        # the device-native setpoints of the procedure being applied, see _native_setpoints()
+        self._setpoints: Dict[str, Any] = {}
 
     def _update_from_params(self, params: dict) -> None:
         """
@@ -46,12 +48,63 @@ class ActiveComponent(Component):
         Arguments:
         - `params`: A dict whose keys are the strings of attribute names and values are the new values of the attribute.
         """
+        self._setpoints = {}
         for key, value in params.items():
             if isinstance(getattr(self, key), flowchem_ureg.Quantity):
-                setattr(self, key, flowchem_ureg.parse_expression(value))
+                setattr(self, key, parse_quantity(value))
             else:
                 setattr(self, key, value)
 
+    def _native_setpoints(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Converts the params of a procedure into device-native setpoints, e.g. a flow rate as an integer in µL/min.
+
+        Called by `Protocol._compile()` for each compiled procedure, so that unit conversions are done and values are
+        checked before the execution starts. When the procedure is applied, the setpoints are available to `_update()`
+        as `_setpoints`; they are empty when the component is updated otherwise, e.g. reset to its base state.
+        By default, no setpoints are computed.
+
+        Raises:
+        - `ValueError`: If a value is out of the range of the device.
+        """
+        return {}
+
+    def _setpoint_config(self) -> Tuple[Any, ...]:
+        """
+        The device configuration `_native_setpoints()` depends on, e.g. the limits of a pump head only known once the
+        device is initialized. The compiled setpoints are reused by `Protocol._compile()` only while it is unchanged.
+        """
+        return ()
+
+    @property
+    def _controllable_attributes(self) -> List[str]:
+        """The names of the attributes defining the state of the component, i.e. the keys of `_base_state`."""
+        return list(self._base_state)
+
+    def _snapshot(self) -> Dict[str, Any]:
+        """
+        Captures the current state of the component, e.g. before pausing.
+
+        Only the controllable attributes are included. Their values are not copied, as they are replaced, not
+        modified in place, by `_update_from_params()`.
+        """
+        return {k: getattr(self, k) for k in self._controllable_attributes}
+
+    def _restore(self, snapshot: Dict[str, Any]) -> Set[str]:
+        """
+        Restores a state captured by `_snapshot()`.
+
+        Returns:
+        - The names of the attributes whose value changed, if empty the device does not need to be updated.
+        """
+        changed = set()
+        self._setpoints = {}
+        for k, v in snapshot.items():
+            if getattr(self, k) != v:
+                setattr(self, k, v)
+                changed.add(k)
+        return changed
+
     async def _update(self):
         raise NotImplementedError(f"Implement an _update() method for {repr(self)}.")
 
@@ -87,13 +140,13 @@ class ActiveComponent(Component):
             # dimensionality check between _base_state units and attributes
             if isinstance(self.__dict__[k], flowchem_ureg.Quantity):
                 # figure out the dimensions we're comparing
-                expected_dim = flowchem_ureg.parse_expression(v).dimensionality
+                expected_dim = parse_dimensionality(v)
                 actual_dim = self.__dict__[k].dimensionality
 
                 if expected_dim != actual_dim:
                     raise ValueError(
                         f"Invalid dimensionality in _base_state for {repr(self)}. "
-                        f"Got {flowchem_ureg.parse_expression(v).dimensionality} for {k}, "
+                        f"Got {parse_dimensionality(v)} for {k}, "
                         f"expected {self.__dict__[k].dimensionality}"
                     )
 
@@ -119,7 +172,7 @@ class ActiveComponent(Component):
                 raise ValueError(f"Received return value {res} from update.")
 
     def validate_procedures(self, procedures: List[MutableMapping]) -> None:
-        """Given all the procedures the component is involved in, checks them."""
+        """Given all the procedures the component is involved in, in any order, checks them."""
         # skip validation if no procedure is given
         if not procedures:
             warnings.warn(
@@ -147,18 +200,12 @@ class ActiveComponent(Component):
             assert procedure["start"] is not None
             assert procedure["stop"] is not None
 
-        # For now, we still have to check for conflicting procedures
-        for i, procedure in enumerate(procedures):
-            try:
-                # the start time of the next procedure
-                next_start = procedures[i + 1]["start"]
-            except IndexError:  # Last one
-                continue
-
-            # check for overlapping procedures
-            if next_start < procedure["stop"] and not math.isclose(
-                next_start, procedure["stop"]
-            ):
-                msg = "Cannot have two overlapping procedures. "
-                msg += f"{procedure} and {procedures[i + 1]} conflict"
-                raise RuntimeError(msg)
+        # check for overlapping procedures, reporting all the conflicts at once
+        conflicts = IntervalIndex(
+            (procedure["start"], procedure["stop"], procedure)
+            for procedure in procedures
+        ).overlaps()
+        if conflicts:
+            msg = "Cannot have two overlapping procedures. "
+            msg += "; ".join(f"{a} and {b} conflict" for a, b in conflicts)
+            raise RuntimeError(msg)
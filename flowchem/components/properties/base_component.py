@@ -1,5 +1,12 @@
 """ All devices should inherit from this class. """
-from typing import Optional
+import asyncio
+import weakref
+from typing import Dict, Hashable, Optional
+
+# by event loop, the lock of each bus (Dict[Hashable, asyncio.Lock]), see Component._bus_lock()
+_bus_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict]" = (
+    weakref.WeakKeyDictionary()
+)
 
 
 class Component:
@@ -32,6 +39,27 @@ class Component:
     def __str__(self):
         return f"{self.__class__.__name__} {self.name}"
 
+    @property
+    def _bus(self) -> Hashable:
+        """
+        The physical connection (e.g. a serial port) used to communicate with the component.
+
+        Components sharing a bus, e.g. daisy-chained pumps, are initialized sequentially, the others concurrently.
+        By default, each component has its own bus.
+        """
+        return self
+
+    def _bus_lock(self) -> asyncio.Lock:
+        """
+        The lock to hold while communicating with the component, so that the commands and replies of the components
+        sharing its bus are not interleaved, e.g. by concurrent experiments (see `execute_protocols()`). There is one
+        lock per bus, for the running event loop.
+        """
+        locks = _bus_locks.setdefault(asyncio.get_running_loop(), {})
+        if self._bus not in locks:
+            locks[self._bus] = asyncio.Lock()
+        return locks[self._bus]
+
     async def __aenter__(self):
         return self
 
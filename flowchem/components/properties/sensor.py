@@ -1,10 +1,20 @@
 from __future__ import annotations
 
 import asyncio
-import time
-from typing import TYPE_CHECKING, AsyncGenerator, Optional
+import math
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncGenerator,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
 from warnings import warn
 
+import numpy as np
 from loguru import logger
 
 from flowchem.components.properties import ActiveComponent
@@ -14,20 +24,157 @@ if TYPE_CHECKING:
     from flowchem import Experiment
 
 
+class SamplingStats:
+    """
+    Statistics on the reads of a sensor during an experiment, see `Experiment.sampling_stats()`.
+
+    The sampling time only includes the periods in which the sensor was on, so that the achieved rate can be compared
+    with the requested one.
+    """
+
+    def __init__(self):
+        self.reads = 0
+        self.missed_deadlines = 0
+        self.latencies: List[float] = []
+        self.sampling_time = 0.0
+        self.expected_reads = 0.0
+        self._span: Optional[Tuple[float, float]] = None  # (start time, rate) while on
+
+    def start(self, time: float, rate: float) -> None:
+        """Records the sensor being (re)started at `rate` Hz."""
+        self.stop(time)
+        self._span = (time, rate)
+
+    def stop(self, time: float) -> None:
+        """Records the sensor being turned off."""
+        if self._span is not None:
+            start, rate = self._span
+            self.sampling_time += time - start
+            self.expected_reads += (time - start) * rate
+            self._span = None
+
+    def read(self, latency: float) -> None:
+        self.reads += 1
+        self.latencies.append(latency)
+
+    def summary(self) -> Dict[str, float]:
+        """
+        Returns:
+        - A dict with the `requested_rate` and `achieved_rate` (in Hz, averaged over the sampling time), the number of
+        `reads` and `missed_deadlines` and the 50th, 90th and 99th percentile and the maximum of the read latency (in
+        seconds).
+        """
+        summary = dict(
+            requested_rate=self.expected_reads / self.sampling_time
+            if self.sampling_time
+            else 0.0,
+            achieved_rate=self.reads / self.sampling_time
+            if self.sampling_time
+            else 0.0,
+            reads=self.reads,
+            missed_deadlines=self.missed_deadlines,
+        )
+        if self.latencies:
+            p50, p90, p99 = np.percentile(self.latencies, [50, 90, 99])
+            summary.update(
+                latency_p50=p50,
+                latency_p90=p90,
+                latency_p99=p99,
+                latency_max=max(self.latencies),
+            )
+        return summary
+
+
+class ReadSchedule:
+    """
+    The deadlines of the reads of a sensor at a fixed rate, see `Sensor.overrun`.
+
+    Used by `Sensor._monitor()`, as well as to simulate the reads in virtual time. The deadlines are multiples of the
+    period since the start of the schedule, so that rounding errors do not add up over the reads.
+
+    Arguments:
+    - `start`: The time of the first read, in seconds.
+    - `rate`: The read rate, in Hz.
+    - `overrun`: What to do when a deadline is missed, see `Sensor.overrun`.
+    - `stats`: Where to record the missed deadlines.
+    """
+
+    def __init__(self, start: float, rate: float, overrun: str, stats: SamplingStats):
+        self.rate = rate
+        self.overrun = overrun
+        self._stats = stats
+        self._origin = start
+        self._count = 0
+
+    @property
+    def deadline(self) -> float:
+        """The time the next read is due."""
+        return self._origin + self._count / self.rate
+
+    def skip_to(self, time: float) -> None:
+        """Skips the reads due before `time`, e.g. those done before an experiment was resumed."""
+        self._count = max(self._count, math.ceil((time - self._origin) * self.rate))
+
+    def next(self, now: float) -> float:
+        """Moves on to the read following the one due, as of `now`, and returns its deadline."""
+        self._count += 1
+        deadline = self.deadline
+        if now <= deadline:
+            return deadline
+        if self.overrun == "catch_up":
+            self._stats.missed_deadlines += 1
+        elif self.overrun == "stretch":
+            self._stats.missed_deadlines += 1
+            self._origin, self._count = now, 0
+        else:
+            # skip all the deadlines already elapsed, staying on schedule
+            missed = math.floor((now - deadline) * self.rate) + 1
+            self._stats.missed_deadlines += missed
+            self._count += missed
+        return self.deadline
+
+
 class Sensor(ActiveComponent):
     """
     A generic sensor.
 
+    Reads are scheduled at fixed deadlines, i.e. multiples of the period since the rate was set, so that the time taken
+    by each read does not add up to the period.
+
     Attributes:
     - `name`: The name of the Sensor.
     - `rate`: Data collection rate in Hz as a `pint.Quantity`. A rate of 0 Hz corresponds to the sensor being off.
+    - `overrun`: What to do when a read is not completed by the deadline of the next one. One of "skip" (the default,
+    the missed reads are dropped and sampling continues on schedule), "catch_up" (the missed reads are done back-to-back
+    until the schedule is met again) or "stretch" (the next read is done immediately and the schedule is shifted).
     """
 
+    OVERRUN_POLICIES = ("skip", "catch_up", "stretch")
+
     def __init__(self, name: Optional[str] = None):
         super().__init__(name=name)
         self.rate = flowchem_ureg.parse_expression("0 Hz")
+        self.overrun = "skip"
         self._unit: str = ""
         self._base_state = {"rate": "0 Hz"}
+        # set when the rate changes, to wake up the monitor loop, see _monitor()
+        self._rate_changed: Optional[asyncio.Event] = None
+
+    def _rate_change(self) -> None:
+        """Wakes up the monitor loop, if any, to apply a new rate."""
+        if self._rate_changed is not None:
+            self._rate_changed.set()
+
+    def _update_from_params(self, params: dict) -> None:
+        super()._update_from_params(params)
+        if "rate" in params:
+            self._rate_change()
+
+    def _restore(self, snapshot: Dict[str, Any]) -> Set[str]:
+        changed = super()._restore(snapshot)
+        if "rate" in changed:
+            self._rate_change()
+        return changed
 
     async def _read(self):
         """
@@ -37,27 +184,71 @@ class Sensor(ActiveComponent):
         """
         raise NotImplementedError
 
+    async def _wait_for_rate_change(
+        self, experiment: "Experiment", timeout: Optional[float] = None
+    ) -> None:
+        """Waits until the rate changes, the experiment ends or, if given, `timeout` seconds have elapsed."""
+        waiters = [asyncio.create_task(self._rate_changed.wait())]  # type: ignore
+        if experiment._end_event is not None:
+            waiters.append(asyncio.create_task(experiment._end_event.wait()))
+        try:
+            await asyncio.wait(
+                waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+
     async def _monitor(
         self, experiment: "Experiment", dry_run: bool = False
     ) -> AsyncGenerator:
         """
         If data collection is off and needs to be turned on, turn it on.
         If data collection is on and needs to be turned off, turn off and return data.
+
+        While the sensor is off, the loop is parked until the rate is changed (e.g. by `_update_from_params()`) or the
+        experiment ends. A rate change starts a new schedule, beginning with an immediate read.
+        Statistics on the reads are recorded in the experiment, see `Experiment.sampling_stats()`.
         """
-        while not experiment._end_loop:  # type: ignore
-            # if the sensor is off, hand control back over
-            if not self.rate:
-                await asyncio.sleep(0)
-                continue
+        clock = experiment._clock
+        stats = experiment._sampling_stats.setdefault(self.name, SamplingStats())
+        # the event is bound to the loop executing the experiment
+        self._rate_changed = asyncio.Event()
+        try:
+            while not experiment._end_loop:  # type: ignore
+                self._rate_changed.clear()
+
+                # if the sensor is off, hand control back over until it is turned on
+                if not self.rate:
+                    stats.stop(clock.time())
+                    await self._wait_for_rate_change(experiment)
+                    continue
 
-            if not dry_run:
-                yield {"data": await self._read(), "timestamp": time.time()}
-            else:
-                yield {"data": "simulated read", "timestamp": time.time()}
+                schedule = ReadSchedule(
+                    clock.time(), self.rate.m_as("Hz"), self.overrun, stats
+                )
+                stats.start(schedule.deadline, schedule.rate)
+                while not experiment._end_loop and not self._rate_changed.is_set():
+                    read_start = clock.time()
+                    if dry_run:
+                        data = "simulated read"
+                    else:
+                        async with self._bus_lock():
+                            data = await self._read()
+                    timestamp = clock.time()
+                    stats.read(timestamp - read_start)
+                    yield {"data": data, "timestamp": timestamp}
 
-            # then wait for the sensor's next read
-            if self.rate:
-                await asyncio.sleep(1 / self.rate.m_as("Hz"))
+                    # then wait for the sensor's next read
+                    now = clock.time()
+                    deadline = schedule.next(now)
+                    if deadline > now:
+                        await self._wait_for_rate_change(
+                            experiment, timeout=deadline - now
+                        )
+        finally:
+            stats.stop(clock.time())
+            self._rate_changed = None
 
         logger.debug(f"Monitor loop for {self} has completed.")
 
@@ -73,6 +264,11 @@ class Sensor(ActiveComponent):
 
     def _validate(self, dry_run: bool) -> None:
         logger.debug(f"Performing sensor specific checks for {self}...")
+        if self.overrun not in self.OVERRUN_POLICIES:
+            raise ValueError(
+                f"Invalid overrun policy {self.overrun!r} for {self}. "
+                f"Expected one of {', '.join(self.OVERRUN_POLICIES)}."
+            )
         if not dry_run:
             logger.trace("Executing Sensor-specific checks...")
             logger.trace("Entering context...")
@@ -1,4 +1,8 @@
+from .data_reader import JSONLReader
+from .data_writer import read_chunked_data
 from .execute import Datapoint
 from .experiment import Experiment
 from .graph import DeviceGraph
 from .protocol import Protocol
+from .runner import execute_protocols
+from .sensor_data import SensorData
@@ -0,0 +1,43 @@
+""" Execution clock used to time the protocol execution. """
+import time
+
+
+class ExecutionClock:
+    """
+    A monotonic clock, mapped once to wall time.
+
+    Unlike `time.time()`, the values returned are not affected by NTP adjustments or other changes of the system clock
+    during the experiment, yet they are still expressed as Unix time for logging and data records.
+
+    Attributes:
+    - `wall_origin`: The Unix time at which the clock was created.
+    """
+
+    def __init__(self):
+        self._monotonic_origin_ns = time.monotonic_ns()
+        self._wall_origin_ns = time.time_ns()
+
+    @property
+    def wall_origin(self) -> float:
+        return self._wall_origin_ns / 1e9
+
+    def time(self) -> float:
+        """The current time, as seconds since the Epoch (like `time.time()`)."""
+        return (
+            self._wall_origin_ns + time.monotonic_ns() - self._monotonic_origin_ns
+        ) / 1e9
+
+
+class VirtualClock(ExecutionClock):
+    """
+    An execution clock following the virtual time of an event loop, used to simulate experiments.
+
+    The virtual time of the loop (in seconds, starting from zero) is mapped to wall time on creation.
+    """
+
+    def __init__(self, loop):
+        super().__init__()
+        self._loop = loop
+
+    def time(self) -> float:
+        return self.wall_origin + self._loop.time()
@@ -0,0 +1,193 @@
+""" Lazy, indexed reader of the JSONL data and log files written during experiments. """
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+import pandas as pd
+from loguru import logger
+
+# Number of lines per block of the index
+BLOCK_LINES = 1024
+
+
+def _data_key(record: Dict[str, Any]) -> Tuple[float, Optional[str]]:
+    return record["experiment_elapsed_time"], record["device"]
+
+
+def _log_key(record: Dict[str, Any]) -> Tuple[float, Optional[str]]:
+    return record["record"]["time"]["timestamp"], None
+
+
+def _log_row(record: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "timestamp": record["record"]["time"]["timestamp"],
+        "level": record["record"]["level"]["name"],
+        "message": record["record"]["message"],
+    }
+
+
+class JSONLReader:
+    """
+    Reads the records of a `.data.jsonl` or `.log.jsonl` file lazily, by device and time range.
+
+    On first use, a sidecar index (`{path}.index.json`) is built with the byte offset, time span and devices of each
+    block of `BLOCK_LINES` lines, so that only the relevant blocks are read afterwards. The index is extended if the
+    file grew, e.g. when reading the file of an experiment still running, and rebuilt if it shrank.
+
+    The time range is in experiment elapsed time for data files and in Unix time for log files, whose records have no
+    experiment elapsed time. Devices only apply to data files.
+
+    Arguments:
+    - `path`: The file to read.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike]):
+        self.path = Path(path)
+        self.index_path = self.path.with_name(self.path.name + ".index.json")
+        self._is_log = self.path.name.endswith(".log.jsonl")
+        self._key = _log_key if self._is_log else _data_key
+        self._index: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_experiment(cls, experiment_id: str, kind: str = "data") -> "JSONLReader":
+        """
+        Opens a file written to `~/.flowchem` by an experiment.
+
+        Arguments:
+        - `experiment_id`: The ID of the experiment.
+        - `kind`: Either "data" or "log".
+        """
+        if kind not in ("data", "log"):
+            raise ValueError(f"Invalid kind {kind!r}. Expected data or log.")
+        app_path = Path("~/.flowchem").expanduser()
+        return cls(app_path / f"{experiment_id}.{kind}.jsonl")
+
+    @property
+    def index(self) -> Dict[str, Any]:
+        """The index of the file, built or updated if needed."""
+        size = self.path.stat().st_size
+        if self._index is None and self.index_path.exists():
+            with open(self.index_path) as f:
+                self._index = json.load(f)
+        if self._index is None or self._index["size"] > size:
+            self._index = {"size": 0, "blocks": []}
+        if self._index["size"] < size:
+            self._update_index()
+        return self._index
+
+    def _update_index(self) -> None:
+        index = self._index
+        assert index is not None  # make the type checker happy
+        # the last block may be incomplete, so it is indexed again
+        if index["blocks"] and index["blocks"][-1]["lines"] < BLOCK_LINES:
+            offset = index["blocks"].pop()["offset"]
+        else:
+            offset = index["size"]
+
+        logger.debug(f"Indexing {self.path} from byte {offset}")
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            block: Optional[Dict[str, Any]] = None
+            devices: Set[str] = set()
+            for line in f:
+                # a line still being written
+                if not line.endswith(b"\n"):
+                    break
+                if block is None:
+                    block = dict(
+                        offset=offset, lines=0, start=float("inf"), stop=float("-inf")
+                    )
+                    devices = set()
+                offset += len(line)
+
+                time, device = self._key(json.loads(line))
+                block["lines"] += 1
+                block["start"] = min(block["start"], time)
+                block["stop"] = max(block["stop"], time)
+                if device is not None:
+                    devices.add(device)
+
+                if block["lines"] == BLOCK_LINES:
+                    block["devices"] = sorted(devices)
+                    index["blocks"].append(block)
+                    block = None
+            if block is not None:
+                block["devices"] = sorted(devices)
+                index["blocks"].append(block)
+        index["size"] = offset
+
+        with open(self.index_path, "w") as f:
+            json.dump(index, f)
+
+    @property
+    def devices(self) -> List[str]:
+        """The names of the devices in the data file."""
+        return sorted({d for block in self.index["blocks"] for d in block["devices"]})
+
+    def records(
+        self,
+        device: Optional[str] = None,
+        start: Optional[float] = None,
+        stop: Optional[float] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yields the records of the file, as dicts, reading only the blocks that may contain matching records.
+
+        Arguments:
+        - `device`: If given, only the records of this device.
+        - `start`: If given, only the records from this time on.
+        - `stop`: If given, only the records up to this time (inclusive).
+        """
+        start = float("-inf") if start is None else start
+        stop = float("inf") if stop is None else stop
+
+        with open(self.path, "rb") as f:
+            for block in self.index["blocks"]:
+                if device is not None and device not in block["devices"]:
+                    continue
+                if block["stop"] < start or block["start"] > stop:
+                    continue
+
+                f.seek(block["offset"])
+                for _ in range(block["lines"]):
+                    record = json.loads(f.readline())
+                    time, record_device = self._key(record)
+                    if device is not None and record_device != device:
+                        continue
+                    if start <= time <= stop:
+                        yield record
+
+    def frames(
+        self,
+        device: Optional[str] = None,
+        start: Optional[float] = None,
+        stop: Optional[float] = None,
+        chunk_size: int = 10_000,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Yields the matching records as DataFrames of up to `chunk_size` rows, see `records()` for the arguments.
+
+        The columns of data files are those of the records, i.e. `device`, `timestamp`, `experiment_elapsed_time`,
+        `data` and `unit`, while log files have `timestamp`, `level` and `message` columns.
+        """
+        rows: List[Dict[str, Any]] = []
+        for record in self.records(device, start, stop):
+            rows.append(_log_row(record) if self._is_log else record)
+            if len(rows) == chunk_size:
+                yield pd.DataFrame.from_records(rows)
+                rows = []
+        if rows:
+            yield pd.DataFrame.from_records(rows)
+
+    def to_dataframe(
+        self,
+        device: Optional[str] = None,
+        start: Optional[float] = None,
+        stop: Optional[float] = None,
+    ) -> pd.DataFrame:
+        """Returns all the matching records as a single DataFrame, see `frames()`."""
+        frames = list(self.frames(device, start, stop))
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
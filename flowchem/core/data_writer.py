@@ -0,0 +1,425 @@
+""" Buffered writers for the experiment data files, and the reader of the binary format. """
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+from numbers import Real
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+if TYPE_CHECKING:
+    from flowchem import Datapoint
+
+# Flush when this many characters are buffered...
+FLUSH_SIZE = 64 * 1024
+# ...or, at the latest, this many seconds after the first line was buffered
+FLUSH_INTERVAL = 1.0
+
+FSYNC_POLICIES = ("never", "flush", "close")
+
+# The formats of the data files, by name, with their file suffix
+DATA_FORMATS = {"jsonl": ".data.jsonl", "binary": ".data.bin"}
+
+# Rows per chunk in the binary format...
+CHUNK_SIZE = 4096
+# ...or, at the latest, seconds of data per chunk
+CHUNK_INTERVAL = 60.0
+
+
+class DataWriter:
+    """
+    Appends lines to a data file, keeping the file open and writing them in batches.
+
+    The output is identical to writing (and flushing) each line on its own, but for the delay before the lines reach
+    the file. Flushes happen when `flush_size` characters are buffered or `flush_interval` seconds after the first line
+    was buffered, whichever comes first, and on `close()`.
+
+    Arguments:
+    - `path`: The file to append the lines to.
+    - `flush_size`: The size of the buffer, in characters.
+    - `flush_interval`: The maximum time, in seconds, for a line to be buffered. Only applies within an event loop.
+    - `fsync`: When to sync the file to disk. One of "never" (left to the OS), "flush" (after every flush, the
+    safest), or "close" (once at the end of the experiment, the default).
+
+    Raises:
+    - `ValueError`: If the fsync policy is not valid.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, os.PathLike],
+        flush_size: int = FLUSH_SIZE,
+        flush_interval: float = FLUSH_INTERVAL,
+        fsync: str = "close",
+    ):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(
+                f"Invalid fsync policy {fsync!r}. Expected one of {', '.join(FSYNC_POLICIES)}."
+            )
+        self.path = Path(path)
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self._file = None
+        self._buffer: List[str] = []
+        self._buffered = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def append(self, device: str, datapoint: "Datapoint", unit: str) -> None:
+        """Buffers a datapoint, as a line of JSON."""
+        line = json.dumps(
+            {
+                "device": device,
+                "timestamp": datapoint.timestamp,
+                "experiment_elapsed_time": datapoint.experiment_elapsed_time,
+                "data": datapoint.data,
+                "unit": unit,
+            }
+        )
+        self.write(line + "\n")
+
+    def write(self, line: str) -> None:
+        """Buffers a line, including its line terminator."""
+        self._buffer.append(line)
+        self._buffered += len(line)
+
+        if self._buffered >= self.flush_size:
+            self.flush()
+        elif self._timer is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return
+            self._timer = loop.call_later(self.flush_interval, self.flush)
+
+    def flush(self) -> None:
+        """Writes the buffered lines to the file."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._buffer:
+            return
+
+        if self._file is None:
+            self._file = open(self.path, "a")
+        self._file.write("".join(self._buffer))
+        self._file.flush()
+        logger.trace(f"Flushed {len(self._buffer)} lines to {self.path}")
+        self._buffer = []
+        self._buffered = 0
+
+        if self.fsync == "flush":
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        """Flushes the buffered lines and closes the file. The writer can still be used afterwards, reopening it."""
+        self.flush()
+        if self._file is not None:
+            if self.fsync != "never":
+                os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+
+
+def _index_path(path: Path) -> Path:
+    return path.with_name(path.name + ".index.jsonl")
+
+
+class ChunkedDataWriter:
+    """
+    Appends datapoints to a data file in a binary, columnar format, in chunks.
+
+    Each chunk holds the datapoints of one device as a (3, rows) float64 array, i.e. the timestamp, experiment elapsed
+    time and data columns, followed by the JSON of the non-numeric data, if any. For each chunk written, a line of JSON
+    with its device, unit, byte offset, number of rows and time span is appended to a sidecar index file
+    (`{path}.index.jsonl`), so that `read_chunked_data()` can load only the relevant chunks.
+
+    Arguments:
+    - `path`: The file to append the chunks to.
+    - `chunk_size`: The maximum number of rows per chunk.
+    - `flush_interval`: The maximum time, in seconds, for a datapoint to be buffered. Only applies within an event loop.
+    - `fsync`: When to sync the files to disk, see `DataWriter`.
+
+    Raises:
+    - `ValueError`: If the fsync policy is not valid.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, os.PathLike],
+        chunk_size: int = CHUNK_SIZE,
+        flush_interval: float = CHUNK_INTERVAL,
+        fsync: str = "close",
+    ):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(
+                f"Invalid fsync policy {fsync!r}. Expected one of {', '.join(FSYNC_POLICIES)}."
+            )
+        self.path = Path(path)
+        self.index_path = _index_path(self.path)
+        self.chunk_size = chunk_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self._files: Optional[Tuple[Any, Any]] = None  # data and index files
+        self._buffers: Dict[str, List[Tuple[float, float, Any]]] = {}
+        self._units: Dict[str, str] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def append(self, device: str, datapoint: "Datapoint", unit: str) -> None:
+        """Buffers a datapoint."""
+        buffer = self._buffers.setdefault(device, [])
+        buffer.append(
+            (datapoint.timestamp, datapoint.experiment_elapsed_time, datapoint.data)
+        )
+        self._units[device] = unit
+
+        if len(buffer) >= self.chunk_size:
+            self._write_chunk(device)
+        elif self._timer is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return
+            self._timer = loop.call_later(self.flush_interval, self.flush)
+
+    def _write_chunk(self, device: str) -> None:
+        rows = self._buffers.pop(device, [])
+        if not rows:
+            return
+
+        if self._files is None:
+            self._files = (open(self.path, "ab"), open(self.index_path, "a"))
+        data_file, index_file = self._files
+
+        columns = np.empty((3, len(rows)))
+        objects = []
+        for i, (timestamp, elapsed_time, data) in enumerate(rows):
+            columns[0, i] = timestamp
+            columns[1, i] = elapsed_time
+            if isinstance(data, Real) and not isinstance(data, bool):
+                columns[2, i] = data
+            else:
+                columns[2, i] = np.nan
+                objects.append([i, data])
+
+        entry = {
+            "device": device,
+            "unit": self._units[device],
+            "offset": data_file.tell(),
+            "rows": len(rows),
+            "start": rows[0][1],
+            "stop": rows[-1][1],
+        }
+        data_file.write(columns.tobytes())
+        if objects:
+            payload = json.dumps(objects).encode()
+            entry["objects_size"] = len(payload)
+            data_file.write(payload)
+        data_file.flush()
+
+        # the chunk is indexed once written, so that the index never points to missing data
+        if self.fsync == "flush":
+            os.fsync(data_file.fileno())
+        index_file.write(json.dumps(entry) + "\n")
+        index_file.flush()
+        if self.fsync == "flush":
+            os.fsync(index_file.fileno())
+        logger.trace(f"Wrote chunk of {len(rows)} rows for {device} to {self.path}")
+
+    def flush(self) -> None:
+        """Writes the buffered datapoints to the file, one chunk per device."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for device in list(self._buffers):
+            self._write_chunk(device)
+
+    def close(self) -> None:
+        """Flushes the buffered datapoints and closes the files."""
+        self.flush()
+        if self._files is not None:
+            for file in self._files:
+                if self.fsync != "never":
+                    os.fsync(file.fileno())
+                file.close()
+            self._files = None
+
+
+def truncate_jsonl_data(path: Union[str, os.PathLike], stop: float) -> List[dict]:
+    """
+    Drops the datapoints of a JSONL data file from the experiment elapsed time `stop` on, rewriting the file.
+
+    Used to resume an interrupted experiment from its last checkpoint, as the datapoints recorded after it are recorded
+    again, so that the times in the file stay in order. A truncated last line, i.e. a crash while writing it, is dropped.
+
+    Returns:
+    - The datapoints kept, as dicts, in order.
+    """
+    path = Path(path)
+    kept, lines = [], []
+    with open(path) as f:
+        for line in f:
+            try:
+                point = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Ignoring corrupted line in {path}: {line!r}")
+                continue
+            if point["experiment_elapsed_time"] < stop:
+                kept.append(point)
+                lines.append(line if line.endswith("\n") else line + "\n")
+
+    # the new file replaces the old one at once, so that a crash meanwhile loses nothing
+    temporary = path.with_name(path.name + ".tmp")
+    with open(temporary, "w") as f:
+        f.writelines(lines)
+    os.replace(temporary, path)
+    return kept
+
+
+def _read_index(path: Path) -> List[Dict[str, Any]]:
+    entries = []
+    with open(_index_path(path)) as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:  # a crash while writing the index
+                continue
+    return entries
+
+
+def _read_chunk(path: Path, entry: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the (3, rows) float64 columns and the data, as objects if not all numeric, of an indexed chunk."""
+    columns = np.memmap(
+        path,
+        dtype=np.float64,
+        mode="r",
+        offset=entry["offset"],
+        shape=(3, entry["rows"]),
+    )
+    data: np.ndarray = columns[2]
+    if "objects_size" in entry:
+        data = data.astype(object)
+        with open(path, "rb") as data_file:
+            data_file.seek(entry["offset"] + columns.nbytes)
+            objects = json.loads(data_file.read(entry["objects_size"]))
+        for i, value in objects:
+            data[i] = value
+    return columns, data
+
+
+def truncate_chunked_data(
+    path: Union[str, os.PathLike], stop: float
+) -> Dict[str, pd.DataFrame]:
+    """
+    Drops the datapoints of a binary data file from the experiment elapsed time `stop` on, see `truncate_jsonl_data()`.
+
+    The file is cut at the first chunk reaching `stop`, and the datapoints before `stop` of the chunks cut are written
+    again. The index is rewritten before the file is cut, so that it never points to missing data. Unindexed data, i.e.
+    a crash while writing a chunk, is dropped.
+
+    Returns:
+    - By device, the datapoints kept, as returned by `read_chunked_data()`.
+    """
+    # imported here, as the executor writes the data through this module
+    from flowchem.core.execute import Datapoint
+
+    path = Path(path)
+    entries = _read_index(path)
+    ends = [
+        entry["offset"] + 3 * 8 * entry["rows"] + entry.get("objects_size", 0)
+        for entry in entries
+    ]
+    cut = min(
+        (entry["offset"] for entry in entries if entry["stop"] >= stop),
+        default=max(ends, default=0),
+    )
+    # read (i.e. copy out of the memory map) the chunks cut while they are still there
+    rewritten = []
+    for entry in entries:
+        if entry["offset"] >= cut:
+            columns, data = _read_chunk(path, entry)
+            rewritten.append((entry, np.array(columns), np.array(data)))
+
+    temporary = path.with_name(path.name + ".tmp")
+    with open(temporary, "w") as f:
+        f.writelines(
+            json.dumps(entry) + "\n" for entry in entries if entry["offset"] < cut
+        )
+    os.replace(temporary, _index_path(path))
+    with open(path, "r+b") as f:
+        f.truncate(cut)
+
+    writer = ChunkedDataWriter(path)
+    for entry, columns, data in rewritten:
+        for i in np.flatnonzero(columns[1] < stop):
+            writer.append(
+                entry["device"],
+                Datapoint(
+                    data=data[i].item() if isinstance(data[i], np.generic) else data[i],
+                    timestamp=float(columns[0, i]),
+                    experiment_elapsed_time=float(columns[1, i]),
+                ),
+                entry["unit"],
+            )
+    writer.close()
+
+    return {
+        device: read_chunked_data(path, device)
+        for device in dict.fromkeys(entry["device"] for entry in entries)
+    }
+
+
+def read_chunked_data(
+    path: Union[str, os.PathLike],
+    device: str,
+    start: Optional[float] = None,
+    stop: Optional[float] = None,
+) -> pd.DataFrame:
+    """
+    Loads the data of a device from a file written in the binary format, see `ChunkedDataWriter`.
+
+    Only the chunks of the device overlapping the time window are read, memory-mapping the file.
+
+    Arguments:
+    - `path`: The data file, e.g. `~/.flowchem/{experiment_id}.data.bin`.
+    - `device`: The name of the device whose data to load.
+    - `start`: If given, the experiment elapsed time, in seconds, from which to load the data.
+    - `stop`: If given, the experiment elapsed time, in seconds, up to which to load the data (inclusive).
+
+    Returns:
+    - A DataFrame with `timestamp`, `experiment_elapsed_time` and `data` columns. The unit of the data is in its
+    `attrs["unit"]`.
+    """
+    path = Path(path)
+    start = -np.inf if start is None else start
+    stop = np.inf if stop is None else stop
+
+    chunks = []
+    unit = None
+    for entry in _read_index(path):
+        if entry["device"] != device:
+            continue
+        if entry["stop"] < start or entry["start"] > stop:
+            continue
+        unit = entry["unit"]
+
+        columns, data = _read_chunk(path, entry)
+        in_window = (columns[1] >= start) & (columns[1] <= stop)
+        chunks.append((columns[0][in_window], columns[1][in_window], data[in_window]))
+
+    df = pd.DataFrame(
+        {
+            "timestamp": np.concatenate([c[0] for c in chunks]) if chunks else [],
+            "experiment_elapsed_time": np.concatenate([c[1] for c in chunks])
+            if chunks
+            else [],
+            "data": np.concatenate([c[2] for c in chunks]) if chunks else [],
+        }
+    )
+    df.attrs["unit"] = unit
+    return df
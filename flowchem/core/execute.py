@@ -1,18 +1,33 @@
 from __future__ import annotations
 
 import asyncio
+import heapq
+import itertools
 import time
 import traceback
 from collections import namedtuple
 from contextlib import AsyncExitStack
-from copy import deepcopy
 from time import asctime, localtime
-from typing import TYPE_CHECKING, Dict, Iterable, List, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Union,
+)
 
 from loguru import logger
 
 from flowchem.components.properties import ActiveComponent, Sensor
-from flowchem.exceptions import ProtocolCancelled
+from flowchem.components.properties.sensor import ReadSchedule, SamplingStats
+from flowchem.exceptions import DeviceError, ProtocolCancelled
+from flowchem.units import parse_quantity
 
 if TYPE_CHECKING:
     from flowchem import Experiment
@@ -20,192 +35,517 @@ if TYPE_CHECKING:
 
 Datapoint = namedtuple("Datapoint", ["data", "timestamp", "experiment_elapsed_time"])
 
+# Maximum time, in seconds, for a component to confirm an update when it is reset to base state
+UPDATE_TIMEOUT = 5.0
 
-async def handle_exception(tasks_to_cancel):
+
+async def handle_exception(tasks_to_cancel: List[asyncio.Task]):
     """Called upon exception in main loop."""
     logger.error("Protocol execution is stopping NOW!")
     for task in tasks_to_cancel:
         task.cancel()
-    await asyncio.sleep(5)
+    # wait for the cancellation to be processed by all the tasks
+    await asyncio.gather(*tasks_to_cancel, return_exceptions=True)
 
 
-async def main(experiment: "Experiment", dry_run: Union[bool, int], strict: bool):
+async def main(
+    experiment: "Experiment",
+    dry_run: Union[bool, int, str],
+    strict: bool,
+    initialize: bool = True,
+):
     """
     The function that actually does the execution of the protocol.
 
     Arguments:
     - `experiment`: The experiment to execute.
-    - `dry_run`: Whether to simulate the experiment or actually perform it. If an integer greater than zero, the dry run will execute at that many times speed.
+    - `dry_run`: Whether to simulate the experiment or actually perform it. If an integer greater than zero, the dry run will execute at that many times speed. If "virtual", the dry run is executed in virtual time (see `flowchem.core.simulation`).
     - `strict`: Whether to stop execution upon any errors.
+    - `initialize`: Whether to initialize the components, i.e. enter their async context. False if the caller takes care of it, see `main_concurrently()`.
     """
 
-    logger.info("Using Flowchem ⚗️👩‍👨🧪")
-    logger.info("Performing final launch status check...")
+    # Log records are bound to the experiment, to tell apart concurrent experiments (see `execute_protocols()`)
+    with logger.contextualize(experiment=experiment.experiment_id):
+        logger.info("Using Flowchem ⚗️👩‍👨🧪")
+        logger.info("Performing final launch status check...")
 
-    # Run protocol
-    try:
-        # To programmatically enter many context manager (one per component) AsyncExitStack is used
-        async with AsyncExitStack() as stack:
-            # Enter async context manager of each component. This initializes connections to hardware.
-            if not dry_run:
-                components = [
-                    await stack.enter_async_context(compo)
-                    for compo in experiment._compiled_protocol.keys()  # type:ignore
-                ]
-            else:
-                components = list(experiment._compiled_protocol.keys())  # type:ignore
-
-            tasks = []
+        # Cancel, pause and end of experiment are signalled via events bound to this loop
+        experiment._init_signals()
 
-            # For each component get the relevant coroutines
-            for component in components:
-                # Find out when each component's monitoring should end
-                procedures: Iterable = experiment._compiled_protocol[
-                    component
-                ]  # type:ignore
-                end_times: List[float] = [p["time"] for p in procedures]
-                end_time: float = max(end_times)  # we only want the last end time
-                logger.trace(f"Calculated end time for {component} as {end_time}s")
-
-                tasks.extend(
-                    [
-                        wait_and_execute_procedure(
-                            procedure=procedure,
-                            component=component,
-                            experiment=experiment,
-                            dry_run=dry_run,
-                            strict=strict,
+        # Run protocol
+        try:
+            # To programmatically enter many context manager (one per component) AsyncExitStack is used
+            async with AsyncExitStack() as stack:
+                # Enter async context manager of each component. This initializes connections to hardware.
+                components = experiment._components
+                if initialize and not dry_run:
+                    experiment.startup_times = await enter_components(stack, components)
+
+                tasks = []
+
+                # A single scheduler releases all the procedures in time order
+                tasks.append(scheduler(experiment, components, dry_run, strict))
+
+                # For each component get the relevant coroutines
+                for component in components:
+                    # Find out when each component's monitoring should end
+                    procedures: Iterable = experiment._compiled_protocol[
+                        component
+                    ]  # type:ignore
+                    end_times: List[float] = [p["time"] for p in procedures]
+                    end_time: float = max(end_times)  # we only want the last end time
+                    logger.trace(f"Calculated end time for {component} as {end_time}s")
+
+                    # for sensors, add the monitor task
+                    if isinstance(component, Sensor):
+                        logger.trace(f"Creating sensor monitoring task for {component}")
+                        if dry_run == "virtual":
+                            tasks.append(_simulate_monitor(component, experiment))
+                        else:
+                            tasks.append(
+                                _monitor(component, experiment, bool(dry_run), strict)
+                            )
+                    logger.debug(f"{component} is GO!")
+
+                logger.debug("All components are GO!")
+
+                # Add a task to monitor the stop button
+                tasks.append(check_if_cancelled(experiment))
+                tasks.append(pause_handler(experiment, components, dry_run))
+                tasks.append(end_loop(experiment))
+                logger.debug("All tasks are GO!")
+
+                # Add a reminder about FF
+                if type(dry_run) == int:
+                    logger.info(f"Simulating at {dry_run}x speed...")
+                elif dry_run == "virtual":
+                    logger.info("Simulating in virtual time...")
+
+                # begin the experiment
+                logger.info("All checks passed. Experiment is GO!")
+                experiment.is_executing = True
+                experiment.start_time = experiment._clock.time()
+                checkpoint = experiment._checkpoint
+                if checkpoint is not None:
+                    # resume from the last confirmed step, as if the downtime was a pause
+                    experiment.start_time -= checkpoint.elapsed_time
+                    logger.info(f"Resuming from {checkpoint.elapsed_time}s.")
+                if experiment._journal is not None:
+                    if checkpoint is not None:
+                        experiment._journal.resume(
+                            checkpoint.elapsed_time, experiment.start_time
                         )
-                        for procedure in experiment._compiled_protocol[
-                            component
-                        ]  # type:ignore
-                    ]
-                )
-                logger.trace(f"Task list generated for {component}.")
+                    else:
+                        experiment._journal.start(
+                            experiment.experiment_id, experiment.start_time
+                        )
+                status = "failed"
 
-                # for sensors, add the monitor task
-                if isinstance(component, Sensor):
-                    logger.trace(f"Creating sensor monitoring task for {component}")
-                    tasks.append(_monitor(component, experiment, bool(dry_run), strict))
-                logger.debug(f"{component} is GO!")
+                # convert to local time for the start message
+                _local_time = asctime(localtime(experiment.start_time))
+                start_msg = f"{experiment} started at {_local_time}."
 
-            logger.debug("All components are GO!")
+                logger.success(start_msg)
 
-            # Add a task to monitor the stop button
-            tasks.append(check_if_cancelled(experiment))
-            tasks.append(pause_handler(experiment, components))
-            tasks.append(end_loop(experiment))
-            logger.debug("All tasks are GO!")
+                # FIXME the list tasks actually contains coroutines, not tasks. A rename would be nice.
+                task_list = [asyncio.create_task(coro) for coro in tasks]
+                try:
+                    await asyncio.gather(*task_list)
+
+                except ProtocolCancelled:
+                    status = "cancelled"
+                    logger.error("Stop button pressed.")
+                    await handle_exception(task_list)
+                    logger.critical(f"{experiment} finished by STOP button.")
+
+                except (RuntimeError, Exception) as e:
+                    logger.error(
+                        f"Got {repr(e)}. Full traceback is logged at trace level."
+                    )
+                    await handle_exception(task_list)
+                    logger.critical(f"{experiment} finished by exception.")
+
+                else:
+                    status = "completed"
+                    logger.success(f"{experiment} finished successfully.")
+
+                finally:
+                    # when this code block is reached, the tasks will have either all completed or
+                    # an exception has occurred.
+                    experiment.end_time = experiment._clock.time()
+
+                    # when this code block is reached, the tasks will have completed or have been cancelled.
+                    _local_time = asctime(localtime(experiment.end_time))
+                    end_msg = f"{experiment} completed at {_local_time}."
+
+                    # Stop all the sensors and exit the read loops
+                    logger.debug("Resetting all components")
+
+                    # send the base state to all the components before closing the connections
+                    await reset_to_base_state(components, dry_run)
+
+                    if experiment._journal is not None:
+                        experiment._journal.end(status, experiment.end_time)
+
+                    # we only reach this line if things went well
+                    logger.info(end_msg)
+        finally:
+
+            # let the stream subscribers process the last datapoints, e.g. write them to file
+            await experiment.stream.close()
+
+            # set some protocol metadata
+            experiment.was_executed = True  # type:ignore
+            # after E.was_executed=True, we THEN log that we're cleaning up so it's shown
+            # in the cleanup category, not with a time in EET
+            logger.info("Experimentation is over. Cleaning up...")
+            experiment.is_executing = False  # type:ignore
+
+            if experiment._bound_logger is not None:  # type:ignore
+                logger.trace("Deactivating logging to Jupyter notebook widget...")
+                logger.remove(experiment._bound_logger)  # type:ignore
+
+
+def _group_by_bus(
+    components: Iterable[ActiveComponent],
+) -> Dict[Hashable, List[ActiveComponent]]:
+    """Groups the components by the bus they are connected to, see `Component._bus`."""
+    buses: Dict[Hashable, List[ActiveComponent]] = {}
+    for component in components:
+        buses.setdefault(component._bus, []).append(component)
+    return buses
+
+
+async def enter_components(
+    stack: AsyncExitStack, components: List[ActiveComponent]
+) -> Dict[str, float]:
+    """
+    Enters the async context of all the components, i.e. initializes the connections to hardware.
 
-            # Add a reminder about FF
-            if type(dry_run) == int:
-                logger.info(f"Simulating at {dry_run}x speed...")
+    Components on different buses are initialized concurrently, while components sharing a bus (e.g. daisy-chained
+    pumps) are initialized one after the other. If any initialization fails, the error is raised once all the others
+    are completed, so that `stack` exits all the components that were successfully entered.
 
-            # begin the experiment
-            logger.info("All checks passed. Experiment is GO!")
-            experiment.is_executing = True
-            experiment.start_time = time.time()
+    Returns:
+    - The time, in seconds, taken to initialize each component, by component name.
+    """
+    buses = _group_by_bus(components)
+    logger.debug(f"Initializing {len(components)} components on {len(buses)} buses.")
+    startup_times: Dict[str, float] = {}
+
+    async def enter_bus(bus_components: List[ActiveComponent]):
+        for bus_component in bus_components:
+            start_time = time.perf_counter()
+            await stack.enter_async_context(bus_component)
+            startup_time = time.perf_counter() - start_time
+            startup_times[bus_component.name] = startup_time
+            logger.debug(f"{bus_component} initialized in {startup_time:.3f}s")
+
+    results = await asyncio.gather(
+        *[enter_bus(bus_components) for bus_components in buses.values()],
+        return_exceptions=True,
+    )
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        logger.error(f"Initialization failed for {len(errors)} bus(es)!")
+        raise errors[0]
+
+    logger.info(
+        "Components initialized: "
+        + ", ".join(f"{k} ({v:.3f}s)" for k, v in startup_times.items())
+    )
+    return startup_times
+
+
+async def main_concurrently(
+    experiments: List["Experiment"], dry_run: Union[bool, int, str], strict: bool
+):
+    """
+    Executes several experiments concurrently, on disjoint sets of components.
 
-            # convert to local time for the start message
-            _local_time = asctime(localtime(experiment.start_time))
-            start_msg = f"{experiment} started at {_local_time}."
+    The components of all the experiments are initialized together, see `enter_components()`, then each experiment is
+    executed by `main()`.
+    """
+    async with AsyncExitStack() as stack:
+        if not dry_run:
+            startup_times = await enter_components(
+                stack, [c for E in experiments for c in E._components]
+            )
+            for experiment in experiments:
+                experiment.startup_times = {
+                    c.name: startup_times[c.name] for c in experiment._components
+                }
+
+        results = await asyncio.gather(
+            *[
+                main(experiment, dry_run=dry_run, strict=strict, initialize=False)
+                for experiment in experiments
+            ],
+            return_exceptions=True,
+        )
+
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        raise errors[0]
+
+
+async def update_components(
+    components: Iterable[ActiveComponent], timeout: float = UPDATE_TIMEOUT
+) -> Dict[ActiveComponent, bool]:
+    """
+    Sends the current state of the components to the hardware, concurrently.
 
-            logger.success(start_msg)
+    Components sharing a bus are updated one after the other, holding the lock of the bus (see `Component._bus_lock()`).
+    Each update, including the wait for the bus, has to complete within `timeout` seconds.
 
+    Returns:
+    - A dict with, for each component, whether the update was confirmed.
+    """
+    confirmed: Dict[ActiveComponent, bool] = {}
+
+    async def update(component: ActiveComponent):
+        async with component._bus_lock():
+            await component._update()
+
+    async def update_bus(bus_components: List[ActiveComponent]):
+        for component in bus_components:
             try:
-                # FIXME the list tasks actually contains coroutines, not tasks. A rename would be nice.
-                task_list = [asyncio.create_task(coro) for coro in tasks]
-                await asyncio.gather(*task_list)
+                await asyncio.wait_for(update(component), timeout)
+            except (Exception, DeviceError) as e:
+                logger.error(f"{component} did not confirm the update! [{repr(e)}]")
+                logger.trace(traceback.format_exc())
+                confirmed[component] = False
+            else:
+                confirmed[component] = True
 
-            except ProtocolCancelled:
-                logger.error("Stop button pressed.")
-                await handle_exception(tasks)
-                logger.critical(f"{experiment} finished by STOP button.")
+    await asyncio.gather(
+        *[
+            update_bus(bus_components)
+            for bus_components in _group_by_bus(components).values()
+        ]
+    )
+    return confirmed
 
-            except (RuntimeError, Exception) as e:
-                logger.error(f"Got {repr(e)}. Full traceback is logged at trace level.")
-                await handle_exception(tasks)
-                logger.critical(f"{experiment} finished by exception.")
 
-            else:
-                logger.success(f"{experiment} finished successfully.")
+async def reset_to_base_state(
+    components: Iterable[ActiveComponent],
+    dry_run: Union[bool, int],
+    timeout: float = UPDATE_TIMEOUT,
+) -> Dict[ActiveComponent, bool]:
+    """
+    Brings all the components to their base state, i.e. to a safe state, e.g. upon pause or stop.
+
+    The base states are sent to all the components concurrently (see `update_components()`), so that the time needed
+    is bound by the slowest component rather than by the sum of them all.
+
+    Returns:
+    - A dict with, for each component, whether the base state was confirmed.
+    """
+    components = list(components)
+    for component in components:
+        logger.debug(f"Resetting {component} to base state")
+        component._update_from_params(component._base_state)
 
-            finally:
-                # when this code block is reached, the tasks will have either all completed or
-                # an exception has occurred.
-                experiment.end_time = time.time()
+    if dry_run:
+        return {component: True for component in components}
+
+    confirmed = await update_components(components, timeout)
+    if all(confirmed.values()):
+        logger.debug("All components set to base states.")
+    else:
+        failed = [str(component) for component, ok in confirmed.items() if not ok]
+        logger.critical(f"Base state not confirmed by: {', '.join(failed)}!")
+    return confirmed
+
+
+async def scheduler(
+    experiment: "Experiment",
+    components: List[ActiveComponent],
+    dry_run: Union[bool, int],
+    strict: bool,
+):
+    """
+    Releases the compiled procedures of all the components in time order.
 
-                # when this code block is reached, the tasks will have completed or have been cancelled.
-                _local_time = asctime(localtime(experiment.end_time))
-                end_msg = f"{experiment} completed at {_local_time}."
+    The pending procedures are kept in a heap ordered by execution time, so only the updates currently
+    in-flight to the devices are tasks. Updates to the same component are executed in order.
 
-                # Stop all the sensors and exit the read loops
-                logger.debug("Resetting all components")
+    When resuming an experiment, the procedures up to the last one confirmed by each component are skipped and their
+    params are sent at once instead, to bring the component back to its state at that point of the protocol.
+    """
+    # tie-breaker, keeps the compiled order for simultaneous procedures
+    counter = itertools.count()
+    queue = []
+    for component in components:
+        procedures = experiment._compiled_protocol[component]  # type:ignore
+        first = 0
+        if experiment._checkpoint is not None:
+            first = _restore_from_checkpoint(experiment, component, queue, counter)
+        for index, procedure in enumerate(procedures[first:], start=first):
+            queue.append(
+                (procedure["time"], next(counter), component, procedure, index)
+            )
+    heapq.heapify(queue)
+    logger.trace(f"Scheduled {len(queue)} procedures.")
 
-                # reset object
-                for component in list(
-                    experiment._compiled_protocol.keys()
-                ):  # type:ignore
-                    # reset object
-                    logger.debug(f"Resetting {component} to base state")
-                    component._update_from_params(component._base_state)
+    in_flight: Set[asyncio.Task] = set()
+    last_update: Dict[ActiveComponent, asyncio.Task] = {}
 
-                await asyncio.sleep(1)
+    try:
+        while queue:
+            execution_time, _, component, procedure, index = heapq.heappop(queue)
+
+            # wait for the right moment
+            scheduled_time = await _wait_while_dispatching(
+                wait(
+                    execution_time,
+                    experiment,
+                    f"Set {component} to {procedure['params']}",
+                ),
+                in_flight,
+            )
 
-                # we only reach this line if things went well
-                logger.info(end_msg)
+            task = asyncio.create_task(
+                execute_procedure(
+                    procedure=procedure,
+                    component=component,
+                    experiment=experiment,
+                    dry_run=dry_run,
+                    strict=strict,
+                    scheduled_time=scheduled_time,
+                    previous_update=last_update.get(component),
+                    index=index,
+                )
+            )
+            in_flight.add(task)
+            last_update[component] = task
+
+        # all procedures released, wait for the last updates to complete
+        while in_flight:
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                in_flight.discard(task)
+                task.result()
     finally:
+        for task in in_flight:
+            task.cancel()
+
 
-        # set some protocol metadata
-        experiment.was_executed = True  # type:ignore
-        # after E.was_executed=True, we THEN log that we're cleaning up so it's shown
-        # in the cleanup category, not with a time in EET
-        logger.info("Experimentation is over. Cleaning up...")
-        experiment.is_executing = False  # type:ignore
+def _restore_from_checkpoint(
+    experiment: "Experiment",
+    component: ActiveComponent,
+    queue: list,
+    counter: Iterator[int],
+) -> int:
+    """
+    Queues the update restoring the state of a component when resuming an experiment.
 
-        if experiment._bound_logger is not None:  # type:ignore
-            logger.trace("Deactivating logging to Jupyter notebook widget...")
-            logger.remove(experiment._bound_logger)  # type:ignore
+    Returns:
+    - The index of the first compiled procedure still to be executed by the component.
+    """
+    procedures = experiment._compiled_protocol[component]  # type:ignore
+    confirmed = [
+        index
+        for name, index in experiment._checkpoint.confirmed  # type:ignore
+        if name == component.name
+    ]
+    if not confirmed:
+        return 0
+
+    last = max(confirmed)
+    params: Dict[str, Any] = {}
+    for procedure in procedures[: last + 1]:
+        params.update(procedure["params"])
+    restore = dict(time=procedures[last]["time"], params=params)
+    logger.debug(f"Restoring {component} to {params}")
+    queue.append((restore["time"], next(counter), component, restore, None))
+    return last + 1
+
+
+async def _wait_while_dispatching(waiter: Awaitable, in_flight: Set[asyncio.Task]):
+    """Awaits `waiter` while re-raising the exceptions of in-flight updates as soon as they complete."""
+    waiter_task = asyncio.ensure_future(waiter)
+    try:
+        while True:
+            done, _ = await asyncio.wait(
+                {waiter_task, *in_flight}, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done - {waiter_task}:
+                in_flight.discard(task)
+                task.result()
+            if waiter_task in done:
+                return waiter_task.result()
+    finally:
+        waiter_task.cancel()
 
 
-async def wait_and_execute_procedure(
+async def execute_procedure(
     procedure,
     component: ActiveComponent,
     experiment: "Experiment",
     dry_run: Union[bool, int],
     strict: bool,
+    scheduled_time: float,
+    previous_update: Optional[asyncio.Task] = None,
+    index: Optional[int] = None,
 ):
+    """
+    Applies a procedure to its component, once the previous update to the same component is completed.
+
+    The record added to `experiment.executed_procedures` includes the time at which the procedure was scheduled, the
+    time it was dispatched to the component and the time the component acknowledged the update.
+    If the experiment is journaled, the dispatch and the confirmation of the procedure, i.e. the `index`-th compiled
+    procedure of the component, are written to the journal.
+    """
+    journal = experiment._journal if index is not None else None
+    if previous_update is not None and not previous_update.done():
+        await asyncio.wait({previous_update})
 
-    # wait for the right moment
     params = procedure["params"]
-    await wait(procedure["time"], experiment, f"Set {component} to {params}")
 
     # NOTE: this doesn't actually call the _update() method
     component._update_from_params(params)
+    # pre-encoded at compile time, if the component supports it
+    component._setpoints = procedure.get("setpoints", {})
     logger.trace(f"{component} object state updated to reflect new params.")
 
+    if journal is not None:
+        journal.dispatch(component.name, index, procedure["time"])  # type:ignore
+
+    confirmed = True
     if dry_run:
         logger.info(f"Simulating: {params} on {component} at {procedure['time']}s")
+        dispatch_time = experiment._clock.time()
     else:
         logger.info(f"Executing: {params} on {component} at {procedure['time']}s")
+        dispatch_time = experiment._clock.time()
         try:
-            await component._update()  # NOTE: This does!
+            # the other components on the same bus, possibly of other experiments, wait for the update to complete
+            async with component._bus_lock():
+                await component._update()  # NOTE: This does!
         except Exception as e:
+            confirmed = False
             level = "ERROR" if strict else "WARNING"
             logger.log(level, f"Failed to update {component}!")
             logger.trace(traceback.format_exc())
             if strict:
                 raise RuntimeError(str(e))
 
+    ack_time = experiment._clock.time()
     record = {
-        "timestamp": time.time(),
+        "timestamp": ack_time,
         "params": params,
         "type": "executed_procedure" if not dry_run else "simulated_procedure",
         "component": component,
-        "experiment_elapsed_time": time.time() - experiment.start_time,
+        "experiment_elapsed_time": ack_time - experiment.start_time,
+        "scheduled_time": scheduled_time,
+        "dispatch_time": dispatch_time,
+        "ack_time": ack_time,
     }
 
     experiment.executed_procedures.append(record)
+    if journal is not None and confirmed:
+        journal.confirm(component.name, index, procedure["time"], record)  # type:ignore
 
 
 async def _monitor(
@@ -230,6 +570,57 @@ async def _monitor(
             raise RuntimeError(str(e))
 
 
+async def _simulate_monitor(
+    sensor: Sensor, experiment: "Experiment", end_time: Optional[float] = None
+):
+    """
+    Generates the simulated reads of a sensor at the rates set by the compiled protocol.
+
+    Used for simulations in virtual time (see `flowchem.core.simulation`). The reads follow the same `ReadSchedule` as
+    in `Sensor._monitor()`, but are bounded by the procedures of the sensor, so that a read due when the rate changes is
+    never done at the old rate, whatever the order in which the loop wakes up the tasks due at that time.
+    """
+    if end_time is None:
+        end_time = experiment.protocol._inferred_duration
+    procedures = experiment._compiled_protocol[sensor]  # type: ignore
+    rate = parse_quantity(sensor._base_state["rate"]).m_as("Hz")
+    stats = experiment._sampling_stats.setdefault(sensor.name, SamplingStats())
+
+    logger.debug(f"Started simulated monitoring of {sensor.name}")
+    for i, procedure in enumerate(procedures):
+        if "rate" in procedure["params"]:
+            rate = parse_quantity(procedure["params"]["rate"]).m_as("Hz")
+        if not rate:
+            continue
+
+        # reads happen at the given rate until the next procedure or the end of the experiment
+        start = procedure["time"]
+        stop = procedures[i + 1]["time"] if i + 1 < len(procedures) else end_time
+        schedule = ReadSchedule(start, rate, sensor.overrun, stats)
+        if experiment._checkpoint is not None:
+            # skip the reads done before the experiment was resumed
+            schedule.skip_to(experiment._checkpoint.elapsed_time)
+        if schedule.deadline >= stop:
+            continue
+        stats.start(experiment.start_time + schedule.deadline, rate)
+        while (read_time := schedule.deadline) < stop:
+            await wait(read_time, experiment, f"Read {sensor}")
+            timestamp = experiment._clock.time()
+            await experiment._update(
+                device=sensor.name,
+                datapoint=Datapoint(
+                    data="simulated read",
+                    timestamp=timestamp,
+                    experiment_elapsed_time=timestamp - experiment.start_time,
+                ),
+            )
+            stats.read(0.0)
+            # simulated reads take no time, so no deadline is ever missed
+            schedule.next(read_time)
+        stats.stop(experiment.start_time + stop)
+    logger.debug(f"Stopped simulated monitoring of {sensor}")
+
+
 async def end_loop(experiment: "Experiment"):
     await wait(
         experiment.protocol._inferred_duration, experiment, "End loop"
@@ -237,65 +628,88 @@ async def end_loop(experiment: "Experiment"):
     experiment._end_loop = True  # type:ignore
 
 
+async def _wait_for_any(*events: asyncio.Event) -> None:
+    """Waits until at least one of the events given is set."""
+    waiters = [asyncio.create_task(event.wait()) for event in events]
+    try:
+        await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for waiter in waiters:
+            waiter.cancel()
+
+
 async def check_if_cancelled(experiment: "Experiment") -> None:
-    while not experiment._end_loop:  # type:ignore
-        if experiment.cancelled:  # type:ignore
-            raise ProtocolCancelled("protocol cancelled")
-        await asyncio.sleep(0)
+    """Raises ProtocolCancelled as soon as the experiment is cancelled. Returns at the end of the experiment."""
+    await _wait_for_any(experiment._cancel_event, experiment._end_event)  # type:ignore
+    if experiment.cancelled and not experiment._end_loop:  # type:ignore
+        raise ProtocolCancelled("protocol cancelled")
 
 
 async def pause_handler(
-    experiment: "Experiment", components: List[ActiveComponent]
+    experiment: "Experiment",
+    components: List[ActiveComponent],
+    dry_run: Union[bool, int],
 ) -> None:
     was_paused = False
     states: Dict[ActiveComponent, dict] = {}
     # this is either the planned duration of the experiment or cancellation
     while not experiment._end_loop:  # type:ignore
+        # sleep until the pause button is toggled or the experiment ends
+        await _wait_for_any(
+            experiment._pause_event, experiment._end_event  # type:ignore
+        )
+        experiment._pause_event.clear()  # type:ignore
+        if experiment._end_loop:  # type:ignore
+            break
 
         # we need to pause
         if experiment.paused and not was_paused:
             was_paused = True
             for component in components:
                 logger.debug(f"Pausing {component}.")
-                states[component] = deepcopy(component.__dict__)
-                component._update_from_params(component._base_state)
-                await component._update()
-            logger.debug("All components set to base states.")
+                states[component] = component._snapshot()
+            await reset_to_base_state(components, dry_run)
             logger.trace(f"Saved states are {states}.")
 
         # we are paused but the button was hit, so we need to resume
         elif not experiment.paused and was_paused:
             logger.trace(f"Previous states: {states}")
+            to_update = []
             for component in components:
-                for k, v in states[component].items():
-                    setattr(component, k, v)
-                await component._update()
-                logger.debug(f"Reset {component} to {states[component]}.")
+                if component._restore(states[component]):
+                    to_update.append(component)
+                    logger.debug(f"Reset {component} to {states[component]}.")
+            if not dry_run:
+                await update_components(to_update)
             was_paused = False
             states = {}
             logger.debug("All components reset to state before pause.")
 
-        await asyncio.sleep(0)
 
+async def wait(duration: float, experiment: "Experiment", name: str) -> float:
+    """
+    A pause-aware version of asyncio.sleep.
+
+    Note that `duration` is the experiment elapsed time to wait for, i.e. the deadline since the experiment start.
+    The deadline is checked against the experiment's monotonic clock upon every wake-up, so that inaccuracies of the
+    event loop timer do not accumulate over the experiment.
 
-async def wait(duration: float, experiment: "Experiment", name: str):
-    """A pause-aware version of asyncio.sleep"""
+    Returns:
+    - The Unix time of the deadline, including the time spent paused.
+    """
     if type(experiment.dry_run) == int:
         duration /= experiment.dry_run
-    await asyncio.sleep(duration)
-    logger.trace(f"<{name}> Just woke up from {duration}s nap")
 
     while True:
-        # if, at the end of sleeping, the experiment is paused, wait for it to resume
+        # if the experiment is paused, wait for it to resume
         while experiment.paused:
-            await asyncio.sleep(0.1)
-        assert not experiment.paused
+            await experiment._resume_event.wait()  # type:ignore
 
         # figure out how long we've been paused for
         eet_offset = experiment._total_paused_duration
         # and where in the experimental plan we are
         assert isinstance(experiment.start_time, float)  # make the type checker happy
-        eet = time.time() - experiment.start_time - eet_offset
+        eet = experiment._clock.time() - experiment.start_time - eet_offset
 
         # do the logging thing
         logger.trace(f"Expected End Time is {eet}")
@@ -306,4 +720,4 @@ async def wait(duration: float, experiment: "Experiment", name: str):
             await asyncio.sleep(duration - eet)
         else:
             logger.trace(f"It's go time for <{name}>!")
-            break
+            return experiment.start_time + eet_offset + duration
@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import asyncio
-import json
 import os
 import time
 from hashlib import blake2b
@@ -9,8 +8,8 @@ from pathlib import Path
 from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
 from warnings import warn
 
-import aiofiles
 import ipywidgets as widgets
+import pandas as pd
 from bokeh.io import output_notebook, push_notebook, show
 from bokeh.plotting import figure
 from bokeh.resources import INLINE
@@ -19,10 +18,31 @@ from IPython.display import display
 from loguru import logger
 
 from flowchem.components.properties import ActiveComponent, Sensor
-from flowchem.core.execute import main
+from flowchem.components.properties.sensor import SamplingStats
+from flowchem.core.clock import ExecutionClock
+from flowchem.core.data_writer import (
+    DATA_FORMATS,
+    FSYNC_POLICIES,
+    ChunkedDataWriter,
+    DataWriter,
+    truncate_chunked_data,
+    truncate_jsonl_data,
+)
+from flowchem.core.execute import Datapoint, main
+from flowchem.core.journal import Checkpoint, ExecutionJournal
+from flowchem.core.sensor_data import SensorData, min_max_decimate
+from flowchem.core.stream import StreamBus
+from flowchem.core.simulation import simulate
 
 if TYPE_CHECKING:
-    from flowchem import Datapoint, Protocol
+    from flowchem import Protocol
+
+# Number of latest datapoints shown at full resolution in the live charts
+PLOT_ROLLOVER = 2000
+# Maximum number of refreshes per second of each live chart
+PLOT_REFRESH_RATE = 5
+# Number of bins of the decimated history in the live charts, see `min_max_decimate()`
+PLOT_HISTORY_BINS = 500
 
 
 class Experiment(object):
@@ -33,20 +53,21 @@ class Experiment(object):
     - `protocol`: The protocol for which the experiment was conducted.
     - `compiled_protocol`: The results of `protocol._compile()`.
     - `verbosity`: See `Protocol.execute` for a description of the verbosity options.
-    - `dry_run`: Whether the experiment is a dry run and, if so, by what factor it is sped up by.
+    - `dry_run`: Whether the experiment is a dry run and, if so, by what factor it is sped up by or "virtual" if it is simulated in virtual time.
 
     Attributes:
     - `graph`: The DeviceGraph upon which the experiment is conducted.
     - `cancelled`: Whether the experiment is cancelled.
     - `compiled_protocol`: The results of `protocol._compile()`.
-    - `data`: A list of `Datapoint` namedtuples from the experiment's sensors.
-    - `dry_run`: Whether the experiment is a dry run and, if so, by what factor it is sped up by.
+    - `data`: The data from the experiment's sensors, by sensor name. Each `SensorData` behaves as a list of `Datapoint` namedtuples and can be converted with `to_numpy()` or `to_dataframe()`.
+    - `dry_run`: Whether the experiment is a dry run and, if so, by what factor it is sped up by or "virtual" if it is simulated in virtual time.
     - `end_time`: The Unix time of the experiment's end.
-    - `executed_procedures`: A list of the procedures that were executed during the experiment.
+    - `executed_procedures`: A list of the procedures that were executed during the experiment. Each record includes the Unix times at which the procedure was scheduled (`scheduled_time`), dispatched to the component (`dispatch_time`) and acknowledged by it (`ack_time`).
     - `experiment_id`: The experiment's ID. By default, of the form `YYYY_MM_DD_HH_MM_SS_HASH`, where HASH is the 3-bytes hexadecimal blake2b hash of the protocol's YAML.
     - `paused`: Whether the experiment is currently paused.
     - `protocol`: The protocol for which the experiment was conducted.
     - `start_time`: The Unix time of the experiment's is.
+    - `startup_times`: The time, in seconds, taken to initialize each component, by component name.
     """
 
     def __init__(self, protocol: "Protocol"):
@@ -58,15 +79,18 @@ class Experiment(object):
         self.experiment_id: Optional[str] = None
 
         # default values
-        self.dry_run: Union[bool, int]
+        self.dry_run: Union[bool, int, str]
         self.start_time: float  # hasn't started until main() is called
+        # all the execution times are taken from a monotonic clock, mapped to wall time on creation
+        self._clock = ExecutionClock()
         self.created_time = (
-            time.time()
+            self._clock.wall_origin
         )  # when the object was created (might be != from start_time)
         self.end_time: float
-        self.data: Dict[str, List[Datapoint]] = {}
-        self.cancelled = False
+        self.data: Dict[str, SensorData] = {}
+        self.stream = StreamBus()
         self.was_executed = False
+        self.startup_times: Dict[str, float] = {}
         self.executed_procedures: List[
             Dict[str, Union[float, Dict[str, Any], str, ActiveComponent]]
         ] = []
@@ -75,6 +99,9 @@ class Experiment(object):
         _local_time = time.localtime(self.created_time)
         self._created_time_local: str = time.strftime("%Y_%m_%d_%H_%M_%S", _local_time)
         self._charts = {}  # type: ignore
+        self._chart_refreshes: Dict[str, asyncio.TimerHandle] = {}  # pending refreshes
+        self._chart_refreshed: Dict[str, float] = {}  # loop time of the last refresh
+        self._chart_streamed: Dict[str, int] = {}  # number of datapoints streamed
         self._graphs_shown = False
         self._sensors = self.graph[Sensor]
         self._sensors.reverse()
@@ -83,15 +110,25 @@ class Experiment(object):
         self._bound_logger = None
         self._plot_height = 300
         self._is_executing = False
+        self._cancelled = False
         self._paused = False
         self._pause_times: List[Dict[str, float]] = []
-        self._end_loop = False  # when to stop monitoring the buttons
+        self._sampling_stats: Dict[str, SamplingStats] = {}  # by sensor name
+        self._ended = False  # when to stop monitoring the buttons, see _end_loop
+        # asyncio events signalling cancel/pause/end, created by _init_signals() in the executor loop
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._cancel_event: Optional[asyncio.Event] = None
+        self._pause_event: Optional[asyncio.Event] = None
+        self._resume_event: Optional[asyncio.Event] = None
+        self._end_event: Optional[asyncio.Event] = None
         self._file_logger_id: Optional[int] = None
         self._log_file: Optional[Path] = None
         self._data_file: Optional[Path] = None
-        self._transformed_data: Dict[str, Dict[str, List[Datapoint]]] = {
-            s: {"datapoints": [], "timestamps": []} for s in self._sensor_names
-        }
+        self._data_writer: Optional[Union[DataWriter, ChunkedDataWriter]] = None
+        self._journal: Optional[ExecutionJournal] = None
+        self._checkpoint: Optional[
+            Checkpoint
+        ] = None  # set when resuming, see _resume()
 
     def __str__(self):
         return f"Experiment {self.experiment_id}"
@@ -100,28 +137,19 @@ class Experiment(object):
         return f"<Experiment {self.experiment_id}>"
 
     async def _update(self, device: str, datapoint):
-
-        # If a chart has been registered to the device, update it.
         if device not in self.data:
-            self.data[device] = []
+            self.data[device] = SensorData()
         self.data[device].append(datapoint)
 
-        if self._data_file is not None:
-            line = json.dumps(
-                {
-                    "device": device,
-                    "timestamp": datapoint.timestamp,
-                    "experiment_elapsed_time": datapoint.experiment_elapsed_time,
-                    "data": datapoint.data,
-                    "unit": self.protocol.graph[device]._unit,
-                }
-            )
-            async with aiofiles.open(self._data_file, "a+") as f:
-                await f.write(line + "\n")
+        # file writing, plotting, etc. are done by the subscribers of the stream
+        await self.stream.publish(device, datapoint)
 
-        if get_ipython() is None:
-            return
+    def _write_datapoint(self, device: str, datapoint) -> None:
+        self._data_writer.append(  # type: ignore
+            device, datapoint, unit=self.protocol.graph[device]._unit
+        )
 
+    def _plot(self, device: str, datapoint) -> None:
         if not self._graphs_shown:
             logger.debug("Graphs not shown. Initializing...")
             for sensor, output in self._sensor_outputs.items():  # type: ignore
@@ -137,8 +165,16 @@ class Experiment(object):
                         plot_height=self._plot_height,
                         plot_width=600,
                     )
-                    r = p.line(
-                        source=self._transformed_data[sensor.name],
+                    # the whole experiment, decimated, under the latest datapoints
+                    history = p.line(
+                        source={"datapoints": [], "timestamps": []},
+                        x="timestamps",
+                        y="datapoints",
+                        color="#aaaadd",
+                        line_width=1,
+                    )
+                    live = p.line(
+                        source={"datapoints": [], "timestamps": []},
                         x="timestamps",
                         y="datapoints",
                         color="#2222aa",
@@ -152,24 +188,99 @@ class Experiment(object):
                     target = show(p, notebook_handle=True)
 
                     # save the target and plot for later updating
-                    self._charts[sensor.name] = (target, r)
+                    self._charts[sensor.name] = (target, live, history)
                 logger.trace(f"Sucessfully initialized graph for {sensor.name}")
             logger.trace("All graphs successfully initialized")
             self._graphs_shown = True
 
-        if device in self._transformed_data:
-            target, r = self._charts[device]
-            self._transformed_data[device]["datapoints"].append(datapoint.data)
-            self._transformed_data[device]["timestamps"].append(
-                datapoint.experiment_elapsed_time
+        # If a chart has been registered to the device, update it.
+        if device in self._charts and device not in self._chart_refreshes:
+            # charts are refreshed at most PLOT_REFRESH_RATE times per second
+            delay = self._chart_refreshed.get(device, 0) + 1 / PLOT_REFRESH_RATE
+            self._chart_refreshes[device] = asyncio.get_running_loop().call_at(
+                max(delay, asyncio.get_running_loop().time()),
+                self._refresh_chart,
+                device,
+            )
+
+    def _refresh_chart(self, device: str) -> None:
+        """Streams the new datapoints of a sensor to its chart and updates the decimated history."""
+        self._chart_refreshes.pop(device, None)
+        self._chart_refreshed[device] = asyncio.get_running_loop().time()
+        target, live, history = self._charts[device]
+
+        columns = self.data[device].to_numpy()
+        streamed = self._chart_streamed.get(device, 0)
+        live.data_source.stream(
+            {
+                "datapoints": columns["data"][streamed:],
+                "timestamps": columns["experiment_elapsed_time"][streamed:],
+            },
+            rollover=PLOT_ROLLOVER,
+        )
+        self._chart_streamed[device] = len(columns["data"])
+
+        # only numeric data can be decimated
+        if len(columns["data"]) > PLOT_ROLLOVER and columns["data"].dtype != object:
+            timestamps, datapoints = min_max_decimate(
+                columns["experiment_elapsed_time"], columns["data"], PLOT_HISTORY_BINS
             )
-            r.data_source.data["datapoints"] = self._transformed_data[device][
-                "datapoints"
-            ]
-            r.data_source.data["timestamps"] = self._transformed_data[device][
-                "timestamps"
-            ]
-            push_notebook(handle=target)
+            history.data_source.data = {
+                "datapoints": datapoints,
+                "timestamps": timestamps,
+            }
+        push_notebook(handle=target)
+
+    def _init_signals(self) -> None:
+        """
+        Creates the events used to signal cancellation, pause and end of the experiment.
+
+        Must be called from within the event loop executing the protocol, i.e. at the beginning of `main()`.
+        The events reflect any state change that happened before the loop was started.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._cancel_event = asyncio.Event()
+        self._pause_event = asyncio.Event()
+        self._resume_event = asyncio.Event()
+        self._end_event = asyncio.Event()
+
+        if self._cancelled:
+            self._cancel_event.set()
+        if not self._paused:
+            self._resume_event.set()
+        if self._ended:
+            self._end_event.set()
+
+    def _signal(self, event: Optional[asyncio.Event], value: bool = True) -> None:
+        """Sets (or clears) an event, safely from any thread. No-op before `_init_signals()`."""
+        if event is None or self._loop is None:
+            return
+
+        action = event.set if value else event.clear
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if running_loop is self._loop:
+            action()
+        elif not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(action)
+
+    @property
+    def _components(self) -> List[ActiveComponent]:
+        """The components used by the protocol, i.e. with at least one compiled procedure."""
+        return [
+            component
+            for component, procedures in self._compiled_protocol.items()
+            if procedures
+        ]
+
+    def _log_filter(self, record) -> bool:
+        """Excludes the log records bound to other experiments, see `execute_protocols()`."""
+        return (
+            record["extra"].get("experiment", self.experiment_id) == self.experiment_id
+        )
 
     def _on_stop_clicked(self, b):
         logger.debug("Stop button pressed.")
@@ -187,6 +298,72 @@ class Experiment(object):
                 duration += pause["stop"] - pause["start"]
         return duration
 
+    def actuation_skew(self) -> Dict[str, Dict[str, float]]:
+        """
+        Summarizes the timing accuracy of the executed procedures.
+
+        Returns:
+        - A dict with the `min`, `mean` and `max` (in seconds) of the `dispatch_delay`, i.e. dispatch time minus
+        scheduled time, and of the `ack_latency`, i.e. hardware acknowledgment time minus dispatch time.
+        """
+        delays = {
+            "dispatch_delay": [
+                p["dispatch_time"] - p["scheduled_time"]  # type: ignore
+                for p in self.executed_procedures
+            ],
+            "ack_latency": [
+                p["ack_time"] - p["dispatch_time"]  # type: ignore
+                for p in self.executed_procedures
+            ],
+        }
+
+        return {
+            name: dict(min=min(values), mean=sum(values) / len(values), max=max(values))
+            for name, values in delays.items()
+            if values
+        }
+
+    def sampling_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Summarizes the sampling of each sensor, e.g. to compare the achieved rate with the requested one.
+
+        Returns:
+        - A dict with, for each sensor name, the summary described in `SamplingStats.summary()`.
+        """
+        return {name: stats.summary() for name, stats in self._sampling_stats.items()}
+
+    def query(
+        self,
+        device: str,
+        start: Optional[float] = None,
+        stop: Optional[float] = None,
+        max_points: Optional[int] = None,
+        method: str = "lttb",
+    ) -> pd.DataFrame:
+        """
+        Returns the data of a sensor in a time window, optionally downsampled.
+
+        Arguments:
+        - `device`: The name of the sensor.
+        - `start`: If given, the experiment elapsed time, in seconds, from which to return the data.
+        - `stop`: If given, the experiment elapsed time, in seconds, up to which to return the data (inclusive).
+        - `max_points`: If given, the maximum number of datapoints to return. Larger windows are downsampled,
+        preserving the shape of the data.
+        - `method`: How to downsample the data, either "lttb" (Largest-Triangle-Three-Buckets, the default) or "minmax"
+        (the minimum and maximum of each bucket of datapoints, i.e. preserving all the peaks).
+
+        Returns:
+        - A DataFrame with `timestamp`, `experiment_elapsed_time` and `data` columns.
+
+        Raises:
+        - `KeyError`: If the device is not a sensor of the experiment.
+        - `ValueError`: If the downsampling method is not valid.
+        """
+        if device not in self._sensor_names:
+            raise KeyError(f"{device} is not a sensor of {self}.")
+        data = self.data.get(device, SensorData(capacity=0))
+        return pd.DataFrame(data.query(start, stop, max_points, method), copy=False)
+
     def get_confirmation(self):
         """Ensure user input is present before starting procedure."""
         confirmation = input("Execute? [y/N]: ").lower()
@@ -196,7 +373,7 @@ class Experiment(object):
 
     def _execute(
         self,
-        dry_run: Union[bool, int],
+        dry_run: Union[bool, int, str],
         verbosity: str,
         confirm: bool,
         strict: bool,
@@ -204,20 +381,152 @@ class Experiment(object):
         log_file_verbosity: Optional[str],
         log_file_compression: Optional[str],
         data_file: Union[str, bool, os.PathLike, None],
+        data_format: str = "jsonl",
+        fsync: str = "close",
     ):
-        self.dry_run = dry_run
+        # make the user confirm if it's the real deal
+        if not dry_run and not confirm:
+            self.get_confirmation()
+
+        self._setup(
+            dry_run=dry_run,
+            verbosity=verbosity,
+            log_file=log_file,
+            log_file_verbosity=log_file_verbosity,
+            log_file_compression=log_file_compression,
+            data_file=data_file,
+            data_format=data_format,
+            fsync=fsync,
+        )
+        self._run(verbosity=verbosity, strict=strict)
 
+    def _resume(
+        self,
+        experiment_id: str,
+        dry_run: Union[bool, int, str],
+        verbosity: str,
+        confirm: bool,
+        strict: bool,
+        log_file: Union[str, bool, os.PathLike, None],
+        log_file_verbosity: Optional[str],
+        log_file_compression: Optional[str],
+        data_file: Union[str, bool, os.PathLike, None],
+        data_format: str = "jsonl",
+        fsync: str = "close",
+    ):
+        """Resumes an interrupted execution from its journal, see `Protocol.resume()`."""
         # make the user confirm if it's the real deal
-        if not self.dry_run and not confirm:
+        if not dry_run and not confirm:
             self.get_confirmation()
 
+        self._setup(
+            dry_run=dry_run,
+            verbosity=verbosity,
+            log_file=log_file,
+            log_file_verbosity=log_file_verbosity,
+            log_file_compression=log_file_compression,
+            data_file=data_file,
+            data_format=data_format,
+            fsync=fsync,
+            experiment_id=experiment_id,
+        )
+        if self._journal is None or not self._journal.path.exists():
+            raise FileNotFoundError(f"No journal found for {self}.")
+
+        checkpoint = self._journal.checkpoint()
+        if checkpoint.experiment_id != experiment_id:
+            raise ValueError(
+                f"The journal {self._journal.path} is of experiment {checkpoint.experiment_id}, not {experiment_id}."
+            )
+        if checkpoint.status == "completed":
+            raise ValueError(f"{self} was already completed.")
+        self._checkpoint = checkpoint
+
+        # rebuild the state of the experiment at the time of the interruption
+        for record in checkpoint.executed_procedures:
+            record["component"] = self.graph[record["component"]]
+            self.executed_procedures.append(record)
+        # the data recorded after the checkpoint is dropped, as that part of the protocol is executed again
+        if isinstance(self._data_writer, ChunkedDataWriter):
+            if self._data_writer.index_path.exists():
+                kept = truncate_chunked_data(self._data_file, checkpoint.elapsed_time)  # type: ignore
+                for device, df in kept.items():
+                    for point in df.itertuples(index=False):
+                        self.data.setdefault(device, SensorData()).append(
+                            Datapoint(
+                                data=point.data,
+                                timestamp=point.timestamp,
+                                experiment_elapsed_time=point.experiment_elapsed_time,
+                            )
+                        )
+        elif self._data_file is not None and self._data_file.exists():
+            for point in truncate_jsonl_data(self._data_file, checkpoint.elapsed_time):
+                self.data.setdefault(point["device"], SensorData()).append(
+                    Datapoint(
+                        data=point["data"],
+                        timestamp=point["timestamp"],
+                        experiment_elapsed_time=point["experiment_elapsed_time"],
+                    )
+                )
+        logger.info(
+            f"Resuming {self} from {checkpoint.elapsed_time}s, "
+            f"{len(checkpoint.confirmed)} procedures already executed."
+        )
+
+        self._run(verbosity=verbosity, strict=strict)
+
+    def _run(self, verbosity: str, strict: bool):
+        if self.dry_run == "virtual":
+            simulate(experiments=[self], strict=strict)
+        elif get_ipython():
+            self._display(verbosity=verbosity.upper(), strict=strict)
+            asyncio.ensure_future(
+                main(experiment=self, dry_run=self.dry_run, strict=strict)
+            )
+        else:
+            asyncio.run(main(experiment=self, dry_run=self.dry_run, strict=strict))
+
+    def _setup(
+        self,
+        dry_run: Union[bool, int, str],
+        verbosity: str,
+        log_file: Union[str, bool, os.PathLike, None],
+        log_file_verbosity: Optional[str],
+        log_file_compression: Optional[str],
+        data_file: Union[str, bool, os.PathLike, None],
+        data_format: str = "jsonl",
+        fsync: str = "close",
+        experiment_id: Optional[str] = None,
+    ):
+        """
+        Compiles the protocol and prepares log, data and journal files, see `Protocol.execute()` for the arguments.
+
+        The `experiment_id` is only given when resuming an experiment, in which case it must match the protocol.
+        """
+        if data_format not in DATA_FORMATS:
+            raise ValueError(
+                f"Invalid data format {data_format!r}. "
+                f"Expected one of {', '.join(DATA_FORMATS)}."
+            )
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(
+                f"Invalid fsync policy {fsync!r}. "
+                f"Expected one of {', '.join(FSYNC_POLICIES)}."
+            )
+        self.dry_run = dry_run
+
         self._compiled_protocol = self.protocol._compile(dry_run=bool(dry_run))
 
         # now that we're ready to start, create the time and ID attributes
         protocol_hash: str = blake2b(
             str(self.protocol.yaml()).encode(), digest_size=3
         ).hexdigest()
-        self.experiment_id = f"{self._created_time_local}_{protocol_hash}"
+        if experiment_id is None:
+            self.experiment_id = f"{self._created_time_local}_{protocol_hash}"
+        elif experiment_id.rsplit("_", 1)[-1] == protocol_hash:
+            self.experiment_id = experiment_id
+        else:
+            raise ValueError(f"Experiment {experiment_id} is not from this protocol.")
 
         # handle logging to a file, not None nor False
         if log_file:
@@ -243,6 +552,7 @@ class Experiment(object):
                 compression=log_file_compression,
                 serialize=True,
                 enqueue=True,
+                filter=self._log_filter,
             )
             logger.trace(f"File logger ID is {self._file_logger_id}")
 
@@ -260,7 +570,9 @@ class Experiment(object):
             if data_file is True:
                 app_path = Path("~/.flowchem").expanduser()
                 app_path.mkdir(exist_ok=True)
-                self._data_file = app_path / Path(self.experiment_id + ".data.jsonl")
+                self._data_file = app_path / Path(
+                    self.experiment_id + DATA_FORMATS[data_format]
+                )
             elif isinstance(data_file, (str, os.PathLike)):
                 self._data_file = Path(data_file)
             else:
@@ -269,11 +581,25 @@ class Experiment(object):
                     "Expected str or a pathlib.Path object."
                 )
 
-        if get_ipython():
-            self._display(verbosity=verbosity.upper(), strict=strict)
-            asyncio.ensure_future(main(experiment=self, dry_run=dry_run, strict=strict))
-        else:
-            asyncio.run(main(experiment=self, dry_run=dry_run, strict=strict))
+            if data_format == "binary":
+                self._data_writer = ChunkedDataWriter(self._data_file, fsync=fsync)
+            else:
+                self._data_writer = DataWriter(self._data_file, fsync=fsync)
+            # all the data is written, even if acquisition has to wait for it
+            self.stream.subscribe(
+                self._write_datapoint, maxsize=10_000, overflow="block"
+            )
+
+            # the journal lives next to the data, named after the experiment to find it when resuming
+            self._journal = ExecutionJournal(
+                self._data_file.parent / f"{self.experiment_id}.journal.jsonl",
+                fsync=fsync,
+            )
+
+        # live plots are only shown in Jupyter for experiments executed in real time
+        if get_ipython() is not None and dry_run != "virtual":
+            # the charts are fed from the stored data, they only need to know which sensor has new data
+            self.stream.subscribe(self._plot, overflow="coalesce")
 
     def _display(self, verbosity: str, strict: bool):
 
@@ -349,7 +675,9 @@ class Experiment(object):
                 pad_length = max((pad_length, len("cleanup")))
 
                 if self.is_executing and not self.was_executed:
-                    elapsed_time = f"{time.time() - self.start_time:0{pad_length}.3f}"
+                    elapsed_time = (
+                        f"{self._clock.time() - self.start_time:0{pad_length}.3f}"
+                    )
                     print(f"({elapsed_time}) {x.rstrip()}")
                 elif self.was_executed:
                     print(f"({'cleanup'.center(pad_length)}) {x.rstrip()}")
@@ -362,6 +690,7 @@ class Experiment(object):
             level=verbosity,
             colorize=True,
             format="{level.icon} {message}",
+            filter=self._log_filter,
         )  # type: ignore
 
         display(self._output_widget)
@@ -381,6 +710,9 @@ class Experiment(object):
             self._log_file = None
             self._file_logger_id = None
         if not is_executing and self._data_file:
+            # write the data still buffered
+            self._data_writer.close()  # type: ignore
+            self._journal.close()  # type: ignore
             logger.info("Wrote data to " + str(self._data_file.absolute()))
             logger._data_file = None
 
@@ -392,6 +724,25 @@ class Experiment(object):
         logger.trace(f"{repr(self)}.is_executing is now {is_executing}")
         self._is_executing = is_executing
 
+    @property
+    def _end_loop(self) -> bool:
+        """Whether the experiment has reached its end, i.e. monitoring loops should stop."""
+        return self._ended
+
+    @_end_loop.setter
+    def _end_loop(self, end_loop: bool):
+        self._ended = end_loop
+        self._signal(self._end_event, end_loop)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    @cancelled.setter
+    def cancelled(self, cancelled: bool):
+        self._cancelled = cancelled
+        self._signal(self._cancel_event, cancelled)
+
     @property
     def paused(self):
         return self._paused
@@ -409,13 +760,20 @@ class Experiment(object):
 
         if paused and not self._paused:
             logger.warning("Paused execution.")
-            self._pause_times.append(dict(start=time.time()))
+            self._pause_times.append(dict(start=self._clock.time()))
         elif not paused and self._paused:
-            self._pause_times[-1]["stop"] = time.time()
+            self._pause_times[-1]["stop"] = self._clock.time()
             logger.warning("Resumed execution.")
+
+        changed = paused != self._paused
         self._paused = paused
+        self._signal(self._resume_event, not paused)
+        if changed:
+            self._signal(self._pause_event)
 
-        # control the pause button
+        # control the pause button, only present in Jupyter
+        if not hasattr(self, "_pause_button"):
+            return
         self._pause_button.description = "Resume" if paused else "Pause"
         self._pause_button.button_style = "success" if paused else ""
         self._pause_button.icon = "play" if paused else "pause"
@@ -0,0 +1,135 @@
+""" Crash-safe journal of the protocol execution, used to resume interrupted experiments. """
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import IO, Any, Dict, List, Optional, Set, Tuple, Union
+
+from loguru import logger
+
+from flowchem.core.data_writer import FSYNC_POLICIES
+
+
+class ExecutionJournal:
+    """
+    An append-only journal of the procedures dispatched to and confirmed by the components.
+
+    The file is kept open for the whole execution, and each event is written as a line of JSON and flushed to the OS
+    before the execution proceeds, so that the journal survives a crash of the Python process (but for, at most, the
+    line being written). Syncing to disk, i.e. surviving a crash of the OS, follows the `fsync` policy.
+
+    Arguments:
+    - `path`: The location of the journal file, typically `~/.flowchem/{experiment_id}.journal.jsonl`.
+    - `fsync`: When to sync the file to disk. One of "never" (left to the OS), "flush" (after every event, the
+      safest but slowest) or "close" (when the execution ends).
+
+    Raises:
+    - `ValueError`: If the fsync policy is not valid.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike], fsync: str = "close"):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(
+                f"Invalid fsync policy {fsync!r}. Expected one of {', '.join(FSYNC_POLICIES)}."
+            )
+        self.path = Path(path)
+        self.fsync = fsync
+        self._file: Optional[IO[str]] = None
+
+    def _append(self, event: str, **kwargs) -> None:
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps(dict(event=event, **kwargs), default=str) + "\n")
+        self._file.flush()
+        if self.fsync == "flush":
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        """Closes the journal file, syncing it to disk unless the fsync policy is "never". Safe to call twice."""
+        if self._file is None:
+            return
+        if self.fsync != "never":
+            os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+
+    def start(self, experiment_id: str, start_time: float) -> None:
+        self._append("start", experiment_id=experiment_id, start_time=start_time)
+
+    def resume(self, elapsed_time: float, start_time: float) -> None:
+        self._append("resume", elapsed_time=elapsed_time, start_time=start_time)
+
+    def dispatch(self, component: str, index: int, time: float) -> None:
+        self._append("dispatch", component=component, index=index, time=time)
+
+    def confirm(self, component: str, index: int, time: float, record: dict) -> None:
+        self._append(
+            "confirm",
+            component=component,
+            index=index,
+            time=time,
+            record={k: v for k, v in record.items() if k != "component"},
+        )
+
+    def end(self, status: str, end_time: float) -> None:
+        self._append("end", status=status, end_time=end_time)
+        self.close()
+
+    def read(self) -> List[Dict[str, Any]]:
+        """
+        Reads back the journal's events, in order.
+
+        A truncated last line, i.e. a crash while writing it, is ignored.
+        """
+        events = []
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    events.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning(f"Ignoring corrupted line in {self.path}: {line!r}")
+        return events
+
+    def checkpoint(self) -> "Checkpoint":
+        """
+        Summarizes the journal into the state needed to resume the execution, see `Checkpoint`.
+
+        Only the events since the last "start" are taken into account, i.e. those of the last execution from scratch.
+        """
+        checkpoint = Checkpoint()
+        for event in self.read():
+            if event["event"] == "start":
+                checkpoint = Checkpoint()
+                checkpoint.experiment_id = event["experiment_id"]
+            elif event["event"] == "confirm":
+                checkpoint.confirmed.add((event["component"], event["index"]))
+                checkpoint.elapsed_time = max(checkpoint.elapsed_time, event["time"])
+                checkpoint.executed_procedures.append(
+                    dict(event["record"], component=event["component"])
+                )
+            elif event["event"] == "end":
+                checkpoint.status = event["status"]
+            elif event["event"] == "resume":
+                checkpoint.status = None
+        return checkpoint
+
+
+class Checkpoint:
+    """
+    The state of an execution, as recorded by an `ExecutionJournal`.
+
+    Attributes:
+    - `experiment_id`: The ID of the experiment journaled.
+    - `confirmed`: The (component name, procedure index) of the compiled procedures confirmed by the components.
+    - `elapsed_time`: The protocol time, in seconds, of the last confirmed procedure, i.e. where to resume from.
+    - `executed_procedures`: The records of the confirmed procedures, with components by name.
+    - `status`: How the execution ended ("completed", "cancelled" or "failed"), None if it was interrupted.
+    """
+
+    def __init__(self):
+        self.experiment_id: Optional[str] = None
+        self.confirmed: Set[Tuple[str, int]] = set()
+        self.elapsed_time: float = 0.0
+        self.executed_procedures: List[Dict[str, Any]] = []
+        self.status: Optional[str] = None
@@ -1,11 +1,23 @@
 import json
+import math
 from copy import deepcopy
 from datetime import timedelta
 from math import isclose
 from os import PathLike
-from typing import Any, Dict, Iterable, List, MutableMapping, Optional, Union
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    MutableMapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
 import altair as alt
+import numpy as np
 import pandas as pd
 import yaml
 from IPython import get_ipython
@@ -19,7 +31,32 @@ from flowchem.components.properties import (
 )
 from flowchem.core.experiment import Experiment
 from flowchem.core.graph.devicegraph import DeviceGraph
-from flowchem.units import flowchem_ureg
+from flowchem.units import flowchem_ureg, parse_dimensionality, parse_quantity
+from flowchem.utils.intervals import IntervalIndex
+
+
+def _same_value(component: ActiveComponent, attribute: str, a: Any, b: Any) -> bool:
+    """Whether two values for a component attribute are equivalent, e.g. "1 mL/min" and "1 ml/min"."""
+    if isinstance(getattr(component, attribute), flowchem_ureg.Quantity):
+        return parse_quantity(a) == parse_quantity(b)
+    return a == b
+
+
+def _parse_time(time: Union[str, timedelta]):
+    """Parses a time, such as "5 min" or a `datetime.timedelta`, into a `pint.Quantity`."""
+    if isinstance(time, timedelta):
+        time = str(time.total_seconds()) + " seconds"
+    return parse_quantity(time)
+
+
+def _fingerprint(procedure: Dict[str, Any]) -> Tuple:
+    """What defines a procedure, to detect changes to the procedures of a protocol."""
+    return (
+        id(procedure),
+        procedure["start"],
+        procedure["stop"],
+        tuple(procedure["params"].items()),
+    )
 
 
 class Protocol:
@@ -78,6 +115,39 @@ class Protocol:
             Dict[str, Union[float, None, ActiveComponent, Dict[str, Any]]]
         ] = []
 
+        # the procedures by component, and their fingerprints, see _index_procedures()
+        self._procedures_by_component: Dict[ActiveComponent, List[Dict[str, Any]]] = {}
+        self._fingerprints: Dict[ActiveComponent, List[Tuple]] = {}
+        # bumped whenever the procedures of a component change, to invalidate its compiled procedures
+        self._versions: Dict[ActiveComponent, int] = {}
+        # by component and visualization flag, the version and base state compiled, and the compiled procedures
+        self._compile_cache: Dict[
+            Tuple[ActiveComponent, bool], Tuple[Tuple[int, Dict[str, Any]], List]
+        ] = {}
+        # by component, the version indexed and the interval index of its procedures, see scheduled()
+        self._interval_indexes: Dict[ActiveComponent, Tuple[int, IntervalIndex]] = {}
+
+    def _index_procedures(self) -> None:
+        """
+        Indexes the procedures by component, bumping the version of the components whose procedures changed.
+
+        The procedures are compared with those indexed last time, so any change made to `procedures` is picked up,
+        be it through `add()` or directly, e.g. removing a procedure or editing its params in place.
+        """
+        by_component: Dict[ActiveComponent, List[Dict[str, Any]]] = {}
+        for procedure in self.procedures:
+            by_component.setdefault(procedure["component"], []).append(procedure)  # type: ignore
+        fingerprints = {
+            component: [_fingerprint(procedure) for procedure in procedures]
+            for component, procedures in by_component.items()
+        }
+
+        for component in fingerprints.keys() | self._fingerprints.keys():
+            if fingerprints.get(component) != self._fingerprints.get(component):
+                self._versions[component] = self._versions.get(component, 0) + 1
+        self._procedures_by_component = by_component
+        self._fingerprints = fingerprints
+
     def __repr__(self):
         return f"<{self.__str__()}>"
 
@@ -103,7 +173,7 @@ class Protocol:
             # for kwargs that will be converted later, just check that the units match
             if isinstance(component.__dict__[kwarg], flowchem_ureg.Quantity):
                 try:
-                    value_dim = flowchem_ureg.parse_expression(value).dimensionality
+                    value_dim = parse_dimensionality(value)
                 except AttributeError:
                     value_dim = type(value)
                 kwarg_dim = component.__dict__[kwarg].dimensionality
@@ -122,58 +192,90 @@ class Protocol:
                 msg += f"{repr(value)}, which is of type {type(value)}."
                 raise ValueError(msg)
 
-    def _add_single(
-        self,
-        component: ActiveComponent,
-        start: Union[str, timedelta],
-        stop=None,
-        duration=None,
-        **kwargs,
-    ) -> None:
-        """Adds a single procedure to the protocol.
-
-        See add() for full documentation.
+    def _check_params(
+        self, component: ActiveComponent, params: Dict[str, Any]
+    ) -> Dict[str, Any]:
         """
+        Checks the params of a procedure for a component of the graph, see `add()`.
 
-        # make sure that the component being added is part of the apparatus
-        assert component in self.graph, f"{component} must be part of the apparatus."
-
+        Returns:
+        - The params, completed with the implicit ones, e.g. `active` for temperature controllers given a `temp`.
+        """
         # don't let users give empty procedures
-        if not kwargs:
+        if not params:
             raise RuntimeError(
                 "No kwargs supplied. "
                 "This will not manipulate the state of your synthesizer. "
                 "Ensure your call to add() is valid."
             )
 
+        self._check_values(component, params)
+        return self._complete_params(component, params)
+
+    def _check_values(self, component: ActiveComponent, params: Dict[str, Any]) -> None:
+        """Checks each of the values of params for a component, on their own."""
         # FIXME procedures are XDLexe like, the actual valve position should be passed directly, resolve before!
         # If a MultiportComponentMixin component is passed together with a new port position, check validity
-        if isinstance(component, MultiportComponentMixin) and "setting" in kwargs:
-            if isinstance(kwargs["setting"], Component):
-                assert self.graph.graph.has_edge(component, kwargs["setting"])
+        if isinstance(component, MultiportComponentMixin) and "setting" in params:
+            if isinstance(params["setting"], Component):
+                assert self.graph.graph.has_edge(component, params["setting"])
                 assert (
-                    self.graph.graph[component][kwargs["setting"]][0]["from_port"]
+                    self.graph.graph[component][params["setting"]][0]["from_port"]
                     in component.port
                 )
-            if isinstance(kwargs["setting"], str):
-                to_component = self.graph[kwargs["setting"]]
+            if isinstance(params["setting"], str):
+                to_component = self.graph[params["setting"]]
                 assert self.graph.graph.has_edge(component, to_component)
                 assert (
                     self.graph.graph[component][to_component]["from_port"]
                     in component.port
                 )
-            if isinstance(kwargs["setting"], int):
-                assert kwargs["setting"] in component.port
+            if isinstance(params["setting"], int):
+                assert params["setting"] in component.port
 
         # make sure the component and keywords are valid
-        self._check_component_kwargs(component, **kwargs)
+        self._check_component_kwargs(component, **params)
+
+    @staticmethod
+    def _complete_params(
+        component: ActiveComponent, params: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Adds the params implied by the others, see `_check_params()`."""
+        # a little magic for temperature controllers
+        if isinstance(component, TempControl):
+            if params.get("temp") is not None and params.get("active") is None:
+                params["active"] = True
+            elif not params.get("active") and params.get("temp") is None:
+                params["temp"] = "0 degC"
+            elif params["active"] and params.get("temp") is None:
+                raise RuntimeError(
+                    f"TempControl {component} is activated but temperature "
+                    "setting is not given. Specify 'temp' in your call to add()."
+                )
+
+        return params
+
+    def _add_single(
+        self,
+        component: ActiveComponent,
+        start: Union[str, timedelta],
+        stop=None,
+        duration=None,
+        **kwargs,
+    ) -> None:
+        """Adds a single procedure to the protocol.
+
+        See add() for full documentation.
+        """
+
+        # make sure that the component being added is part of the apparatus
+        assert component in self.graph, f"{component} must be part of the apparatus."
+        kwargs = self._check_params(component, kwargs)
 
         # parse the start time
         if start is None:
             start = "0 secs"
-        if isinstance(start, timedelta):
-            start = str(start.total_seconds()) + " seconds"
-        start_time = flowchem_ureg.parse_expression(start)
+        start_time = _parse_time(start)
 
         # Stop or duration
         if stop is not None and duration is not None:
@@ -181,31 +283,15 @@ class Protocol:
 
         # Parse duration
         if duration is not None:
-            if isinstance(duration, timedelta):
-                duration = str(duration.total_seconds()) + " seconds"
-            stop_time = start_time + flowchem_ureg.parse_expression(duration)
+            stop_time = start_time + _parse_time(duration)
         # Parse stop
         else:
             assert stop is not None
-            if isinstance(stop, timedelta):
-                stop = str(stop.total_seconds()) + " seconds"
-            stop_time = flowchem_ureg.parse_expression(stop)
+            stop_time = _parse_time(stop)
 
         if start_time > stop_time:
             raise ValueError("Procedure beginning is after procedure end.")
 
-        # a little magic for temperature controllers
-        if isinstance(component, TempControl):
-            if kwargs.get("temp") is not None and kwargs.get("active") is None:
-                kwargs["active"] = True
-            elif not kwargs.get("active") and kwargs.get("temp") is None:
-                kwargs["temp"] = "0 degC"
-            elif kwargs["active"] and kwargs.get("temp") is None:
-                raise RuntimeError(
-                    f"TempControl {component} is activated but temperature "
-                    "setting is not given. Specify 'temp' in your call to add()."
-                )
-
         # add the procedure to the procedure list
         self.procedures.append(
             dict(
@@ -254,6 +340,224 @@ class Protocol:
                 component, start=start, stop=stop, duration=duration, **kwargs
             )
 
+    def add_many(
+        self,
+        component: ActiveComponent,
+        start: Union[Sequence[float], np.ndarray],
+        stop=None,
+        duration=None,
+        **kwargs,
+    ) -> None:
+        """
+        Adds a sequence of procedures to a component, each lasting until the next one starts, e.g. a gradient.
+
+        Unlike calling `add()` for each step, the values are validated once per distinct value (once in all for the
+        values given as a `pint.Quantity` array, which are kept as quantities in the params) and the times are computed
+        with NumPy, so that protocols with thousands of steps are built quickly.
+
+        Arguments:
+        - `component`: The component for which the procedures are being added.
+        - `start`: The start times of the procedures, in seconds relative to the start of the protocol, in increasing
+        order. May be a NumPy array.
+        - `stop`: The stop time of the last procedure, such as `"30 minutes"`. May also be a `datetime.timedelta`. May
+        not be given if `duration` is used.
+        - `duration`: The duration of the last procedure, such as `"1 minute"`. May not be used if `stop` is used.
+        - `**kwargs`: For each attribute, the values of the procedures, as a sequence with one value per start time.
+        The values of attributes with units may also be given as a `pint.Quantity` array, e.g.
+        `flowchem_ureg.Quantity(np.linspace(0, 5, 100), "mL/min")`.
+
+        Raises:
+        - `ValueError`: If the start times or the values are invalid, see also `add()`.
+        - `RuntimeError`: If the stop time cannot be determined.
+        """
+        starts = np.asarray(start, dtype=float)
+        if starts.ndim != 1 or not len(starts):
+            raise ValueError("The start times must be a non-empty sequence.")
+        if starts[0] < 0 or np.any(np.diff(starts) <= 0):
+            raise ValueError("The start times must be positive and increasing.")
+
+        # make sure that the component being added is part of the apparatus
+        assert component in self.graph, f"{component} must be part of the apparatus."
+        if not kwargs:
+            # no kwargs, which is not a valid procedure
+            self._check_params(component, {})
+
+        # the values by attribute, checked once per distinct value (once in all for a quantity array)
+        values: Dict[str, List[Any]] = {}
+        for kwarg, value in kwargs.items():
+            if isinstance(value, flowchem_ureg.Quantity):
+                # kept as quantities, rather than formatted and parsed again for every step
+                value = [
+                    flowchem_ureg.Quantity(m, value.units)
+                    for m in np.ravel(value.magnitude).tolist()
+                ]
+                distinct = value[:1]
+            else:
+                value = list(value)
+                try:
+                    distinct = list(dict.fromkeys(value))
+                except TypeError:  # unhashable values
+                    distinct = value
+            if len(value) != len(starts):
+                raise ValueError(
+                    f"Got {len(value)} values of {kwarg} for {len(starts)} start times."
+                )
+            for v in distinct:
+                self._check_values(component, {kwarg: v})
+            values[kwarg] = value
+
+        steps = [
+            self._complete_params(component, dict(zip(values, step_values)))
+            for step_values in zip(*values.values())
+        ]
+
+        # Stop or duration of the last procedure
+        if stop is not None and duration is not None:
+            raise RuntimeError("Must provide one of stop and duration, not both.")
+        if duration is not None:
+            last_stop = starts[-1] + _parse_time(duration).m_as("second")
+        elif stop is not None:
+            last_stop = _parse_time(stop).m_as("second")
+        else:
+            raise RuntimeError("Must provide one of stop and duration.")
+        if last_stop < starts[-1]:
+            raise ValueError("Procedure beginning is after procedure end.")
+        stops = np.append(starts[1:], last_stop)
+
+        for step_start, step_stop, params in zip(
+            starts.tolist(), stops.tolist(), steps
+        ):
+            self.procedures.append(
+                dict(
+                    start=step_start, stop=step_stop, component=component, params=params
+                )
+            )
+
+    def add_ramp(
+        self,
+        component: ActiveComponent,
+        start=None,
+        stop=None,
+        duration=None,
+        step=None,
+        steps: Optional[int] = None,
+        **kwargs,
+    ) -> None:
+        """
+        Adds a linear ramp of one or more attributes of a component, as a sequence of procedures (see `add_many()`).
+
+        The ramp is divided into steps, either of length `step` (the last one may be shorter) or into `steps` steps of
+        equal length. The values are interpolated linearly from the first value, for the first step, to the last value,
+        for the last step.
+
+        For example, `P.add_ramp(pump, start="0 min", duration="10 min", step="30 s", rate=("0 mL/min", "5 mL/min"))`.
+
+        Arguments:
+        - `component`: The component for which the ramp is being added.
+        - `start`: The start time of the ramp, see `add()`. Defaults to the beginning of the protocol.
+        - `stop`: The stop time of the ramp, see `add()`. May not be given if `duration` is used.
+        - `duration`: The duration of the ramp, see `add()`. May not be used if `stop` is used.
+        - `step`: The length of each step, such as `"10 seconds"`. May not be given if `steps` is used.
+        - `steps`: The number of steps. May not be given if `step` is used.
+        - `**kwargs`: For each attribute, a `(first, last)` tuple of values with units, such as
+        `("20 degC", "80 degC")`.
+
+        Raises:
+        - `ValueError`: If the ramp is invalid, e.g. a value without units.
+        - `RuntimeError`: If the stop time or the steps cannot be determined.
+        """
+        start_time = _parse_time("0 seconds" if start is None else start)
+        if stop is not None and duration is not None:
+            raise RuntimeError("Must provide one of stop and duration, not both.")
+        if duration is not None:
+            stop_time = start_time + _parse_time(duration)
+        elif stop is not None:
+            stop_time = _parse_time(stop)
+        else:
+            raise RuntimeError("Must provide one of stop and duration.")
+        first, last = start_time.m_as("second"), stop_time.m_as("second")
+        if first >= last:
+            raise ValueError("Ramp beginning is not before ramp end.")
+
+        if (step is None) == (steps is None):
+            raise RuntimeError("Must provide one of step and steps.")
+        if steps is not None:
+            if steps < 1:
+                raise ValueError("A ramp must have at least one step.")
+            starts = np.linspace(first, last, steps, endpoint=False)
+        else:
+            step_length = _parse_time(step).m_as("second")
+            if step_length <= 0:
+                raise ValueError("The step of a ramp must be positive.")
+            # the number of steps, the last one being shorter unless the ramp is (about) a multiple of the step
+            count = (last - first) / step_length
+            count = round(count) if isclose(count, round(count)) else math.ceil(count)
+            starts = first + np.arange(count) * step_length
+
+        values = {}
+        for kwarg, (from_value, to_value) in kwargs.items():
+            from_quantity = parse_quantity(from_value)
+            unit = from_quantity.units
+            values[kwarg] = flowchem_ureg.Quantity(
+                np.linspace(
+                    from_quantity.magnitude,
+                    parse_quantity(to_value).m_as(unit),
+                    len(starts),
+                ),
+                unit,
+            )
+
+        self.add_many(component, starts, stop=f"{last} seconds", **values)
+
+    def scheduled(
+        self,
+        component: Union[ActiveComponent, str],
+        start: Union[str, timedelta, float, None] = None,
+        stop: Union[str, timedelta, float, None] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Returns the procedures of a component taking place in a time window, e.g. for editors.
+
+        Procedures are included if they are running at any time in the window, i.e. if they start before its end and
+        stop after its beginning. The procedures of each component are kept in an interval index, rebuilt only when
+        they change, so that queries are fast even for protocols with many procedures.
+
+        Arguments:
+        - `component`: The component, or its name.
+        - `start`: The beginning of the window, such as `"5 minutes"`. May also be a `datetime.timedelta` or a number
+        of seconds. Defaults to the beginning of the protocol.
+        - `stop`: The end of the window, as `start`. Defaults to the end of the protocol.
+
+        Returns:
+        - The procedures, as in `procedures`, in order of start.
+
+        Raises:
+        - `KeyError`: If the component is not part of the graph.
+        """
+        if isinstance(component, str):
+            component = self.graph[component]
+        elif component not in self.graph:
+            raise KeyError(f"{component} is not part of the apparatus.")
+
+        self._index_procedures()
+        version = self._versions.get(component, 0)  # type: ignore
+        cached = self._interval_indexes.get(component)  # type: ignore
+        if cached is None or cached[0] != version:
+            index = IntervalIndex(
+                (procedure["start"], procedure["stop"], procedure)
+                for procedure in self._procedures_by_component.get(component, [])  # type: ignore
+            )
+            self._interval_indexes[component] = cached = (version, index)  # type: ignore
+
+        def seconds(time, default: float) -> float:
+            if time is None:
+                return default
+            if isinstance(time, (int, float)):
+                return float(time)
+            return _parse_time(time).m_as("second")
+
+        return cached[1].query(seconds(start, -math.inf), seconds(stop, math.inf))
+
     @property
     def _inferred_duration(self):
         # infer the duration of the protocol
@@ -274,73 +578,152 @@ class Protocol:
         """
         Compile the protocol into a dict of devices and their procedures.
 
+        The procedures are compiled per component and cached, so only the components whose procedures (or base state,
+        or the device configuration their setpoints depend on) changed since the last call are validated and compiled
+        again.
+
         Returns:
         - A dict with components as keys and lists of their procedures as the value.
         The elements of the list of procedures are dicts with two keys:
             "time" in seconds
             "params", whose value is a dict of parameters for the procedure.
+        and, for components converting params into device-native values (see `ActiveComponent._native_setpoints()`),
+        a "setpoints" key.
+        Procedures of a component taking place at the same time are merged, and params that would not change the
+        state of the component are dropped (see `_coalesce()`).
 
         Raises:
         - `RuntimeError`: When compilation fails.
         """
         output = {}
+        self._index_procedures()
 
         # Only compile active components
         for component in self.graph[ActiveComponent]:
-            # determine the procedures for each component
-            component_procedures: List[MutableMapping] = sorted(
-                [x for x in self.procedures if x["component"] == component],
-                key=lambda x: x["start"],
+            # the compiled procedures are reused until the procedures, the base state of the component or, e.g. once
+            # the device is initialized, the configuration its setpoints depend on change
+            state = (
+                self._versions.get(component, 0),
+                dict(component._base_state),
+                component._setpoint_config(),
             )
+            cached = self._compile_cache.get((component, _visualization))
+            if cached is not None and cached[0] == state:
+                # the checks against the actual device are always repeated, as it may have changed since
+                if not dry_run:
+                    self._validate_component(component, dry_run)
+                compiled = cached[1]
+            else:
+                compiled = self._compile_component(component, dry_run, _visualization)
+                self._compile_cache[(component, _visualization)] = (state, compiled)
+
+            # copies, so that callers may modify them without affecting the cache
+            output[component] = [dict(procedure) for procedure in compiled]
 
-            # validate component
-            try:
-                component._validate(dry_run=dry_run)
-            except Exception as e:
-                raise RuntimeError(
-                    f"{component} isn't valid. Got error: '{str(e)}'."
-                ) from e
-
-            # Validates procedures for component
-            component.validate_procedures(component_procedures)
-
-            # give the component instructions at all times
-            compiled = []
-            for i, procedure in enumerate(component_procedures):
-                if _visualization:
-                    compiled.append(
-                        dict(
-                            start=procedure["start"],
-                            stop=procedure["stop"],
-                            params=procedure["params"],
-                        )
-                    )
-                else:
-                    compiled.append(
-                        dict(time=procedure["start"], params=procedure["params"])
+            # raise warning if duration is explicitly given but not used?
+        return output
+
+    @staticmethod
+    def _validate_component(component: ActiveComponent, dry_run: bool) -> None:
+        try:
+            component._validate(dry_run=dry_run)
+        except Exception as e:
+            raise RuntimeError(
+                f"{component} isn't valid. Got error: '{str(e)}'."
+            ) from e
+
+    def _compile_component(
+        self, component: ActiveComponent, dry_run: bool, _visualization: bool
+    ) -> List[Dict[str, Any]]:
+        """Compiles the procedures of a single component, see `_compile()`."""
+        # determine the procedures for the component
+        component_procedures: List[MutableMapping] = sorted(
+            self._procedures_by_component.get(component, []),
+            key=lambda x: x["start"],
+        )
+
+        # validate component
+        self._validate_component(component, dry_run)
+
+        # Validates procedures for component
+        component.validate_procedures(component_procedures)
+
+        # give the component instructions at all times
+        compiled = []
+        for i, procedure in enumerate(component_procedures):
+            if _visualization:
+                compiled.append(
+                    dict(
+                        start=procedure["start"],
+                        stop=procedure["stop"],
+                        params=procedure["params"],
                     )
+                )
+            else:
+                compiled.append(
+                    dict(time=procedure["start"], params=procedure["params"])
+                )
 
-                    # if the procedure is over at the same time as the next
-                    # procedure begins, don't go back to the base state
-                    try:
-                        if isclose(
-                            component_procedures[i + 1]["start"], procedure["stop"]
-                        ):
-                            continue
-                    except IndexError:
-                        pass
-
-                    # otherwise, go back to base state
-                    new_state = {
-                        "time": procedure["stop"],
-                        "params": component._base_state,
-                    }
-                    compiled.append(new_state)
-
-            output[component] = compiled
+                # if the procedure is over at the same time as the next
+                # procedure begins, don't go back to the base state
+                try:
+                    if isclose(component_procedures[i + 1]["start"], procedure["stop"]):
+                        continue
+                except IndexError:
+                    pass
+
+                # otherwise, go back to base state
+                new_state = {
+                    "time": procedure["stop"],
+                    "params": component._base_state,
+                }
+                compiled.append(new_state)
+
+        if not _visualization:
+            compiled = self._coalesce(component, compiled)
+            # convert the params into device-native setpoints once, rather than at each dispatch
+            for procedure in compiled:
+                try:
+                    setpoints = component._native_setpoints(procedure["params"])
+                except ValueError as e:
+                    raise RuntimeError(
+                        f"Invalid procedure for {component} at {procedure['time']} s. "
+                        f"Got error: '{str(e)}'."
+                    ) from e
+                if setpoints:
+                    procedure["setpoints"] = setpoints
+        return compiled
 
-            # raise warning if duration is explicitly given but not used?
-        return output
+    @staticmethod
+    def _coalesce(
+        component: ActiveComponent, compiled: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Reduces the compiled procedures of a component to the minimum number of updates.
+
+        Procedures taking place at the same time are merged into a single update, and the params that would not
+        change the state of the component (as set by the previous procedures) are dropped.
+        """
+        merged: List[Dict[str, Any]] = []
+        for procedure in compiled:
+            if merged and isclose(merged[-1]["time"], procedure["time"]):
+                merged[-1]["params"] = {**merged[-1]["params"], **procedure["params"]}
+            else:
+                merged.append(dict(time=procedure["time"], params=procedure["params"]))
+
+        # the state of the component is unknown before the first procedure, so all the first values are kept
+        state: Dict[str, Any] = {}
+        coalesced = []
+        for procedure in merged:
+            params = {
+                k: v
+                for k, v in procedure["params"].items()
+                if k not in state or not _same_value(component, k, state[k], v)
+            }
+            state.update(params)
+            if params:
+                coalesced.append(dict(time=procedure["time"], params=params))
+        return coalesced
 
     def to_dict(self):
         compiled = deepcopy(self._compile(dry_run=True))
@@ -351,6 +734,11 @@ class Protocol:
         output = []
         for procedure in deepcopy(self.procedures):
             procedure["component"] = procedure["component"].name
+            # e.g. the values of add_many(), given as quantities
+            procedure["params"] = {
+                k: str(v) if isinstance(v, flowchem_ureg.Quantity) else v
+                for k, v in procedure["params"].items()
+            }
             output.append(procedure)
         return output
 
@@ -422,7 +810,7 @@ class Protocol:
                     mapped_component = self.graph.component_from_origin_and_port(component, procedure["setting"])  # type: ignore
                     procedure["mapped component"] = mapped_component.name
                 # TODO: make this deterministic for color coordination
-                procedure["params"] = json.dumps(procedure["params"])
+                procedure["params"] = json.dumps(procedure["params"], default=str)
 
             # prettify the tooltips
             tooltips = [
@@ -470,7 +858,7 @@ class Protocol:
 
     def execute(
         self,
-        dry_run: Union[bool, int] = False,
+        dry_run: Union[bool, int, str] = False,
         verbosity: str = "info",
         confirm: bool = False,
         strict: bool = True,
@@ -478,6 +866,8 @@ class Protocol:
         log_file_verbosity: Optional[str] = "trace",
         log_file_compression: Optional[str] = None,
         data_file: Union[str, bool, PathLike, None] = True,
+        data_format: str = "jsonl",
+        fsync: str = "close",
     ) -> Experiment:
         """
         Executes the procedure.
@@ -486,14 +876,17 @@ class Protocol:
         - `confirm`: Whether to bypass the manual confirmation message before execution.
         - `dry_run`: Whether to simulate the experiment or actually perform it. Defaults to `False`,
         which means executing the protocol on real hardware. If an integer greater than zero,
-        the dry run will execute at that many times speed.
+        the dry run will execute at that many times speed. If "virtual", the dry run is simulated in virtual time, i.e.
+        it completes as fast as possible while all the records have the timestamps of a real time execution.
         - `strict`: Whether to stop execution upon encountering any errors.
         If False, errors will be noted but ignored.
         - `verbosity`: The level of logging verbosity. One of "critical", "error", "warning", "success", "info", "debug", or "trace" in descending order of severity. "debug" and (especially) "trace" are not meant to be used regularly, as they generate significant amounts of usually useless information. However, these verbosity levels are useful for tracing where exactly a bug was generated, especially if no error message was thrown.
         - `log_file`: The file to write the logs to during execution. If `True`, the data will be written to a file in `~/.mechwolf` with the filename `{experiment_id}.log.jsonl`. If falsey, no logs will be written to the file.
         - `log_file_verbosity`: How verbose the logs in file should be. By default, it is "trace", which is the most verbose logging available. If `None`, it will use the same level as `verbosity`.
         - `log_file_compression`: Whether to compress the log file after the experiment.
-        - `data_file`: The file to write the experimental data to during execution. If `True`, the data will be written to a file in `~/.mechwolf` with the filename `{experiment_id}.data.jsonl`. If falsey, no data will be written to the file.
+        - `data_file`: The file to write the experimental data to during execution. If `True`, the data will be written to a file in `~/.mechwolf` with the filename `{experiment_id}.data.jsonl` (or `.data.bin`, see `data_format`). If falsey, no data will be written to the file.
+        - `data_format`: The format of the data file. Either "jsonl" (the default), one line of JSON per datapoint, or "binary", a columnar format written in chunks as the experiment runs, which can be loaded selectively by device and time window with `read_chunked_data()`.
+        - `fsync`: When to sync the data file and the journal to disk. One of "never" (left to the OS), "flush" (after every write, the safest but slowest) or "close" (the default, when the execution ends).
 
         Returns:
         - An `Experiment` object. In a Jupyter notebook, the object yields an interactive visualization. If protocol execution fails for any reason that does not raise an error, the return type is None.
@@ -513,6 +906,63 @@ class Protocol:
             log_file_verbosity=log_file_verbosity,
             log_file_compression=log_file_compression,
             data_file=data_file,
+            data_format=data_format,
+            fsync=fsync,
+        )
+
+        return E
+
+    def resume(
+        self,
+        experiment_id: str,
+        dry_run: Union[bool, int, str] = False,
+        verbosity: str = "info",
+        confirm: bool = False,
+        strict: bool = True,
+        log_file: Union[str, bool, PathLike, None] = True,
+        log_file_verbosity: Optional[str] = "trace",
+        log_file_compression: Optional[str] = None,
+        data_file: Union[str, bool, PathLike, None] = True,
+        data_format: str = "jsonl",
+        fsync: str = "close",
+    ) -> Experiment:
+        """
+        Resumes an interrupted execution of the protocol, e.g. after a crash of the Python process.
+
+        The procedures dispatched to and confirmed by the components are read back from the experiment's journal,
+        written next to its data file. The components are brought back to their state as of the last confirmed
+        procedure, then the execution continues from that point of the protocol, skipping the completed steps.
+        Logs and data are appended to the files of the interrupted experiment, the data recorded after the last
+        confirmed procedure being dropped first, as it is recorded again.
+
+        Arguments:
+        - `experiment_id`: The ID of the experiment to resume.
+        - `data_file`: The data file of the experiment to resume. If `True`, the data (and the journal) are read from
+        `~/.flowchem`, as written by `Protocol.execute()`.
+        - `data_format`: The format of the data file of the experiment to resume.
+        - `fsync`: When to sync the data file and the journal to disk, see `Protocol.execute()`.
+        See `Protocol.execute()` for all the other arguments.
+
+        Returns:
+        - The resumed `Experiment` object, including the data and procedures of the interrupted execution.
+
+        Raises:
+        - `ValueError`: If the experiment is not from this protocol or if it was already completed.
+        - `FileNotFoundError`: If the experiment's journal cannot be found.
+        """
+        E = Experiment(self)
+        E._resume(
+            experiment_id=experiment_id,
+            dry_run=dry_run,
+            verbosity=verbosity,
+            confirm=confirm,
+            strict=strict,
+            log_file=log_file,
+            log_file_verbosity=log_file_verbosity,
+            log_file_compression=log_file_compression,
+            data_file=data_file,
+            data_format=data_format,
+            fsync=fsync,
         )
 
         return E
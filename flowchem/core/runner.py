@@ -0,0 +1,101 @@
+""" Concurrent execution of several protocols. """
+from __future__ import annotations
+
+import asyncio
+from itertools import combinations
+from typing import TYPE_CHECKING, List, Optional, Sequence, Union
+
+from IPython import get_ipython
+
+from flowchem.core.execute import main_concurrently
+from flowchem.core.experiment import Experiment
+from flowchem.core.simulation import simulate
+
+if TYPE_CHECKING:
+    from flowchem import Protocol
+
+
+def execute_protocols(
+    protocols: Sequence["Protocol"],
+    dry_run: Union[bool, int, str] = False,
+    verbosity: str = "info",
+    confirm: bool = False,
+    strict: bool = True,
+    log_file: bool = True,
+    log_file_verbosity: Optional[str] = "trace",
+    log_file_compression: Optional[str] = None,
+    data_file: bool = True,
+    data_format: str = "jsonl",
+    fsync: str = "close",
+) -> List[Experiment]:
+    """
+    Executes several protocols concurrently, in a single event loop.
+
+    The protocols must be defined over the same DeviceGraph and act on disjoint sets of components, e.g. two
+    independent reactor lines. The connections to the devices are shared, so that devices on the same bus (e.g.
+    daisy-chained pumps) can be used by different protocols: the commands sent to a bus are serialized by its lock
+    (see `Component._bus_lock()`). Each protocol gets its own `Experiment`, with separate data and log files.
+
+    Arguments:
+    - `protocols`: The protocols to execute.
+    - `log_file`: Whether to write the logs of each experiment to a file in `~/.flowchem`.
+    - `data_file`: Whether to write the data of each experiment to a file in `~/.flowchem`.
+    See `Protocol.execute()` for all the other arguments.
+
+    Returns:
+    - A list of `Experiment` objects, in the same order as the protocols.
+
+    Raises:
+    - `ValueError`: If the protocols are not defined over the same DeviceGraph or if they share any component.
+    """
+    if not protocols:
+        raise ValueError("No protocol to execute.")
+
+    graph = protocols[0].graph
+    if any(protocol.graph is not graph for protocol in protocols):
+        raise ValueError("All the protocols must be defined over the same DeviceGraph.")
+
+    # each component can only be controlled by one protocol
+    for first, second in combinations(protocols, 2):
+        shared = {p["component"] for p in first.procedures} & {
+            p["component"] for p in second.procedures
+        }
+        if shared:
+            raise ValueError(
+                f"{first} and {second} cannot be executed concurrently "
+                f"as they both use {', '.join(str(c) for c in shared)}."
+            )
+
+    experiments = [Experiment(protocol) for protocol in protocols]
+
+    # make the user confirm once if it's the real deal
+    if not dry_run and not confirm:
+        experiments[0].get_confirmation()
+
+    for experiment in experiments:
+        experiment._setup(
+            dry_run=dry_run,
+            verbosity=verbosity,
+            log_file=log_file,
+            log_file_verbosity=log_file_verbosity,
+            log_file_compression=log_file_compression,
+            data_file=data_file,
+            data_format=data_format,
+            fsync=fsync,
+        )
+
+    if len({experiment.experiment_id for experiment in experiments}) < len(experiments):
+        raise ValueError("The protocols to be executed concurrently must be different.")
+
+    if dry_run == "virtual":
+        simulate(experiments=experiments, strict=strict)
+    elif get_ipython():
+        for experiment in experiments:
+            experiment._display(verbosity=verbosity.upper(), strict=strict)
+        asyncio.ensure_future(
+            main_concurrently(experiments, dry_run=dry_run, strict=strict)
+        )
+    else:
+        asyncio.run(main_concurrently(experiments, dry_run=dry_run, strict=strict))
+
+    return experiments
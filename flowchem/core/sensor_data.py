@@ -0,0 +1,242 @@
+""" Columnar store of the data collected by a sensor. """
+from __future__ import annotations
+
+from collections.abc import Sequence
+from numbers import Real
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from flowchem.core.execute import Datapoint
+
+
+def min_max_decimate(
+    x: np.ndarray, y: np.ndarray, bins: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reduces a series to the minimum and maximum of `y` in each of `bins` bins of consecutive points.
+
+    Unlike subsampling, the peaks of the series are preserved, which makes this suitable to plot long series.
+
+    Returns:
+    - The decimated `x` (the center of each bin, twice) and `y` (the minimum and maximum of each bin), or the
+    series itself if it has no more than 2 * `bins` points.
+    """
+    if len(x) <= 2 * bins:
+        return x, y
+
+    starts = np.linspace(0, len(x), bins, endpoint=False).astype(int)
+    stops = np.append(starts[1:], len(x))
+    centers = (x[starts] + x[stops - 1]) / 2
+    # fmin/fmax ignore NaN, i.e. non-numeric data
+    minima = np.fmin.reduceat(y, starts)
+    maxima = np.fmax.reduceat(y, starts)
+    return np.repeat(centers, 2), np.column_stack((minima, maxima)).ravel()
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n: int) -> np.ndarray:
+    """
+    Selects `n` points of a series with the Largest-Triangle-Three-Buckets algorithm, preserving its visual shape.
+
+    The first and last points are always selected. The other points are split into `n` - 2 buckets, and in each
+    bucket the point forming the largest triangle with the previously selected point and the average of the next bucket
+    is selected.
+
+    Returns:
+    - The indices of the selected points, in order.
+    """
+    length = len(x)
+    if n >= length:
+        return np.arange(length)
+    if n < 3:
+        return np.array([0, length - 1][:n])
+
+    edges = np.linspace(1, length - 1, n - 1).astype(int)
+    indices = np.empty(n, dtype=int)
+    indices[0], indices[-1] = 0, length - 1
+    selected = 0
+    for i in range(n - 2):
+        if i == n - 3:
+            next_x, next_y = x[-1], y[-1]
+        else:
+            next_x = x[edges[i + 1] : edges[i + 2]].mean()
+            next_y = y[edges[i + 1] : edges[i + 2]].mean()
+
+        xs, ys = x[edges[i] : edges[i + 1]], y[edges[i] : edges[i + 1]]
+        # twice the area of the triangles, the factor is irrelevant
+        areas = np.abs(
+            (x[selected] - next_x) * (ys - y[selected])
+            - (x[selected] - xs) * (next_y - y[selected])
+        )
+        selected = edges[i] + int(np.argmax(areas))
+        indices[i + 1] = selected
+    return indices
+
+
+def min_max_indices(y: np.ndarray, n: int) -> np.ndarray:
+    """
+    Selects up to `n` points of a series, i.e. the minimum and the maximum of `y` in each of `n` / 2 buckets.
+
+    Returns:
+    - The indices of the selected points, in order.
+    """
+    if n >= len(y):
+        return np.arange(len(y))
+    # too few points for a bucket, which takes two
+    if n < 2:
+        return np.array([int(np.argmin(y))] if n == 1 else [], dtype=int)
+
+    edges = np.linspace(0, len(y), n // 2 + 1).astype(int)
+    indices = []
+    for start, stop in zip(edges[:-1], edges[1:]):
+        bucket = y[start:stop]
+        indices.extend(
+            sorted({start + int(np.argmin(bucket)), start + int(np.argmax(bucket))})
+        )
+    return np.array(indices, dtype=int)
+
+
+DOWNSAMPLING_METHODS = {
+    "lttb": lttb_indices,
+    "minmax": lambda x, y, n: min_max_indices(y, n),
+}
+
+
+def _is_scalar(data: Any) -> bool:
+    return isinstance(data, Real) and not isinstance(data, bool)
+
+
+class SensorData(Sequence):
+    """
+    The datapoints of a sensor, stored column by column in NumPy arrays.
+
+    Timestamps, experiment elapsed times and numeric data are stored in float arrays, grown as needed. Only non-numeric
+    data, e.g. spectra, is kept as Python objects. The store behaves as a list of `Datapoint` namedtuples, created on
+    access, so that code written for the previous `List[Datapoint]` keeps working.
+
+    Arguments:
+    - `capacity`: The initial number of datapoints that can be stored without growing the arrays.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._size = 0
+        self._timestamps = np.empty(capacity)
+        self._elapsed_times = np.empty(capacity)
+        self._values = np.empty(capacity)
+        self._objects: Dict[int, Any] = {}  # by index, non-numeric data only
+
+    def __repr__(self):
+        return f"<SensorData with {self._size} datapoints>"
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, index: Union[int, slice]):  # type: ignore
+        if isinstance(index, slice):
+            return [self._datapoint(i) for i in range(*index.indices(self._size))]
+
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("SensorData index out of range")
+        return self._datapoint(index)
+
+    def _datapoint(self, index: int) -> Datapoint:
+        return Datapoint(
+            data=self._objects[index]
+            if index in self._objects
+            else self._values[index].item(),
+            timestamp=self._timestamps[index].item(),
+            experiment_elapsed_time=self._elapsed_times[index].item(),
+        )
+
+    def _grow(self) -> None:
+        capacity = max(2 * len(self._timestamps), 1024)
+        for column in ("_timestamps", "_elapsed_times", "_values"):
+            grown = np.empty(capacity)
+            grown[: self._size] = getattr(self, column)[: self._size]
+            setattr(self, column, grown)
+
+    def append(self, datapoint: Datapoint) -> None:
+        if self._size == len(self._timestamps):
+            self._grow()
+
+        index = self._size
+        self._timestamps[index] = datapoint.timestamp
+        self._elapsed_times[index] = datapoint.experiment_elapsed_time
+        if _is_scalar(datapoint.data):
+            self._values[index] = datapoint.data
+        else:
+            self._values[index] = np.nan
+            self._objects[index] = datapoint.data
+        self._size += 1
+
+    def to_numpy(self) -> Dict[str, np.ndarray]:
+        """
+        Returns the data as NumPy arrays.
+
+        The arrays are read-only views of the store, i.e. no data is copied, reflecting the datapoints stored at the
+        time of the call. Only if some data is not numeric, the `data` column is copied into an array of objects.
+
+        Returns:
+        - A dict with the `timestamp`, `experiment_elapsed_time` and `data` arrays.
+        """
+        columns: Dict[str, np.ndarray] = {
+            "timestamp": self._timestamps[: self._size],
+            "experiment_elapsed_time": self._elapsed_times[: self._size],
+            "data": self._values[: self._size],
+        }
+        for view in columns.values():
+            view.flags.writeable = False
+
+        if self._objects:
+            data = columns["data"].astype(object)
+            for index, value in self._objects.items():
+                data[index] = value
+            columns["data"] = data
+        return columns
+
+    def query(
+        self,
+        start: Optional[float] = None,
+        stop: Optional[float] = None,
+        max_points: Optional[int] = None,
+        method: str = "lttb",
+    ) -> Dict[str, np.ndarray]:
+        """
+        Returns the data in a time window, downsampled if needed. See `Experiment.query()` for the arguments.
+
+        The window is located with a binary search on the experiment elapsed times, which are sorted.
+        """
+        if method not in DOWNSAMPLING_METHODS:
+            raise ValueError(
+                f"Invalid downsampling method {method!r}. "
+                f"Expected one of {', '.join(DOWNSAMPLING_METHODS)}."
+            )
+        columns = self.to_numpy()
+        elapsed_times = columns["experiment_elapsed_time"]
+        first = 0 if start is None else np.searchsorted(elapsed_times, start, "left")
+        last = (
+            len(self) if stop is None else np.searchsorted(elapsed_times, stop, "right")
+        )
+        window = {name: column[first:last] for name, column in columns.items()}
+
+        if max_points is None or max_points >= last - first:
+            return window
+        if window["data"].dtype == object:
+            # non-numeric data cannot be downsampled by shape, take evenly spaced points
+            indices = np.linspace(0, last - first - 1, max_points).astype(int)
+        else:
+            indices = DOWNSAMPLING_METHODS[method](
+                window["experiment_elapsed_time"], window["data"], max_points
+            )
+        return {name: column[indices] for name, column in window.items()}
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Returns the data as a DataFrame with `timestamp`, `experiment_elapsed_time` and `data` columns."""
+        return pd.DataFrame(self.to_numpy(), copy=False)
+
+    def to_list(self) -> List[Datapoint]:
+        """Returns the data as a list of `Datapoint` namedtuples."""
+        return self[:]
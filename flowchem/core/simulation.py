@@ -0,0 +1,84 @@
+""" Simulation of experiments in virtual time, i.e. dry runs completed as fast as possible. """
+from __future__ import annotations
+
+import asyncio
+import selectors
+import threading
+from typing import TYPE_CHECKING, List, Sequence
+
+
+from flowchem.core.clock import VirtualClock
+from flowchem.core.execute import main_concurrently
+
+if TYPE_CHECKING:
+    from flowchem import Experiment
+
+
+class _VirtualTimeSelector(selectors.DefaultSelector):  # type: ignore
+    """A selector that, instead of sleeping until the next timer, advances the virtual time of its loop."""
+
+    def __init__(self, loop: VirtualTimeEventLoop):
+        super().__init__()
+        self._loop = loop
+
+    def select(self, timeout=None):
+        # No timer scheduled: only I/O (e.g. from executor threads) can wake the loop up
+        if timeout is None or timeout <= 0:
+            return super().select(timeout)
+
+        ready = super().select(0)
+        if not ready:
+            self._loop._virtual_time += timeout
+        return ready
+
+
+class VirtualTimeEventLoop(asyncio.SelectorEventLoop):  # type: ignore
+    """
+    An event loop running in virtual time.
+
+    Whenever the loop would wait for the next timer (e.g. `asyncio.sleep()`), the virtual time jumps to it instead.
+    The virtual time starts from zero.
+    """
+
+    def __init__(self):
+        self._virtual_time = 0.0
+        super().__init__(selector=_VirtualTimeSelector(self))
+
+    def time(self) -> float:
+        return self._virtual_time
+
+
+def simulate(experiments: Sequence["Experiment"], strict: bool) -> None:
+    """
+    Executes the experiments as dry runs in virtual time, blocking until completion.
+
+    All the timestamps in the experiment records are virtual, i.e. as if the experiments were started at the time of
+    the simulation and executed in real time.
+    """
+    loop = VirtualTimeEventLoop()
+    for experiment in experiments:
+        experiment._clock = VirtualClock(loop)
+    errors: List[BaseException] = []
+
+    def run():
+        try:
+            loop.run_until_complete(
+                main_concurrently(list(experiments), dry_run="virtual", strict=strict)
+            )
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            loop.close()
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        run()
+    else:
+        # An event loop is already running in this thread, e.g. in Jupyter
+        thread = threading.Thread(target=run, name="flowchem-simulation")
+        thread.start()
+        thread.join()
+
+    if errors:
+        raise errors[0]
@@ -0,0 +1,196 @@
+""" Fan-out of the sensor datapoints to their consumers. """
+from __future__ import annotations
+
+import asyncio
+import inspect
+import traceback
+from collections import OrderedDict, deque
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Collection,
+    Deque,
+    List,
+    Optional,
+    Tuple,
+)
+
+from loguru import logger
+
+if TYPE_CHECKING:
+    from flowchem import Datapoint
+
+OVERFLOW_POLICIES = ("drop_oldest", "block", "coalesce")
+
+
+class Subscription:
+    """
+    A bounded queue of the datapoints published to a `StreamBus`, for one subscriber.
+
+    Subscriptions are async iterables of `(device, datapoint)` tuples, ending once the bus is closed and the queue is
+    drained. See `StreamBus.subscribe()` for the arguments.
+
+    Attributes:
+    - `received`: The number of datapoints published to the subscription.
+    - `dropped`: The number of datapoints dropped (or coalesced) because the subscriber was too slow.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        overflow: str,
+        devices: Optional[Collection[str]],
+        handler: Optional[Callable] = None,
+    ):
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.devices = devices
+        self.received = 0
+        self.dropped = 0
+        self._handler = handler
+        self._task: Optional[asyncio.Task] = None
+        # with the coalesce policy, only the latest datapoint of each device is queued
+        self._queue: Deque[Tuple[str, "Datapoint"]] = deque()
+        self._latest: "OrderedDict[str, Datapoint]" = OrderedDict()
+        # created in the loop executing the experiment, see _init_events()
+        self._not_empty: Optional[asyncio.Event] = None
+        self._not_full: Optional[asyncio.Event] = None
+        self._closed = False
+
+    def _init_events(self) -> None:
+        if self._not_empty is None:
+            self._not_empty = asyncio.Event()
+            self._not_full = asyncio.Event()
+            self._not_full.set()
+
+    def __len__(self) -> int:
+        return len(self._latest) if self.overflow == "coalesce" else len(self._queue)
+
+    async def _put(self, device: str, datapoint: "Datapoint") -> None:
+        if self.devices is not None and device not in self.devices:
+            return
+        self._init_events()
+        self.received += 1
+
+        if self.overflow == "coalesce":
+            if device in self._latest:
+                del self._latest[device]
+                self.dropped += 1
+            self._latest[device] = datapoint
+        else:
+            while self.overflow == "block" and len(self._queue) >= self.maxsize:
+                self._not_full.clear()  # type: ignore
+                await self._not_full.wait()  # type: ignore
+            if len(self._queue) >= self.maxsize:
+                self._queue.popleft()
+                self.dropped += 1
+            self._queue.append((device, datapoint))
+        self._not_empty.set()  # type: ignore
+
+    async def get(self) -> Tuple[str, "Datapoint"]:
+        """
+        Waits for the next datapoint.
+
+        Raises:
+        - `StopAsyncIteration`: Once the bus is closed and all the datapoints were consumed.
+        """
+        self._init_events()
+        while not len(self):
+            if self._closed:
+                raise StopAsyncIteration
+            self._not_empty.clear()  # type: ignore
+            await self._not_empty.wait()  # type: ignore
+
+        if self.overflow == "coalesce":
+            item = self._latest.popitem(last=False)
+        else:
+            item = self._queue.popleft()
+            self._not_full.set()  # type: ignore
+        return item
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Tuple[str, "Datapoint"]:
+        return await self.get()
+
+    def _close(self) -> None:
+        self._closed = True
+        if self._not_empty is not None:
+            self._not_empty.set()
+
+    async def _consume(self) -> None:
+        """Calls the handler with every datapoint, until the bus is closed."""
+        async for device, datapoint in self:
+            try:
+                result = self._handler(device, datapoint)  # type: ignore
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Stream subscriber {self._handler} failed! [{repr(e)}]")
+                logger.trace(traceback.format_exc())
+
+
+class StreamBus:
+    """
+    Publishes the sensor datapoints to any number of subscribers, each with its own bounded queue.
+
+    Publishing only queues the datapoints, so that the acquisition does not wait for slow consumers (e.g. file
+    writing, plotting), unless they subscribed with the "block" overflow policy.
+    """
+
+    def __init__(self):
+        self._subscriptions: List[Subscription] = []
+
+    def subscribe(
+        self,
+        handler: Optional[Callable] = None,
+        maxsize: int = 1000,
+        overflow: str = "drop_oldest",
+        devices: Optional[Collection[str]] = None,
+    ) -> Subscription:
+        """
+        Adds a subscriber.
+
+        Arguments:
+        - `handler`: If given, a function (or coroutine function) called with the device name and the datapoint of
+        every datapoint published, in a dedicated task. Otherwise, iterate over the returned subscription.
+        - `maxsize`: The maximum number of datapoints queued for the subscriber.
+        - `overflow`: What to do when the queue is full. One of "drop_oldest" (the oldest datapoint is dropped),
+        "block" (publishing waits for the subscriber, i.e. no datapoint is lost but acquisition may be slowed down)
+        or "coalesce" (only the latest datapoint of each device is queued, regardless of `maxsize`).
+        - `devices`: If given, the names of the devices whose datapoints are published to the subscriber.
+
+        Returns:
+        - The `Subscription`.
+
+        Raises:
+        - `ValueError`: If the overflow policy is not valid.
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(
+                f"Invalid overflow policy {overflow!r}. "
+                f"Expected one of {', '.join(OVERFLOW_POLICIES)}."
+            )
+        subscription = Subscription(maxsize, overflow, devices, handler)
+        self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscriptions.remove(subscription)
+        subscription._close()
+
+    async def publish(self, device: str, datapoint: "Datapoint") -> None:
+        for subscription in self._subscriptions:
+            if subscription._handler is not None and subscription._task is None:
+                subscription._task = asyncio.create_task(subscription._consume())
+            await subscription._put(device, datapoint)
+
+    async def close(self) -> None:
+        """Waits for the subscribers with a handler to consume all the datapoints queued, then ends the streams."""
+        for subscription in self._subscriptions:
+            subscription._close()
+        tasks = [s._task for s in self._subscriptions if s._task is not None]
+        await asyncio.gather(*tasks)
+        for subscription in self._subscriptions:
+            subscription._task = None
@@ -1,6 +1,65 @@
 """ Unit-conversion related functions """
+import copy
+from functools import lru_cache
+from typing import Dict, Union
+
 import pint
 
 flowchem_ureg = pint.UnitRegistry(autoconvert_offset_to_baseunit=True)
 flowchem_ureg.define("step = []")
 flowchem_ureg.define("stroke = 48000 * step")
+
+# The number of distinct expressions whose parsed quantity is kept, see parse_quantity()
+PARSE_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _cached_parse(expression: str) -> pint.Quantity:
+    return flowchem_ureg.parse_expression(expression)
+
+
+def _parse(expression: Union[str, pint.Quantity]) -> pint.Quantity:
+    # quantities are already parsed, e.g. the values of Protocol.add_many()
+    if isinstance(expression, flowchem_ureg.Quantity):
+        return expression
+    # anything else (e.g. unhashable values) is left to pint, failing as usual
+    if not isinstance(expression, str):
+        return flowchem_ureg.parse_expression(expression)
+    return _cached_parse(expression)
+
+
+def parse_quantity(expression: Union[str, pint.Quantity]) -> pint.Quantity:
+    """
+    Parses an expression such as "1 mL/min" into a `pint.Quantity` of `flowchem_ureg`, like `parse_expression()`.
+    Quantities are returned as they are (copied).
+
+    The same few expressions are parsed over and over during the definition and execution of protocols, so the parsed
+    quantities are kept in a bounded, thread-safe LRU cache, see `parse_cache_info()`. A copy is returned, as quantities
+    can be modified in place, e.g. with `ito()`.
+
+    Raises:
+    - The errors of `parse_expression()`, which are not cached.
+    """
+    return copy.copy(_parse(expression))
+
+
+def parse_dimensionality(expression: Union[str, pint.Quantity]):
+    """Returns the dimensionality of an expression, see `parse_quantity()`."""
+    return _parse(expression).dimensionality
+
+
+def parse_cache_info() -> Dict[str, int]:
+    """
+    Returns:
+    - A dict with the number of cache `hits` and `misses` of `parse_quantity()` and `parse_dimensionality()`, and the
+    current and maximum `size` of the cache.
+    """
+    info = _cached_parse.cache_info()
+    return dict(
+        hits=info.hits, misses=info.misses, size=info.currsize, maxsize=info.maxsize
+    )
+
+
+def clear_parse_cache() -> None:
+    """Empties the cache of parsed expressions and resets its statistics."""
+    _cached_parse.cache_clear()
@@ -0,0 +1,94 @@
+""" Index of time intervals, e.g. the procedures of a component, for overlap checks and range queries. """
+import heapq
+import math
+from typing import Generic, Iterable, List, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class IntervalIndex(Generic[T]):
+    """
+    A static index of `[start, stop]` intervals, each with an item attached, e.g. a procedure.
+
+    The intervals are sorted once by start, and stored as an implicit augmented interval tree: the sorted list is a
+    balanced binary search tree (each range rooted at its middle element), where each node also knows the latest stop
+    of its subtree. Building the index and finding all the overlaps take O(n log n), plus the number of overlaps found,
+    and querying a time window O(log n + k), for k results.
+
+    Arguments:
+    - `intervals`: The `(start, stop, item)` tuples to index.
+    """
+
+    def __init__(self, intervals: Iterable[Tuple[float, float, T]]):
+        # sorted is stable, so intervals with the same start keep their order
+        entries = sorted(intervals, key=lambda x: x[0])
+        self._starts = [entry[0] for entry in entries]
+        self._stops = [entry[1] for entry in entries]
+        self._items = [entry[2] for entry in entries]
+        # by node, i.e. middle index of a range, the latest stop in the range
+        self._max_stops = [-math.inf] * len(entries)
+        self._build(0, len(entries))
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _build(self, lo: int, hi: int) -> float:
+        if lo >= hi:
+            return -math.inf
+        mid = (lo + hi) // 2
+        self._max_stops[mid] = max(
+            self._stops[mid], self._build(lo, mid), self._build(mid + 1, hi)
+        )
+        return self._max_stops[mid]
+
+    def overlaps(self) -> List[Tuple[T, T]]:
+        """
+        Finds all the pairs of overlapping intervals.
+
+        Intervals touching each other, i.e. one stopping when (or, within floating point precision, about when) the next
+        starts, do not overlap.
+
+        Returns:
+        - The pairs of overlapping items, each ordered by start, in order of the start of their second item.
+        """
+        overlapping = []
+        # heap of the (stop, index) of the intervals not over yet
+        active: List[Tuple[float, int]] = []
+        for i, (start, stop) in enumerate(zip(self._starts, self._stops)):
+            while active and (
+                active[0][0] < start or math.isclose(active[0][0], start)
+            ):
+                heapq.heappop(active)
+            for _, j in sorted(active, key=lambda x: x[1]):
+                overlapping.append((self._items[j], self._items[i]))
+            heapq.heappush(active, (stop, i))
+        return overlapping
+
+    def query(self, start: float, stop: float) -> List[T]:
+        """
+        Finds the intervals overlapping the `[start, stop)` window.
+
+        Intervals overlap the window if they start before its end and stop after its beginning. Instantaneous
+        intervals, i.e. with the same start and stop, overlap it if they are within the window.
+
+        Returns:
+        - The matching items, in order of start.
+        """
+        found: List[int] = []
+        self._query(0, len(self._items), start, stop, found)
+        return [self._items[i] for i in found]
+
+    def _query(self, lo: int, hi: int, start: float, stop: float, found: List[int]):
+        if lo >= hi:
+            return
+        mid = (lo + hi) // 2
+        # nothing in this subtree stops after the beginning of the window
+        if self._max_stops[mid] < start:
+            return
+        self._query(lo, mid, start, stop, found)
+        # neither this interval, nor the ones to its right, start before the end of the window
+        if self._starts[mid] >= stop:
+            return
+        if self._stops[mid] > start or (self._stops[mid] == self._starts[mid] >= start):
+            found.append(mid)
+        self._query(mid + 1, hi, start, stop, found)
@@ -0,0 +1,140 @@
+import asyncio
+import json
+
+import pytest
+
+from flowchem import DeviceGraph, Protocol
+from flowchem.components.dummy import DummyPump, DummySensor
+from flowchem.core import Datapoint, JSONLReader, data_reader
+from flowchem.core.data_writer import (
+    ChunkedDataWriter,
+    DataWriter,
+    read_chunked_data,
+    truncate_chunked_data,
+)
+
+
+def test_data_writer(tmp_path):
+    lines = [json.dumps({"device": "sensor", "data": i}) + "\n" for i in range(100)]
+    expected = tmp_path / "expected.data.jsonl"
+    with open(expected, "a") as f:
+        f.writelines(lines)
+
+    writer = DataWriter(tmp_path / "test.data.jsonl", flush_size=1000)
+    for line in lines:
+        writer.write(line)
+        # lines are written in batches of at least flush_size characters
+        assert len(writer._buffer) < 1000 / len(lines[0])
+    writer.close()
+    assert writer.path.read_bytes() == expected.read_bytes()
+
+    # the file is appended to if the writer is reused
+    writer.write(lines[0])
+    writer.close()
+    assert writer.path.read_bytes() == expected.read_bytes() + lines[0].encode()
+
+    with pytest.raises(ValueError):
+        DataWriter(tmp_path / "test.data.jsonl", fsync="always")
+
+
+async def test_data_writer_flush_interval(tmp_path):
+    writer = DataWriter(tmp_path / "test.data.jsonl", flush_interval=0.1)
+    writer.write("line\n")
+    assert not writer.path.exists()
+    await asyncio.sleep(0.2)
+    assert writer.path.read_text() == "line\n"
+    writer.close()
+
+
+def test_chunked_data_writer(tmp_path):
+    writer = ChunkedDataWriter(tmp_path / "test.data.bin", chunk_size=10)
+    for i in range(100):
+        writer.append("a", Datapoint(i / 2, 1000 + i, i), unit="mL")
+        if i % 4 == 0:
+            writer.append("b", Datapoint([i, i], 1000 + i, i), unit="")
+    writer.close()
+
+    # a chunk is written every chunk_size rows of a device
+    index = writer.index_path.read_text().splitlines()
+    assert len([line for line in index if '"device": "a"' in line]) == 10
+
+    df = read_chunked_data(writer.path, "a", start=15, stop=24)
+    assert list(df["experiment_elapsed_time"]) == list(range(15, 25))
+    assert list(df["data"]) == [i / 2 for i in range(15, 25)]
+    assert df.attrs["unit"] == "mL"
+
+    df = read_chunked_data(writer.path, "b")
+    assert len(df) == 25
+    assert df["data"].iloc[1] == [4, 4]
+    assert read_chunked_data(writer.path, "c").empty
+
+    # the data from 55 s on is dropped, including an unindexed chunk left by a crash
+    with open(writer.path, "ab") as f:
+        f.write(b"partial chunk")
+    kept = truncate_chunked_data(writer.path, 55)
+    assert list(kept["a"]["experiment_elapsed_time"]) == list(range(55))
+    assert kept["b"]["data"].iloc[-1] == [52, 52]
+    assert list(read_chunked_data(writer.path, "b")["experiment_elapsed_time"]) == list(
+        range(0, 55, 4)
+    )
+    writer.append("a", Datapoint(0, 1055, 55), unit="mL")
+    writer.close()
+    assert len(read_chunked_data(writer.path, "a")) == 56
+
+
+def test_binary_data_format(tmp_path):
+    D = DeviceGraph()
+    pump = DummyPump(name="pump")
+    sensor = DummySensor(name="sensor")
+    D.add_connection(pump, sensor)
+    P = Protocol(D, name="binary data")
+    P.add(pump, rate="5 mL/min", duration="2 h")
+    P.add(sensor, rate="1 Hz", start="1 h", stop="2 h")
+
+    data_file = tmp_path / "test.data.bin"
+    E = P.execute(
+        dry_run="virtual",
+        log_file=False,
+        data_file=data_file,
+        data_format="binary",
+        fsync="flush",
+    )
+    assert E._data_writer.fsync == E._journal.fsync == "flush"
+    df = read_chunked_data(data_file, "sensor", start=5400)
+    assert len(df) == 1800
+    assert df["timestamp"].iloc[0] == pytest.approx(E.start_time + 5400)
+    assert (df["data"] == "simulated read").all()
+
+    with pytest.raises(ValueError, match="Invalid fsync policy"):
+        P.execute(
+            dry_run="virtual", log_file=False, data_file=data_file, fsync="always"
+        )
+
+
+def test_jsonl_reader(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_reader, "BLOCK_LINES", 10)
+    writer = DataWriter(tmp_path / "test.data.jsonl")
+    for i in range(100):
+        for device in ("a", "b"):
+            writer.append(device, Datapoint(i, 1000 + i, i), unit="mL")
+    writer.close()
+
+    reader = JSONLReader(writer.path)
+    assert reader.devices == ["a", "b"]
+    assert len(reader.index["blocks"]) == 20
+    assert reader.index_path.exists()
+
+    df = reader.to_dataframe("b", start=90)
+    assert list(df["experiment_elapsed_time"]) == list(range(90, 100))
+    assert set(df["device"]) == {"b"}
+    assert [len(f) for f in reader.frames(start=50, chunk_size=40)] == [40, 40, 20]
+
+    # the index is extended as the file grows, e.g. while the experiment is running
+    writer.write('{"device": "c", "timestamp": 2000, "experiment_elapsed_time": 1000, ')
+    writer.close()
+    reader = JSONLReader(writer.path)
+    assert reader.devices == ["a", "b"]
+    writer.write('"data": 1, "unit": ""}\n')
+    writer.close()
+    assert reader.devices == ["a", "b", "c"]
+    assert len(list(reader.records())) == 201
@@ -1,6 +1,20 @@
-from flowchem.components.dummy import DummyPump, DummySensor, BrokenDummySensor
+import asyncio
+import json
+import time
+from contextlib import AsyncExitStack
+
+import numpy as np
+import pytest
+
+from flowchem.components.dummy import Dummy, DummyPump, DummySensor, BrokenDummySensor
 from flowchem.components.stdlib import Vessel, Tube
-from flowchem import Protocol, DeviceGraph
+from flowchem import Experiment, Protocol, DeviceGraph
+from flowchem.core import Datapoint, SensorData, execute_protocols
+from flowchem.components.properties.sensor import ReadSchedule, SamplingStats
+from flowchem.core.data_writer import DATA_FORMATS, read_chunked_data
+from flowchem.core.journal import ExecutionJournal
+from flowchem.core.sensor_data import min_max_decimate, min_max_indices
+from flowchem.core.execute import enter_components, main, reset_to_base_state
 
 # create components
 from flowchem.units import flowchem_ureg
@@ -42,3 +56,554 @@ from flowchem.units import flowchem_ureg
 #     # test fast forward
 #     E = P.execute(confirm=True, dry_run=5, log_file=None, data_file=None)
 #     assert len(E.data["test"]) >= 1
+
+
+@pytest.fixture
+def pump_protocol():
+    D = DeviceGraph()
+    vessel = Vessel(name="vessel", description="nothing")
+    pump = DummyPump(name="pump")
+    D.add_device([vessel, pump])
+    D.add_connection(vessel, pump)
+
+    P = Protocol(D, name="testing execution")
+    P.add(pump, rate="5 mL/min", start="0 seconds", stop="60 secs")
+    return P
+
+
+async def test_cancel(pump_protocol):
+    E = Experiment(pump_protocol)
+    E.dry_run = True
+    E._compiled_protocol = pump_protocol._compile(dry_run=True)
+
+    # cancelling must stop the experiment immediately, not at the end of the protocol
+    asyncio.get_running_loop().call_later(0.1, setattr, E, "cancelled", True)
+    await asyncio.wait_for(main(E, dry_run=True, strict=True), timeout=10)
+
+    assert E.was_executed
+    assert len(E.executed_procedures) == 1
+
+
+async def test_scheduler_time_order(pump_protocol):
+    pump = pump_protocol.graph["pump"]
+    pump_protocol.procedures = []
+    for step in range(10):
+        pump_protocol.add(
+            pump,
+            rate=f"{step + 1} mL/min",
+            start=f"{step / 20} seconds",
+            stop=f"{(step + 1) / 20} seconds",
+        )
+
+    E = Experiment(pump_protocol)
+    E.dry_run = True
+    E._compiled_protocol = pump_protocol._compile(dry_run=True)
+    await asyncio.wait_for(main(E, dry_run=True, strict=True), timeout=10)
+
+    executed = [p["params"]["rate"] for p in E.executed_procedures]
+    assert executed == [f"{step + 1} mL/min" for step in range(10)] + ["0 mL/min"]
+
+
+async def test_execution_timing(pump_protocol):
+    pump_protocol.procedures = []
+    pump_protocol.add(pump_protocol.graph["pump"], rate="5 mL/min", duration="0.2 s")
+
+    E = Experiment(pump_protocol)
+    E.dry_run = True
+    E._compiled_protocol = pump_protocol._compile(dry_run=True)
+    await asyncio.wait_for(main(E, dry_run=True, strict=True), timeout=10)
+
+    for record in E.executed_procedures:
+        assert record["scheduled_time"] <= record["dispatch_time"] <= record["ack_time"]
+    stop = E.executed_procedures[-1]
+    assert stop["scheduled_time"] == pytest.approx(E.start_time + 0.2)
+
+    skew = E.actuation_skew()
+    assert 0 <= skew["dispatch_delay"]["min"] <= skew["dispatch_delay"]["max"] < 0.1
+
+
+class SlowDummy(Dummy):
+    """A dummy component taking 0.2 s to initialize."""
+
+    def __init__(self, name, bus, fail=False):
+        super().__init__(name=name)
+        self.bus = bus
+        self.fail = fail
+        self.entered = False
+
+    @property
+    def _bus(self):
+        return self.bus
+
+    async def __aenter__(self):
+        await asyncio.sleep(0.2)
+        if self.fail:
+            raise RuntimeError("Connection failed")
+        self.entered = True
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.entered = False
+
+
+async def test_enter_components():
+    # two daisy-chained components plus two on their own bus
+    components = [SlowDummy(f"dummy{i}", bus) for i, bus in enumerate("AABC")]
+
+    start = time.monotonic()
+    async with AsyncExitStack() as stack:
+        startup_times = await enter_components(stack, components)
+        assert all(c.entered for c in components)
+    assert 0.4 <= time.monotonic() - start < 0.6
+    assert not any(c.entered for c in components)
+    assert set(startup_times) == {c.name for c in components}
+
+    # a failure exits the components already initialized
+    components.append(SlowDummy("broken", "D", fail=True))
+    with pytest.raises(RuntimeError):
+        async with AsyncExitStack() as stack:
+            await enter_components(stack, components)
+    assert not any(c.entered for c in components)
+
+
+async def test_reset_to_base_state():
+    class SlowUpdateDummy(Dummy):
+        def __init__(self, name, delay):
+            super().__init__(name=name)
+            self.delay = delay
+            self.active = True
+
+        async def _update(self):
+            await asyncio.sleep(self.delay)
+
+    components = [SlowUpdateDummy(f"dummy{i}", 0.2) for i in range(5)]
+    components.append(SlowUpdateDummy("hanging", 60))
+
+    start = time.monotonic()
+    confirmed = await reset_to_base_state(components, dry_run=False, timeout=0.5)
+    # bound by the timeout of the slowest component, not by the sum of all the updates
+    assert time.monotonic() - start < 1
+    assert not any(c.active for c in components)
+    assert confirmed == {c: c.name != "hanging" for c in components}
+
+
+@pytest.fixture
+def sensor_protocol(pump_protocol):
+    sensor = DummySensor(name="sensor")
+    pump_protocol.graph.add_connection(pump_protocol.graph["pump"], sensor)
+    pump_protocol.procedures = []
+    pump_protocol.add(pump_protocol.graph["pump"], rate="5 mL/min", duration="12 h")
+    pump_protocol.add(sensor, rate="1 Hz", start="1 h", stop="2 h")
+    return pump_protocol
+
+
+def check_virtual_run(E):
+    assert E.end_time - E.start_time == pytest.approx(12 * 3600)
+    assert len(E.data["sensor"]) == 3600
+    assert E.data["sensor"][0].experiment_elapsed_time == pytest.approx(3600)
+    assert [p["experiment_elapsed_time"] for p in E.executed_procedures] == [
+        0,
+        3600,
+        7200,
+        12 * 3600,
+    ]
+
+
+def test_virtual_dry_run(sensor_protocol):
+    start = time.monotonic()
+    E = sensor_protocol.execute(
+        dry_run="virtual", log_file=None, data_file=None, verbosity="warning"
+    )
+    assert time.monotonic() - start < 10
+    check_virtual_run(E)
+
+
+async def test_virtual_dry_run_in_running_loop(sensor_protocol):
+    E = sensor_protocol.execute(
+        dry_run="virtual", log_file=None, data_file=None, verbosity="warning"
+    )
+    check_virtual_run(E)
+
+
+def test_execute_protocols(pump_protocol):
+    graph = pump_protocol.graph
+    other_pump = DummyPump(name="other pump")
+    graph.add_connection(graph["vessel"], other_pump)
+    pump_protocol.procedures = []
+    pump_protocol.add(graph["pump"], rate="5 mL/min", duration="2 h")
+    other_protocol = Protocol(graph, name="other line")
+    other_protocol.add(other_pump, rate="1 mL/min", duration="1 h")
+
+    experiments = execute_protocols(
+        [pump_protocol, other_protocol],
+        dry_run="virtual",
+        log_file=False,
+        data_file=False,
+    )
+    durations = [E.end_time - E.start_time for E in experiments]
+    assert durations == [pytest.approx(2 * 3600), pytest.approx(3600)]
+    for E in experiments:
+        assert {p["component"] for p in E.executed_procedures} == set(
+            E.protocol.graph[p["component"].name] for p in E.protocol.procedures
+        )
+
+    # a component can only be controlled by one protocol at a time
+    other_protocol.add(graph["pump"], rate="1 mL/min", duration="1 h")
+    with pytest.raises(ValueError, match="both use"):
+        execute_protocols([pump_protocol, other_protocol], dry_run=True)
+
+
+def test_execute_protocols_shared_bus(pump_protocol):
+    class DaisyChainedPump(DummyPump):
+        updating = 0
+        overlaps = 0
+
+        @property
+        def _bus(self):
+            return "serial port"
+
+        async def _update(self):
+            DaisyChainedPump.updating += 1
+            DaisyChainedPump.overlaps += DaisyChainedPump.updating > 1
+            await asyncio.sleep(0.05)
+            DaisyChainedPump.updating -= 1
+
+    graph = pump_protocol.graph
+    pumps = [DaisyChainedPump(name=f"pump {i}") for i in range(2)]
+    protocols = []
+    for pump in pumps:
+        graph.add_connection(graph["vessel"], pump)
+        protocol = Protocol(graph, name=pump.name)
+        protocol.add(pump, rate="1 mL/min", start="0 s", stop="0.2 s")
+        protocol.add(pump, rate="2 mL/min", start="0.2 s", stop="0.4 s")
+        protocols.append(protocol)
+
+    experiments = execute_protocols(
+        protocols, dry_run=False, confirm=True, log_file=False, data_file=False
+    )
+    # both pumps are updated at the same times, but the commands never interleave on the bus
+    for E in experiments:
+        assert len(E.executed_procedures) == 3
+    assert DaisyChainedPump.overlaps == 0
+
+
+def test_resume(pump_protocol, tmp_path):
+    pump = pump_protocol.graph["pump"]
+    pump_protocol.procedures = []
+    for step in range(4):
+        pump_protocol.add(
+            pump, rate=f"{step + 1} mL/min", start=f"{step} h", stop=f"{step + 1} h"
+        )
+    pump_protocol.add(pump, rate="1 mL/min", start="4 h", stop="5 h")
+    data_file = tmp_path / "test.data.jsonl"
+    E = pump_protocol.execute(dry_run="virtual", log_file=False, data_file=data_file)
+    journal = tmp_path / f"{E.experiment_id}.journal.jsonl"
+    assert journal.exists()
+    with pytest.raises(ValueError, match="already completed"):
+        pump_protocol.resume(E.experiment_id, dry_run="virtual", data_file=data_file)
+
+    # crash after the confirmation of the procedure at 2 h
+    lines = journal.read_text().splitlines(keepends=True)
+    confirmed = [i for i, line in enumerate(lines) if '"confirm"' in line]
+    journal.write_text("".join(lines[: confirmed[2] + 1]) + '{"event": "disp')
+
+    resumed = pump_protocol.resume(
+        E.experiment_id, dry_run="virtual", log_file=False, data_file=data_file
+    )
+    assert resumed.experiment_id == E.experiment_id
+    assert resumed.end_time - resumed.start_time == pytest.approx(5 * 3600)
+    executed = [
+        (p["experiment_elapsed_time"], p["params"]["rate"])
+        for p in resumed.executed_procedures
+    ]
+    assert executed == [
+        (0, "1 mL/min"),
+        (3600, "2 mL/min"),
+        (7200, "3 mL/min"),
+        # the state as of the last confirmed step is restored, then the protocol continues
+        (7200, "3 mL/min"),
+        (3 * 3600, "4 mL/min"),
+        (4 * 3600, "1 mL/min"),
+        (5 * 3600, "0 mL/min"),
+    ]
+
+    other_protocol = Protocol(pump_protocol.graph, name="other protocol")
+    other_protocol.add(pump, rate="1 mL/min", duration="1 h")
+    with pytest.raises(ValueError, match="not from this protocol"):
+        other_protocol.resume(E.experiment_id, dry_run=True, data_file=data_file)
+
+    # the journal of another experiment is never mistaken for this one's
+    journal.rename(tmp_path / "other.journal.jsonl")
+    with pytest.raises(FileNotFoundError):
+        pump_protocol.resume(E.experiment_id, dry_run="virtual", data_file=data_file)
+    journal.write_text(
+        (tmp_path / "other.journal.jsonl").read_text().replace(E.experiment_id, "other")
+    )
+    with pytest.raises(ValueError, match="is of experiment other"):
+        pump_protocol.resume(E.experiment_id, dry_run="virtual", data_file=data_file)
+
+
+@pytest.mark.parametrize("data_format", ["jsonl", "binary"])
+def test_resume_sensor_data(sensor_protocol, tmp_path, data_format):
+    sensor = sensor_protocol.graph["sensor"]
+    sensor_protocol.procedures = []
+    sensor_protocol.add(sensor_protocol.graph["pump"], rate="5 mL/min", duration="3 h")
+    sensor_protocol.add(sensor, rate="1 Hz", start="1 h", stop="1.5 h")
+    sensor_protocol.add(sensor, rate="2 Hz", start="1.5 h", stop="2 h")
+    data_file = tmp_path / f"test{DATA_FORMATS[data_format]}"
+    E = sensor_protocol.execute(
+        dry_run="virtual", log_file=False, data_file=data_file, data_format=data_format
+    )
+    assert len(E.data["sensor"]) == 1800 + 3600
+
+    # crash at 2 h, the switch to 2 Hz at 1.5 h being the last confirmed procedure
+    journal = tmp_path / f"{E.experiment_id}.journal.jsonl"
+    lines = journal.read_text().splitlines(keepends=True)
+    confirmed = [i for i, line in enumerate(lines) if '"confirm"' in line]
+    journal.write_text("".join(lines[: confirmed[2] + 1]))
+
+    resumed = sensor_protocol.resume(
+        E.experiment_id,
+        dry_run="virtual",
+        log_file=False,
+        data_file=data_file,
+        data_format=data_format,
+    )
+    # the reads after the checkpoint are not recorded twice, in memory or on file
+    times = resumed.data["sensor"].to_numpy()["experiment_elapsed_time"]
+    assert len(times) == 1800 + 3600
+    assert np.all(np.diff(times) > 0)
+    assert len(resumed.query("sensor", 5000, 5999.9)) == 400 + 1200
+    if data_format == "binary":
+        on_file = read_chunked_data(data_file, "sensor")["experiment_elapsed_time"]
+    else:
+        on_file = [
+            json.loads(line)["experiment_elapsed_time"] for line in open(data_file)
+        ]
+    assert list(on_file) == pytest.approx(list(times))
+
+
+def test_journal_checkpoint(tmp_path):
+    journal = ExecutionJournal(tmp_path / "test.journal.jsonl")
+    journal.start("test", start_time=0)
+    journal.dispatch("pump", 0, time=0)
+    journal.confirm("pump", 0, time=0, record={"params": {"rate": "1 mL/min"}})
+    journal.end("completed", end_time=10)
+    assert journal._file is None
+
+    # a new execution from scratch starts over
+    journal.start("test", start_time=20)
+    journal.dispatch("pump", 0, time=0)
+    checkpoint = journal.checkpoint()
+    assert checkpoint.experiment_id == "test"
+    assert checkpoint.confirmed == set()
+    assert checkpoint.executed_procedures == []
+    assert checkpoint.status is None
+    journal.close()
+    journal.close()
+
+    with pytest.raises(ValueError, match="Invalid fsync policy"):
+        ExecutionJournal(tmp_path / "test.journal.jsonl", fsync="always")
+
+
+async def test_sensor_monitor_idle(sensor_protocol):
+    sensor = sensor_protocol.graph["sensor"]
+    E = Experiment(sensor_protocol)
+    E._init_signals()
+    E.start_time = E._clock.time()
+    reads = []
+
+    async def consume():
+        async for result in sensor._monitor(experiment=E, dry_run=True):
+            reads.append(result)
+
+    task = asyncio.create_task(consume())
+    await asyncio.sleep(0.1)
+    # an idle sensor is parked, not spinning
+    assert not reads
+    assert not task.done()
+
+    # and wakes up as soon as it is turned on
+    sensor._update_from_params({"rate": "0.1 Hz"})
+    await asyncio.sleep(0.01)
+    assert len(reads) == 1
+
+    # a new rate is applied without waiting for the next read
+    sensor._update_from_params({"rate": "100 Hz"})
+    await asyncio.sleep(0.1)
+    assert len(reads) > 2
+
+    sensor._update_from_params({"rate": "0 Hz"})
+    E._end_loop = True
+    await asyncio.wait_for(task, timeout=1)
+
+
+class SlowDummySensor(DummySensor):
+    """A dummy sensor whose reads take 30 ms."""
+
+    async def _read(self):
+        await asyncio.sleep(0.03)
+        return 1
+
+
+@pytest.mark.parametrize(
+    "overrun, rate, reads",
+    [
+        # reads shorter than the period do not slow down sampling
+        ("skip", "20 Hz", 20),
+        # 50 Hz cannot be achieved, one deadline out of two is missed
+        ("skip", "50 Hz", 25),
+        ("stretch", "50 Hz", 33),
+    ],
+)
+async def test_sensor_sampling(sensor_protocol, overrun, rate, reads):
+    sensor = SlowDummySensor(name="sensor")
+    sensor.overrun = overrun
+    E = Experiment(sensor_protocol)
+    E._init_signals()
+    E.start_time = E._clock.time()
+
+    async def consume():
+        async for _ in sensor._monitor(experiment=E, dry_run=False):
+            pass
+
+    task = asyncio.create_task(consume())
+    sensor._update_from_params({"rate": rate})
+    await asyncio.sleep(1)
+    E._end_loop = True
+    await asyncio.wait_for(task, timeout=1)
+
+    stats = E.sampling_stats()["sensor"]
+    assert stats["requested_rate"] == pytest.approx(int(rate.split()[0]), rel=0.01)
+    assert stats["achieved_rate"] == pytest.approx(reads, rel=0.15)
+    assert (stats["missed_deadlines"] > 0) == (rate == "50 Hz")
+    assert 0.03 <= stats["latency_p50"] <= stats["latency_max"]
+
+
+@pytest.mark.parametrize(
+    "overrun, deadlines, missed",
+    [
+        ("skip", [0.5, 1.0, 2.0], 1),
+        ("catch_up", [0.5, 1.0, 1.5], 1),
+        ("stretch", [0.5, 1.0, 1.6], 1),
+    ],
+)
+def test_read_schedule(overrun, deadlines, missed):
+    stats = SamplingStats()
+    schedule = ReadSchedule(start=0.0, rate=2.0, overrun=overrun, stats=stats)
+    schedule.skip_to(0.4)
+    assert schedule.deadline == deadlines[0]
+    # on time, then a read overrunning the next deadline
+    assert [schedule.next(0.6), schedule.next(1.6)] == deadlines[1:]
+    assert stats.missed_deadlines == missed
+
+
+def test_sensor_data():
+    data = SensorData(capacity=2)
+    for i in range(5):
+        data.append(Datapoint(data=i / 2, timestamp=100 + i, experiment_elapsed_time=i))
+    data.append(Datapoint(data="spectrum", timestamp=105, experiment_elapsed_time=5))
+
+    assert len(data) == 6
+    assert data[1] == Datapoint(data=0.5, timestamp=101, experiment_elapsed_time=1)
+    assert data[-1].data == "spectrum"
+    assert [d.experiment_elapsed_time for d in data[2:4]] == [2, 3]
+    with pytest.raises(IndexError):
+        data[6]
+
+    columns = data.to_numpy()
+    assert list(columns["timestamp"]) == [100, 101, 102, 103, 104, 105]
+    assert list(columns["data"]) == [0, 0.5, 1, 1.5, 2, "spectrum"]
+    assert not columns["timestamp"].flags.writeable
+    df = data.to_dataframe()
+    assert list(df.columns) == ["timestamp", "experiment_elapsed_time", "data"]
+    assert df["experiment_elapsed_time"].iloc[-1] == 5
+
+
+def test_min_max_decimate():
+    x = np.arange(10_000, dtype=float)
+    y = np.sin(x / 100)
+    y[1234] = 5
+    dx, dy = min_max_decimate(x, y, bins=100)
+    assert len(dx) == len(dy) == 200
+    # peaks are preserved
+    assert dy.max() == 5
+    assert dy.min() == pytest.approx(-1, abs=1e-3)
+
+
+def test_min_max_indices():
+    y = np.array([3.0, 1.0, 4.0, 1.0, 5.0, 9.0, 2.0, 6.0])
+    for n in range(len(y) + 2):
+        assert len(min_max_indices(y, n)) <= n
+    assert min_max_indices(y, 1).tolist() == [1]
+    assert min_max_indices(y, 3).tolist() == [1, 5]
+    assert min_max_indices(y, 8).tolist() == list(range(8))
+
+
+async def test_live_chart_throttling(sensor_protocol, monkeypatch):
+    from types import SimpleNamespace
+
+    from bokeh.models import ColumnDataSource
+
+    import flowchem.core.experiment as experiment_module
+
+    pushes = []
+    monkeypatch.setattr(experiment_module, "get_ipython", lambda: True)
+    monkeypatch.setattr(
+        experiment_module, "push_notebook", lambda handle: pushes.append(handle)
+    )
+    monkeypatch.setattr(experiment_module, "PLOT_ROLLOVER", 100)
+
+    E = Experiment(sensor_protocol)
+    E.dry_run = True
+    E._graphs_shown = True
+    live, history = (
+        SimpleNamespace(
+            data_source=ColumnDataSource({"datapoints": [], "timestamps": []})
+        )
+        for _ in range(2)
+    )
+    E._charts["sensor"] = ("target", live, history)
+    E.stream.subscribe(E._plot, overflow="coalesce")
+
+    for i in range(1000):
+        await E._update("sensor", Datapoint(float(i), 0, i))
+        await asyncio.sleep(0.001)
+    await E.stream.close()
+    await asyncio.sleep(0.3)
+
+    # a few refreshes, with the latest datapoints only
+    assert 1 < len(pushes) < 20
+    assert list(live.data_source.data["datapoints"]) == [
+        float(i) for i in range(900, 1000)
+    ]
+    assert max(history.data_source.data["datapoints"]) == 999
+
+
+def test_query(sensor_protocol):
+    E = Experiment(sensor_protocol)
+    for i in range(10_000):
+        E.data.setdefault("sensor", SensorData()).append(
+            Datapoint(
+                data=np.sin(i / 500) + (i == 7777),
+                timestamp=i,
+                experiment_elapsed_time=i / 10,
+            )
+        )
+
+    df = E.query("sensor", start=100, stop=200)
+    assert list(df["experiment_elapsed_time"]) == [i / 10 for i in range(1000, 2001)]
+    assert len(E.query("sensor", start=2000)) == 0
+
+    for method in ("lttb", "minmax"):
+        df = E.query("sensor", max_points=200, method=method)
+        assert 100 < len(df) <= 200
+        assert df["experiment_elapsed_time"].is_monotonic_increasing
+        # the spike is preserved
+        assert 777.7 in list(df["experiment_elapsed_time"])
+
+    with pytest.raises(KeyError):
+        E.query("pump")
+    with pytest.raises(ValueError):
+        E.query("sensor", max_points=10, method="random")
+    assert E.query("sensor", start=100, stop=200, max_points=10_000).shape == (1001, 3)
@@ -0,0 +1,15 @@
+from flowchem.utils.intervals import IntervalIndex
+
+
+def test_interval_index():
+    index = IntervalIndex(
+        [(5, 15, "b"), (0, 10, "a"), (10, 10, "instant"), (10, 20, "c"), (30, 40, "d")]
+    )
+    assert len(index) == 5
+    # touching intervals do not overlap
+    assert index.overlaps() == [("a", "b"), ("b", "instant"), ("b", "c")]
+
+    assert index.query(10, 12) == ["b", "instant", "c"]
+    assert index.query(20, 30) == []
+    assert index.query(0, 100) == ["a", "b", "instant", "c", "d"]
+    assert IntervalIndex([]).query(0, 1) == []
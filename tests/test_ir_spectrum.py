@@ -0,0 +1,50 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from flowchem.components.devices.MettlerToledo.iCIR_common import (
+    IRSpectrum,
+    IRSpectrumModel,
+)
+
+
+def test_shared_wavenumber_axis():
+    first = IRSpectrum(wavenumber=[4000, 3998, 3996], intensity=[0.1, 0.2, 0.3])
+    second = IRSpectrum(wavenumber=[4000.0, 3998.0, 3996.0], intensity=[1, 2, 3])
+    other = IRSpectrum(wavenumber=[4000, 3996, 3992], intensity=[1, 2, 3])
+
+    assert first.wavenumber is second.wavenumber
+    assert first.wavenumber is not other.wavenumber
+    assert not first.wavenumber.flags.writeable
+    assert first.intensity.dtype == np.float64
+
+    with pytest.raises(ValueError):
+        IRSpectrum(wavenumber=[4000, 3998], intensity=[0.1])
+
+
+def test_ir_spectrum_json():
+    spectrum = IRSpectrum(wavenumber=[4000, 3998], intensity=[0.5, 0.25])
+    assert spectrum.dict() == {"wavenumber": [4000.0, 3998.0], "intensity": [0.5, 0.25]}
+    assert IRSpectrum.parse_raw(spectrum.json()) == spectrum
+    assert len(IRSpectrum(wavenumber=[], intensity=[])) == 0
+
+
+def test_flowir_router():
+    from fastapi.encoders import jsonable_encoder
+
+    from flowchem import FlowIR
+
+    flowir = FlowIR(FlowIR.iC_OPCUA_DEFAULT_SERVER_ADDRESS)
+    spectrum = IRSpectrum(wavenumber=[4000, 3998], intensity=[0.5, 0.25])
+
+    async def last_spectrum():
+        return spectrum
+
+    flowir.last_spectrum_treated = last_spectrum
+    router = flowir.get_router()
+    route = next(r for r in router.routes if r.path.endswith("/last-treated"))
+    assert route.response_model is IRSpectrumModel
+
+    result = asyncio.run(route.endpoint())
+    assert jsonable_encoder(IRSpectrumModel(**result)) == spectrum.dict()
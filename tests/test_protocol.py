@@ -1,12 +1,15 @@
+import json
 from datetime import timedelta
 
+import numpy as np
 import pytest
 
 
 from flowchem import DeviceGraph, Protocol
-from flowchem.components.properties import Valve, Component
+from flowchem.components.properties import Valve, Component, TempControl
 from flowchem.components.dummy import Dummy
 from flowchem.components.stdlib import Pump, Vessel
+from flowchem.units import clear_parse_cache, flowchem_ureg, parse_cache_info
 
 
 @pytest.fixture
@@ -229,3 +232,220 @@ def test_add_dummy(device_graph):
 #     P = Protocol(A)
 #     P.add([pump1, pump2], rate="10 mL/min", duration="5 min")
 #     assert yaml.safe_load(P.yaml()) == json.loads(P.json())
+
+
+def test_compile_coalesce(device_graph):
+    pump = device_graph["pump"]
+    P = Protocol(device_graph)
+    P.add(pump, rate="10 mL/min", start="0 min", stop="5 min")
+    # same rate, no update needed
+    P.add(pump, rate="10 ml/min", start="5 min", stop="10 min")
+    # zero-length procedure merged with the following one at the same time
+    P.add(pump, rate="1 mL/min", start="15 min", stop="15 min")
+    P.add(pump, rate="5 mL/min", start="15 min", stop="20 min")
+
+    assert P._compile()[pump] == [
+        {"time": 0, "params": {"rate": "10 mL/min"}},
+        {"time": 600, "params": {"rate": "0 mL/min"}},
+        {"time": 900, "params": {"rate": "5 mL/min"}},
+        {"time": 1200, "params": {"rate": "0 mL/min"}},
+    ]
+
+
+def test_compile_cache(device_graph, monkeypatch):
+    pump = device_graph["pump"]
+    other_pump = Pump("other pump")
+    device_graph.add_device(other_pump)
+    device_graph.add_connection(pump, other_pump)
+    P = Protocol(device_graph, name="cached")
+    P.add(pump, rate="10 mL/min", start="0 min", stop="5 min")
+    P.add(other_pump, rate="1 mL/min", start="0 min", stop="5 min")
+    compiled = P._compile()
+
+    validated = []
+    for component in (pump, other_pump):
+        monkeypatch.setattr(
+            component, "_validate", lambda dry_run, c=component: validated.append(c)
+        )
+    assert P._compile() == compiled
+    assert validated == []
+
+    # only the component whose procedures changed is compiled again
+    P.add(other_pump, rate="2 mL/min", start="5 min", stop="10 min")
+    assert P._compile()[pump] == compiled[pump]
+    assert validated == [other_pump]
+
+    # the index is rebuilt when the procedures are replaced
+    P.procedures = []
+    P.add(pump, rate="5 mL/min", start="0 min", stop="1 min")
+    assert P._compile()[pump] == [
+        {"time": 0, "params": {"rate": "5 mL/min"}},
+        {"time": 60, "params": {"rate": "0 mL/min"}},
+    ]
+    assert P._compile()[other_pump] == []
+
+    # removing a procedure and adding another one, or editing params in place, is noticed
+    P.add(pump, rate="2 mL/min", start="1 min", stop="2 min")
+    P._compile()
+    P.procedures.pop()
+    P.add(pump, rate="9 mL/min", start="1 min", stop="2 min")
+    assert [p["params"]["rate"] for p in P._compile()[pump]] == [
+        "5 mL/min",
+        "9 mL/min",
+        "0 mL/min",
+    ]
+    assert [p["params"]["rate"] for p in P.scheduled(pump)] == ["5 mL/min", "9 mL/min"]
+    P.procedures[0]["params"]["rate"] = "6 mL/min"
+    assert P._compile()[pump][0]["params"] == {"rate": "6 mL/min"}
+
+
+def test_compile_native_setpoints(device_graph):
+    from flowchem.components.devices.Knauer.AzuraCompactPump import (
+        AzuraCompactPump,
+        AzuraPumpHeads,
+    )
+
+    azura = AzuraCompactPump(ip_address="192.168.1.126", name="azura")
+    device_graph.add_device(azura)
+    device_graph.add_connection(device_graph["pump"], azura)
+    P = Protocol(device_graph, name="native")
+    P.add(azura, rate="20 mL/min", start="0 min", stop="5 min")
+
+    # before the head type is known, e.g. in a dry run, any flow rate is accepted...
+    assert P._compile()[azura][0]["setpoints"] == {"flow": 20000}
+    # ...but not once it is, even if the procedures did not change since
+    azura._headtype = AzuraPumpHeads.FLOWRATE_TEN_ML
+    with pytest.raises(RuntimeError):
+        P._compile()
+
+    P.procedures[0]["params"]["rate"] = "0.5 mL/min"
+    assert P._compile()[azura] == [
+        {"time": 0, "params": {"rate": "0.5 mL/min"}, "setpoints": {"flow": 500}},
+        {"time": 300, "params": {"rate": "0 mL/min"}, "setpoints": {"flow": 0}},
+    ]
+
+    # out of range values are caught before the execution
+    P.add(azura, rate="20 mL/min", start="5 min", stop="10 min")
+    with pytest.raises(RuntimeError):
+        P._compile()
+
+
+def test_add_many(device_graph):
+    pump = device_graph["pump"]
+    P = Protocol(device_graph, name="many")
+    P.add_many(pump, [0, 60, 120], duration="1 min", rate=["1 mL/min"] * 3)
+    P.add_many(pump, np.array([180, 240]), stop="5 min", rate=["2 mL/min", "3 mL/min"])
+    assert [(p["start"], p["stop"]) for p in P.procedures] == [
+        (0, 60),
+        (60, 120),
+        (120, 180),
+        (180, 240),
+        (240, 300),
+    ]
+    assert P.procedures[-1]["params"] == {"rate": "3 mL/min"}
+
+    with pytest.raises(ValueError):
+        P.add_many(pump, [0, 0], duration="1 min", rate=["1 mL/min"] * 2)
+    with pytest.raises(ValueError):
+        P.add_many(pump, [0, 60], duration="1 min", rate=["1 mL/min"])
+    with pytest.raises(ValueError):
+        P.add_many(pump, [0, 60], duration="1 min", rate=["1 mL/min", "1 mL"])
+    with pytest.raises(RuntimeError):
+        P.add_many(pump, [0, 60], rate=["1 mL/min"] * 2)
+    with pytest.raises(RuntimeError):
+        P.add_many(pump, [0, 60], duration="1 min")
+
+    # the params are completed like those given to add()
+    heater = TempControl("heater")
+    device_graph.add_connection(pump, heater)
+    with pytest.raises(RuntimeError):
+        P.add_many(heater, [0, 60], duration="1 min", active=[True, False])
+    P.add_many(heater, [0, 60], duration="1 min", active=[False, False])
+    P.add_many(heater, [120, 180], duration="1 min", temp=["20 degC", "30 degC"])
+    assert [p["params"] for p in P.procedures[-4:]] == [
+        {"active": False, "temp": "0 degC"},
+        {"active": False, "temp": "0 degC"},
+        {"temp": "20 degC", "active": True},
+        {"temp": "30 degC", "active": True},
+    ]
+
+
+def test_add_ramp(device_graph):
+    pump = device_graph["pump"]
+    P = Protocol(device_graph, name="ramp")
+    P.add_ramp(pump, duration="10 min", steps=4, rate=("1 mL/min", "4 mL/min"))
+    assert [p["start"] for p in P.procedures] == [0, 150, 300, 450]
+    assert P.procedures[-1]["stop"] == 600
+    # the values are kept as quantities
+    assert [p["params"]["rate"].m_as("mL/min") for p in P.procedures] == [1, 2, 3, 4]
+    assert json.loads(P.json())[0]["params"] == {"rate": "1.0 milliliter / minute"}
+
+    P.procedures = []
+    P.add_ramp(
+        pump, start="1 min", stop="2 min", step="25 s", rate=("0 mL/min", "1 L/min")
+    )
+    assert [(p["start"], p["stop"]) for p in P.procedures] == [
+        (60, 85),
+        (85, 110),
+        (110, 120),
+    ]
+    assert P.procedures[-1]["params"]["rate"].m_as("L/min") == 1
+
+    # steps which are not exact in floating point do not add a (tiny) extra step
+    P.procedures = []
+    P.add_ramp(
+        pump, start="1 s", stop="1.3 s", step="0.1 s", rate=("1 mL/min", "3 mL/min")
+    )
+    assert [p["start"] for p in P.procedures] == pytest.approx([1, 1.1, 1.2])
+    P.procedures = []
+    P.add_ramp(
+        pump, start="1 s", stop="2.2 s", step="0.4 s", rate=("1 mL/min", "3 mL/min")
+    )
+    assert [p["stop"] - p["start"] for p in P.procedures] == pytest.approx([0.4] * 3)
+    P.procedures = []
+    P.add_ramp(
+        pump, start="1 s", stop="2.3 s", step="0.4 s", rate=("1 mL/min", "4 mL/min")
+    )
+    assert [p["stop"] - p["start"] for p in P.procedures] == pytest.approx(
+        [0.4] * 3 + [0.1]
+    )
+
+    # the values of long ramps do not go through the parse cache while compiling
+    P.procedures = []
+    P.add_ramp(pump, duration="1 h", steps=6000, rate=("0 mL/min", "6 mL/min"))
+    clear_parse_cache()
+    compiled = P._compile()[pump]
+    assert len(compiled) == 6001
+    assert parse_cache_info()["size"] <= 1
+
+
+def test_overlapping_procedures(device_graph):
+    pump = device_graph["pump"]
+    P = Protocol(device_graph, name="overlaps")
+    P.add(pump, rate="1 mL/min", start="0 min", stop="10 min")
+    P.add(pump, rate="2 mL/min", start="2 min", stop="3 min")
+    P.add(pump, rate="3 mL/min", start="5 min", stop="6 min")
+    P.add(pump, rate="4 mL/min", start="10 min", stop="11 min")
+
+    # all the conflicts are reported, not only the first one
+    with pytest.raises(RuntimeError) as e:
+        P._compile()
+    assert str(e.value).count("conflict") == 2
+    assert "4 mL/min" not in str(e.value)
+
+
+def test_scheduled(device_graph):
+    pump = device_graph["pump"]
+    P = Protocol(device_graph, name="scheduled")
+    P.add_many(pump, [0, 60, 120, 180], stop="4 min", rate=["1 mL/min"] * 4)
+
+    assert [p["start"] for p in P.scheduled(pump, "1 min", "3 min")] == [60, 120]
+    assert [p["start"] for p in P.scheduled("pump", 30, 61)] == [0, 60]
+    assert len(P.scheduled(pump)) == 4
+
+    # the index is updated with the procedures
+    P.add(pump, rate="2 mL/min", start="4 min", stop="5 min")
+    assert [p["start"] for p in P.scheduled(pump, start=timedelta(minutes=3))] == [
+        180,
+        240,
+    ]
@@ -0,0 +1,55 @@
+import asyncio
+import time
+
+import pytest
+
+from flowchem.core import Datapoint
+from flowchem.core.stream import StreamBus
+
+
+def point(i):
+    return Datapoint(data=i, timestamp=i, experiment_elapsed_time=i)
+
+
+async def test_overflow_policies():
+    bus = StreamBus()
+    oldest = bus.subscribe(maxsize=3, overflow="drop_oldest")
+    latest = bus.subscribe(overflow="coalesce")
+    only_b = bus.subscribe(devices=["b"])
+    for i in range(5):
+        await bus.publish("a", point(i))
+        await bus.publish("b", point(i))
+    await bus.close()
+
+    assert [(d, p.data) async for d, p in oldest] == [("b", 3), ("a", 4), ("b", 4)]
+    assert oldest.dropped == 7
+    assert [(d, p.data) async for d, p in latest] == [("a", 4), ("b", 4)]
+    assert [p.data async for _, p in only_b] == list(range(5))
+
+    with pytest.raises(ValueError):
+        bus.subscribe(overflow="drop_newest")
+
+
+async def test_slow_subscribers():
+    bus = StreamBus()
+    written = []
+
+    async def slow_writer(device, datapoint):
+        await asyncio.sleep(0.01)
+        written.append(datapoint.data)
+
+    async def slow_plot(device, datapoint):
+        await asyncio.sleep(0.01)
+
+    writer = bus.subscribe(slow_writer, maxsize=5, overflow="block")
+    plot = bus.subscribe(slow_plot, overflow="coalesce")
+    start = time.monotonic()
+    for i in range(10):
+        await bus.publish("a", point(i))
+    # publishing only waits for the blocking subscriber, once its queue is full
+    assert time.monotonic() - start < 0.1
+    await bus.close()
+
+    assert written == list(range(10))
+    assert writer.dropped == 0
+    assert plot.dropped > 0
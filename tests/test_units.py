@@ -0,0 +1,35 @@
+import pint
+import pytest
+
+from flowchem.units import (
+    clear_parse_cache,
+    flowchem_ureg,
+    parse_cache_info,
+    parse_dimensionality,
+    parse_quantity,
+)
+
+
+def test_parse_cache():
+    clear_parse_cache()
+    assert parse_quantity("1 mL/min") == flowchem_ureg.parse_expression("1 mL/min")
+    assert parse_dimensionality("1 mL/min") == flowchem_ureg("1 ml/min").dimensionality
+    info = parse_cache_info()
+    assert (info["hits"], info["misses"], info["size"]) == (1, 1, 1)
+
+    # the cached quantity is not affected by in-place conversions
+    parse_quantity("1 mL/min").ito("L/min")
+    assert parse_quantity("1 mL/min").m_as("mL/min") == 1
+
+    # the errors are those of pint, for strings and other values alike
+    with pytest.raises(AttributeError):
+        parse_quantity(["1 mL/min"])  # type: ignore
+    with pytest.raises(pint.errors.UndefinedUnitError):
+        parse_quantity("1 foo")
+
+    # quantities are already parsed, so they are not cached
+    quantity = flowchem_ureg.Quantity(2, "mL/min")
+    assert parse_quantity(quantity) == quantity
+    assert parse_quantity(quantity) is not quantity
+    assert parse_dimensionality(quantity) == quantity.dimensionality
+    assert parse_cache_info()["size"] == 1
@@ -1,5 +1,6 @@
 import pytest
 
+from flowchem.components.dummy import DummyPump
 from flowchem.components.properties import Component, ActiveComponent, Sensor
 from flowchem.units import flowchem_ureg
 
@@ -191,3 +192,18 @@ def test_validate_sensor_with_failing_read():
     Test()._validate(dry_run=True)
     with pytest.raises(RuntimeError):
         Test()._validate(dry_run=False)
+
+
+def test_snapshot_restore():
+    pump = DummyPump()
+    pump._update_from_params({"rate": "5 mL/min"})
+
+    snapshot = pump._snapshot()
+    assert snapshot == {"rate": flowchem_ureg.parse_expression("5 mL/min")}
+
+    pump._update_from_params(pump._base_state)
+    assert pump._restore(snapshot) == {"rate"}
+    assert pump.rate == flowchem_ureg.parse_expression("5 mL/min")
+
+    # nothing changed, nothing to restore
+    assert pump._restore(snapshot) == set()